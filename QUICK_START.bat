@@ -18,14 +18,14 @@ if exist venv\Scripts\activate.bat (
     python -m venv venv
     call venv\Scripts\activate.bat
     echo Installing backend packages...
-    pip install fastapi uvicorn[standard] python-multipart pydantic networkx python-dateutil
+    pip install fastapi uvicorn[standard] python-multipart pydantic networkx python-dateutil numpy
 )
 
 REM Check backend packages
 venv\Scripts\python.exe -c "import fastapi" 2>nul
 if errorlevel 1 (
     echo [INSTALL] Installing backend packages...
-    pip install fastapi uvicorn[standard] python-multipart pydantic networkx python-dateutil
+    pip install fastapi uvicorn[standard] python-multipart pydantic networkx python-dateutil numpy
 ) else (
     echo [OK] Backend packages ready
 )
@@ -23,7 +23,7 @@ venv\Scripts\python.exe -c "import fastapi" >nul 2>&1
 if errorlevel 1 (
     echo   Installing backend packages...
     venv\Scripts\python.exe -m pip install --upgrade pip --quiet
-    venv\Scripts\python.exe -m pip install fastapi uvicorn[standard] python-multipart pydantic networkx python-dateutil --quiet
+    venv\Scripts\python.exe -m pip install fastapi uvicorn[standard] python-multipart pydantic networkx python-dateutil numpy --quiet
 )
 echo   [OK] Backend ready
 
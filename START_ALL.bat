@@ -19,7 +19,7 @@ REM Setup Backend
 echo [2/4] Setting up Backend...
 cd backend
 python -m pip install --upgrade pip --quiet
-python -m pip install fastapi uvicorn[standard] python-multipart pydantic networkx python-dateutil --quiet
+python -m pip install fastapi uvicorn[standard] python-multipart pydantic networkx python-dateutil numpy --quiet
 if errorlevel 1 (
     echo ERROR: Backend dependencies failed to install
     echo Trying with requirements.txt...
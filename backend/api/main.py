@@ -1,16 +1,66 @@
 """FastAPI main application."""
-from fastapi import FastAPI, UploadFile, File, HTTPException
+import asyncio
+import hmac
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, UploadFile, File, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import io
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from backend import config
+from backend.api import metrics
+from backend.models.frame import TransactionFrame
+from backend.models.job import JobInfo
+from backend.models.session import SessionInfo
+from backend.utils.csv_parser import parse_csv_file
+from backend.utils.transaction_file import is_transaction_file, load_transaction_file
+from backend.services.detection_engine import DETECTION_PARAMETERS
+from backend.services.detection_session import BatchTooLargeError, DetectionSession, SessionFullError
+from backend.services.job_manager import DetectionJob, JobManager
+from backend.services.json_formatter import decode_json, encode_json, iter_ndjson
+from backend.services.profiling import artifact_path
+from backend.services.result_cache import ResultCache, cache_key
+from backend.services.result_pages import paginate_output
+
+# Detections run in worker processes so the event loop keeps serving
+job_manager = JobManager(
+    max_workers=config.DETECTION_WORKERS,
+    history_limit=config.JOB_HISTORY_LIMIT
+)
+
+# Serialized results of earlier uploads, keyed by upload bytes + parameters
+result_cache = ResultCache(
+    max_memory_bytes=config.RESULT_CACHE_MEMORY_MB << 20,
+    disk_dir=config.RESULT_CACHE_DIR,
+    max_disk_bytes=config.RESULT_CACHE_DISK_MB << 20
+)
+
+# Response header reporting whether the result came from result_cache
+CACHE_HEADER = "X-Detection-Cache"
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Incremental detection sessions; they hold state, so they live in this process
+sessions: dict[str, DetectionSession] = {}
+sessions_lock = threading.Lock()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    job_manager.shutdown()
 
-from backend.utils.csv_parser import parse_csv
-from backend.services.detection_engine import run_detection
 
 app = FastAPI(
     title="Money Muling Detection Engine",
     description="Graph-based financial crime detection system",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware for frontend access
@@ -29,11 +79,163 @@ async def root():
     return {"status": "ok", "message": "Money Muling Detection Engine API"}
 
 
+async def parse_upload(file: UploadFile, stats: Optional[dict] = None) -> TransactionFrame:
+    """
+    Parse an uploaded CSV, or load an uploaded binary transaction file
+    (see backend.utils.transaction_file), off the event loop, mapping
+    errors to HTTP 400.
+    
+    If stats is given, the parse time and row count are stored in it as a
+    'parse' diagnostics stage.
+    """
+    await file.seek(0)
+    start = time.perf_counter()
+    if is_transaction_file(file.file):
+        # Map the spooled upload instead of parsing it
+        try:
+            transactions = await run_in_threadpool(load_transaction_file, file.file)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Transaction file error: {str(e)}")
+    else:
+        # Parse CSV incrementally from the spooled upload
+        try:
+            transactions = await run_in_threadpool(parse_csv_file, file.file)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"CSV parsing error: {str(e)}")
+    
+    if not len(transactions):
+        raise HTTPException(status_code=400, detail="No transactions found in CSV")
+    
+    if stats is not None:
+        stats['parse'] = {
+            'seconds': time.perf_counter() - start,
+            'counters': {'transactions': len(transactions)}
+        }
+    return transactions
+
+
+async def upload_cache_key(file: UploadFile) -> str:
+    """Hash the spooled upload (off the event loop) into a result cache key."""
+    await file.seek(0)
+    return await run_in_threadpool(cache_key, file.file, DETECTION_PARAMETERS)
+
+
+def detection_output(result: dict) -> dict:
+    """A job result without its 'diagnostics' and 'profile' blocks (not part of the result schema)."""
+    return {key: value for key, value in result.items() if key not in ('diagnostics', 'profile')}
+
+
+def require_admin(token: Optional[str]) -> None:
+    """Reject the request unless token matches ADMIN_TOKEN (HTTP 403)."""
+    if config.ADMIN_TOKEN is None:
+        raise HTTPException(status_code=403, detail="Admin features are disabled (ADMIN_TOKEN is not set)")
+    if token is None or not hmac.compare_digest(token.encode(), config.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Admin-Token")
+
+
+def with_parse_stage(diagnostics: dict, parse: dict) -> dict:
+    """Diagnostics of a job with the API's parse stage put first."""
+    return {
+        **diagnostics,
+        'stages': {'parse': parse, **diagnostics['stages']},
+        'total_seconds': diagnostics['total_seconds'] + parse['seconds'],
+    }
+
+
+def cache_result(key: str, result: dict) -> bytes:
+    """Serialize result (see encode_json) and store it under key."""
+    payload = encode_json(detection_output(result))
+    result_cache.put(key, payload)
+    return payload
+
+
+async def encoded_response(content: dict, status_code: int = 200, headers: Optional[dict] = None) -> Response:
+    """JSON response encoded off the event loop (results can be large)."""
+    payload = await run_in_threadpool(encode_json, content)
+    return Response(content=payload, status_code=status_code, media_type="application/json", headers=headers)
+
+
+async def result_response(
+    content: dict,
+    response_format: str,
+    limit: Optional[int],
+    job_id: Optional[str],
+    headers: dict
+) -> Response:
+    """
+    Detection result as JSON or streamed NDJSON; with limit, only the first
+    page of each ranked list (the "page" block tells how to continue with
+    GET /api/jobs/{job_id}).
+    """
+    if limit is not None:
+        content = paginate_output(content, limit, {})
+        content['page']['job_id'] = job_id
+    if response_format == 'ndjson':
+        return StreamingResponse(iter_ndjson(content), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+    return await encoded_response(content, headers=headers)
+
+
+def submit_detection(transactions: TransactionFrame, parse: dict, profile: bool = False) -> DetectionJob:
+    """
+    Queue a detection; its stage diagnostics go to /api/metrics when it
+    finishes, unless it is profiled (the profiler distorts the timings).
+    """
+    job = job_manager.submit(transactions, profile=profile)
+    if profile:
+        return job
+    
+    def record(future):
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            metrics.detections.inc(outcome='failed')
+        elif future.result() is not None:
+            metrics.record_diagnostics(future.result()['diagnostics'], parse['seconds'])
+    
+    job.future.add_done_callback(record)
+    return job
+
+
 @app.post("/api/detect")
-async def detect_money_muling(file: UploadFile = File(...)):
+async def detect_money_muling(
+    file: UploadFile = File(...),
+    diagnostics: bool = False,
+    profile: bool = False,
+    response_format: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
+    limit: Optional[int] = Query(None, ge=1),
+    x_admin_token: Optional[str] = Header(None)
+):
     """
     Accept CSV upload and run detection algorithms.
     
+    Detection runs as a job in the worker pool (see /api/jobs); this
+    endpoint waits for it and returns the result directly. A byte-identical
+    re-upload is answered from the result cache; the X-Detection-Cache
+    header says "hit" or "miss". A hit returns the stored body unchanged,
+    so its summary.processing_time_seconds is that of the run that
+    produced it, not the time taken to answer.
+    
+    With ?diagnostics=true the detection always runs (the cache is not
+    consulted) and the response gets a "diagnostics" block: wall time and
+    work counters (nodes, edges, DFS expansions, ...) per stage.
+    
+    ?profile=true (admins only: X-Admin-Token header) runs the detection
+    under cProfile and tracemalloc and adds a "profile" block with the top
+    functions by cumulative time, the top allocation sites and the URL of
+    the saved profile (GET /api/profiles/{profile_id}). The cache is not
+    consulted either.
+    
+    ?format=ndjson streams the result as newline-delimited JSON, one object
+    per line with a "type": the summary, then every suspicious account and
+    fraud ring in rank order, then any extra block (diagnostics, ...).
+    
+    ?limit=N returns only the top N suspicious accounts and fraud rings and
+    a "page" block with the job id and next cursors; fetch further pages
+    with GET /api/jobs/{job_id}?limit=N&accounts_cursor=...&rings_cursor=...
+    
+    If the job is cancelled (DELETE /api/jobs/{job_id}) before it finishes,
+    the request fails with 409.
+    
     Expected CSV format:
     - transaction_id (String)
     - sender_id (String)
@@ -41,31 +243,56 @@ async def detect_money_muling(file: UploadFile = File(...)):
     - amount (Float)
     - timestamp (YYYY-MM-DD HH:MM:SS)
     """
+    if profile:
+        require_admin(x_admin_token)
+    
     try:
-        # Read file content
-        contents = await file.read()
-        file_content = contents.decode('utf-8')
+        key = await upload_cache_key(file)
+        if not (diagnostics or profile):
+            cached = await run_in_threadpool(result_cache.get, key)
+            metrics.cache_lookups.inc(result="miss" if cached is None else "hit")
+            if cached is not None:
+                if response_format == 'json' and limit is None:
+                    return Response(content=cached, media_type="application/json", headers={CACHE_HEADER: "hit"})
+                result = await run_in_threadpool(decode_json, cached)
+                # Further pages are served from a job holding the result
+                job_id = job_manager.add_completed(result).job_id if limit is not None else None
+                return await result_response(result, response_format, limit, job_id, {CACHE_HEADER: "hit"})
         
-        # Parse CSV
-        try:
-            transactions = parse_csv(file_content)
-        except ValueError as e:
-            raise HTTPException(status_code=400, detail=f"CSV parsing error: {str(e)}")
+        stats: dict = {}
+        transactions = await parse_upload(file, stats)
         
-        if not transactions:
-            raise HTTPException(status_code=400, detail="No transactions found in CSV")
-        
-        # Run detection
+        # Run detection in a worker process
+        job = submit_detection(transactions, stats['parse'], profile=profile)
         try:
-            result = run_detection(transactions)
+            result = await asyncio.wrap_future(job.future)
+        except asyncio.CancelledError:
+            if not job.future.cancelled():
+                raise  # the request itself was cancelled
+            result = None
         except Exception as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"Detection error: {str(e)}"
             )
+        if result is None:
+            # Cancelled through DELETE /api/jobs/{job_id}: a queued job never
+            # ran, a running one had its result discarded
+            raise HTTPException(status_code=409, detail=f"Detection job {job.job_id} was cancelled")
+        
+        payload = await run_in_threadpool(cache_result, key, result)
+        if not (diagnostics or profile) and response_format == 'json' and limit is None:
+            return Response(content=payload, media_type="application/json", headers={CACHE_HEADER: "miss"})
         
-        # Return JSON response (Pydantic model automatically serializes)
-        return JSONResponse(content=result.model_dump())
+        content = detection_output(result)
+        if diagnostics:
+            content['diagnostics'] = with_parse_stage(result['diagnostics'], stats['parse'])
+        if profile:
+            content['profile'] = {
+                **result['profile'],
+                'download': f"/api/profiles/{result['profile']['profile_id']}"
+            }
+        return await result_response(content, response_format, limit, job.job_id, {CACHE_HEADER: "miss"})
         
     except HTTPException:
         raise
@@ -73,6 +300,233 @@ async def detect_money_muling(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
 
+@app.post("/api/jobs", status_code=202)
+async def submit_job(file: UploadFile = File(...)):
+    """
+    Accept CSV upload and queue detection; returns the job id at once.
+    
+    Poll GET /api/jobs/{job_id} for status and, once completed, the result
+    (same schema as /api/detect). On a result cache hit the job is created
+    already completed, with the cached result (and its original
+    processing_time_seconds); the X-Detection-Cache header says "hit" or "miss".
+    """
+    key = await upload_cache_key(file)
+    cached = await run_in_threadpool(result_cache.get, key)
+    metrics.cache_lookups.inc(result="miss" if cached is None else "hit")
+    if cached is not None:
+        job = job_manager.add_completed(await run_in_threadpool(decode_json, cached))
+        return await encoded_response(job_content(job), status_code=202, headers={CACHE_HEADER: "hit"})
+    
+    stats: dict = {}
+    transactions = await parse_upload(file, stats)
+    job = submit_detection(transactions, stats['parse'])
+    
+    def store(future):
+        # Runs on the thread resolving the job (the job manager's); encoding
+        # and writing the result to the cache get a thread of their own
+        if not future.cancelled() and future.exception() is None and future.result() is not None:
+            threading.Thread(target=cache_result, args=(key, future.result()), daemon=True).start()
+    
+    job.future.add_done_callback(store)
+    return JSONResponse(status_code=202, content=job_content(job), headers={CACHE_HEADER: "miss"})
+
+
+def job_content(
+    job: DetectionJob,
+    diagnostics: bool = False,
+    limit: Optional[int] = None,
+    cursors: Optional[dict[str, Optional[str]]] = None
+) -> dict:
+    """
+    JobInfo as plain data, its result passed through as is (already plain)
+    rather than walked by pydantic. The result keeps its diagnostics block
+    only if asked for; with limit, it is cut to one page (see paginate_output).
+    """
+    info = job.info()
+    fields = info.model_dump(mode='json', exclude={'result'})
+    result = info.result
+    if result is not None:
+        if not diagnostics:
+            result = detection_output(result)
+        if limit is not None:
+            result = paginate_output(result, limit, cursors or {})
+    return {name: result if name == 'result' else fields[name] for name in JobInfo.model_fields}
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    diagnostics: bool = False,
+    limit: Optional[int] = Query(None, ge=1),
+    accounts_cursor: Optional[str] = None,
+    rings_cursor: Optional[str] = None
+):
+    """
+    Job status: queued, running, completed (with result), failed (with error) or cancelled.
+    
+    With ?diagnostics=true a completed result includes the detection's
+    stage diagnostics (not available for results served from the cache).
+    With ?limit=N the result holds one page of suspicious accounts and of
+    fraud rings, starting after accounts_cursor / rings_cursor (the
+    next_cursors of the previous page; omit them for the top N).
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    try:
+        cursors = {'suspicious_accounts': accounts_cursor, 'fraud_rings': rings_cursor}
+        content = job_content(job, diagnostics, limit, cursors)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await encoded_response(content)
+
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """
+    Cancel a job. A queued job never runs; a running one finishes in its
+    worker but its result is discarded. Finished jobs are left as they are.
+    """
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return await encoded_response(job_content(job))
+
+
+@app.get("/api/cache")
+async def cache_stats():
+    """Result cache entries, sizes, limits and hit/miss counters per tier."""
+    return await run_in_threadpool(result_cache.stats)
+
+
+@app.delete("/api/cache")
+async def clear_cache():
+    """Drop every cached result (memory and disk) and reset the counters."""
+    await run_in_threadpool(result_cache.clear)
+    return await run_in_threadpool(result_cache.stats)
+
+
+def session_info(session_id: str, session: DetectionSession) -> dict:
+    return SessionInfo(
+        session_id=session_id,
+        created_at=session.created_at,
+        transactions_analyzed=session.transaction_count,
+        accounts_analyzed=session.account_count
+    ).model_dump(mode='json')
+
+
+def get_session(session_id: str) -> DetectionSession:
+    with sessions_lock:
+        session = sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Session not found: {session_id}")
+    return session
+
+
+def check_session_limit() -> None:
+    """Raise 429 if SESSION_LIMIT sessions are open (sessions_lock held)."""
+    if len(sessions) >= config.SESSION_LIMIT:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Session limit reached ({config.SESSION_LIMIT}); delete a session first"
+        )
+
+
+@app.post("/api/sessions", status_code=201)
+async def create_session(file: Optional[UploadFile] = File(None)):
+    """
+    Start an incremental detection session, optionally with a first CSV.
+    
+    Append further transactions with POST /api/sessions/{session_id}/transactions;
+    only the accounts and time windows a batch touches are analysed again.
+    At most SESSION_LIMIT sessions are kept, each with at most
+    SESSION_MAX_TRANSACTIONS transactions, added at most
+    SESSION_MAX_BATCH_TRANSACTIONS per upload (413 beyond); delete finished
+    ones. The session is registered only once its first batch is appended, so a
+    failed upload leaves nothing behind.
+    """
+    with sessions_lock:
+        check_session_limit()
+    
+    session = DetectionSession(
+        max_transactions=config.SESSION_MAX_TRANSACTIONS,
+        max_batch_transactions=config.SESSION_MAX_BATCH_TRANSACTIONS
+    )
+    if file is not None:
+        transactions = await parse_upload(file)
+        try:
+            await run_in_threadpool(session.append, transactions)
+        except (BatchTooLargeError, SessionFullError) as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Detection error: {str(e)}")
+    
+    with sessions_lock:
+        check_session_limit()
+        session_id = uuid.uuid4().hex
+        sessions[session_id] = session
+    return JSONResponse(status_code=201, content=session_info(session_id, session))
+
+
+@app.post("/api/sessions/{session_id}/transactions")
+async def append_session_transactions(session_id: str, file: UploadFile = File(...)):
+    """
+    Append a CSV batch to a session and return the updated result
+    (same schema as /api/detect, over every transaction appended so far).
+    """
+    session = get_session(session_id)
+    transactions = await parse_upload(file)
+    try:
+        await run_in_threadpool(session.append, transactions)
+        result = await run_in_threadpool(session.result_output)
+    except (BatchTooLargeError, SessionFullError) as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Detection error: {str(e)}")
+    return await encoded_response(result)
+
+
+@app.get("/api/sessions/{session_id}")
+async def get_session_result(session_id: str):
+    """Current result of a session (same schema as /api/detect)."""
+    session = get_session(session_id)
+    result = await run_in_threadpool(session.result_output)
+    return await encoded_response(result)
+
+
+@app.delete("/api/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """Drop a session and its state."""
+    with sessions_lock:
+        session = sessions.pop(session_id, None)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Session not found: {session_id}")
+    return JSONResponse(content=session_info(session_id, session))
+
+
+@app.get("/api/profiles/{profile_id}")
+async def download_profile(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """
+    Download the cProfile statistics of a profiled detection (admins only),
+    for python -m pstats or snakeviz. The newest profiles are kept.
+    """
+    require_admin(x_admin_token)
+    path = artifact_path(profile_id, config.PROFILE_DIR)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Profile not found: {profile_id}")
+    return FileResponse(path, media_type="application/octet-stream", filename=path.name)
+
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """
+    Detection metrics in the Prometheus text format: histograms of stage
+    wall time and work counters, total detection time, finished detections
+    and result cache lookups. Counted per API process.
+    """
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint."""
@@ -0,0 +1,150 @@
+"""Prometheus metrics of the detection API, in the text exposition format."""
+import math
+import threading
+from bisect import bisect_left
+from typing import Iterable, Optional
+
+# Histogram bucket upper bounds
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+COUNT_BUCKETS = tuple(10 ** exponent for exponent in range(10))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    """Full-precision sample value (``:g`` would round to 6 significant digits)."""
+    if isinstance(value, int):
+        return str(value)
+    if math.isfinite(value) and value == int(value) and abs(value) < 2 ** 53:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...], le: Optional[str] = None) -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in labels]
+    if le is not None:
+        parts.append(f'le="{le}"')
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    __slots__ = ('name', 'help', '_values', '_lock')
+
+    def __init__(self, name: str, help: str, lock: threading.Lock) -> None:
+        self.name = name
+        self.help = help
+        self._values: dict[tuple[tuple[str, str], ...], float] = {}
+        self._lock = lock
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(labels)} {_format_value(value)}"
+
+
+class Histogram:
+    """Histogram with fixed buckets and optional labels (one series per label set)."""
+
+    __slots__ = ('name', 'help', 'buckets', '_series', '_lock')
+
+    def __init__(self, name: str, help: str, buckets: tuple[float, ...], lock: threading.Lock) -> None:
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        # labels -> [count per bucket (last is +Inf), sum]
+        self._series: dict[tuple[tuple[str, str], ...], list] = {}
+        self._lock = lock
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        bucket = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bucket] += 1
+            series[1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                yield f"{self.name}_bucket{_format_labels(labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(labels)} {cumulative}"
+
+
+class MetricsRegistry:
+    """Set of metrics rendered together; safe to update from several threads."""
+
+    def __init__(self) -> None:
+        self._metrics: list = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str) -> Counter:
+        metric = Counter(name, help, self._lock)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, buckets: tuple[float, ...]) -> Histogram:
+        metric = Histogram(name, help, buckets, self._lock)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [line for metric in self._metrics for line in metric.render()]
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+stage_seconds = registry.histogram(
+    'detection_stage_seconds', 'Wall time of each detection stage', SECONDS_BUCKETS
+)
+stage_work = registry.histogram(
+    'detection_stage_work', 'Work counters of each detection stage (nodes, edges, DFS expansions, ...)',
+    COUNT_BUCKETS
+)
+detection_seconds = registry.histogram(
+    'detection_seconds', 'Wall time of a whole detection, parsing included', SECONDS_BUCKETS
+)
+detections = registry.counter('detections_total', 'Detections finished, by outcome')
+cache_lookups = registry.counter('detection_cache_lookups_total', 'Result cache lookups, by result')
+
+
+def record_diagnostics(diagnostics: dict, parse_seconds: Optional[float] = None) -> None:
+    """
+    Add one detection's diagnostics (DetectionDiagnostics as a dict) to the
+    stage histograms.
+
+    Args:
+        diagnostics: {'stages': {stage: {'seconds', 'counters'}}, 'total_seconds'}
+        parse_seconds: Time spent parsing the upload, if it was parsed
+    """
+    total = diagnostics['total_seconds']
+    if parse_seconds is not None:
+        stage_seconds.observe(parse_seconds, stage='parse')
+        total += parse_seconds
+    for stage, info in diagnostics['stages'].items():
+        stage_seconds.observe(info['seconds'], stage=stage)
+        for counter, value in info['counters'].items():
+            stage_work.observe(value, stage=stage, counter=counter)
+    detection_seconds.observe(total)
+    detections.inc(outcome='completed')
@@ -0,0 +1,480 @@
+"""Headless batch detection: run the detection over many files, without the API.
+
+Every input (CSV or binary transaction file, see
+backend/utils/transaction_file.py) is detected in a worker process, which
+writes its result next to the others in the output directory, as JSON (the
+/api/detect body) or NDJSON (as ?format=ndjson). A combined summary of the
+batch, with each file's counts and stage times, is written last as
+batch_summary.json.
+
+Usage:
+    python -m backend.cli 'nightly/*.csv' archive/2024-06-01.mmtx --output results/
+    python -m backend.cli nightly/ --output results/ --format ndjson --workers 2 --timings
+    python -m backend.cli nightly/ --output results/ --max-memory-mb 4096
+    python -m backend.cli huge.mmtx --output results/ --sharded --max-memory-mb 4096
+
+Exit status: 0 if every file was detected, 1 if any failed, 2 on bad arguments.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Optional
+
+try:
+    import resource
+except ImportError:  # Unix only; peak RSS is not reported elsewhere
+    resource = None
+
+if TYPE_CHECKING:
+    from backend.models.transaction import DetectionDiagnostics
+
+from backend import config
+from backend.services.detection_engine import MEMORY_PER_ROW, WORKER_BASE_MEMORY_MB, run_detection_output
+from backend.services.json_formatter import encode_json, iter_ndjson
+from backend.services.sharding import run_sharded_detection_output
+from backend.utils.transaction_file import is_transaction_file, load_transactions, read_transaction_file_header
+
+# Files picked up from a directory given as an input
+INPUT_SUFFIXES = ('.csv', '.mmtx')
+
+SUMMARY_FILE = 'batch_summary.json'
+
+# Bytes per row assumed when estimating a CSV file's rows from its size
+CSV_BYTES_PER_ROW = 60
+
+
+def expand_inputs(patterns: list[str]) -> list[Path]:
+    """
+    Files named by patterns, in order and without duplicates.
+
+    A pattern is a file, a directory (its .csv and .mmtx files) or a glob
+    ('**' matches subdirectories).
+
+    Raises:
+        ValueError: If a pattern names no file
+    """
+    files: dict[Path, None] = {}
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(
+                entry for entry in Path(pattern).iterdir()
+                if entry.is_file() and entry.suffix.lower() in INPUT_SUFFIXES
+            )
+        elif glob.has_magic(pattern):
+            matches = sorted(Path(match) for match in glob.glob(pattern, recursive=True) if os.path.isfile(match))
+        elif os.path.isfile(pattern):
+            matches = [Path(pattern)]
+        else:
+            raise ValueError(f"No such file or directory: {pattern}")
+        if not matches:
+            raise ValueError(f"No input files match {pattern}")
+        for match in matches:
+            files.setdefault(match.resolve(), None)
+    return list(files)
+
+
+def output_paths(inputs: list[Path], output_dir: Path, output_format: str) -> list[Path]:
+    """
+    Result file of each input: its path below the inputs' common directory,
+    under output_dir, with the format's suffix.
+
+    Raises:
+        ValueError: If two inputs would write the same result file
+    """
+    common = Path(os.path.commonpath([path.parent for path in inputs]))
+    outputs = [output_dir / path.relative_to(common).with_suffix(f'.{output_format}') for path in inputs]
+    seen: dict[Path, Path] = {}
+    for path, output in zip(inputs, outputs):
+        if output in seen:
+            raise ValueError(f"{seen[output]} and {path} would both write {output}")
+        if output == output_dir / SUMMARY_FILE:
+            raise ValueError(f"{path} would overwrite the batch summary {output}")
+        seen[output] = path
+    return outputs
+
+
+def estimate_memory_mb(path: Path) -> float:
+    """Rough peak memory (MB) of a worker detecting the file (see MEMORY_PER_ROW)."""
+    size = path.stat().st_size
+    with open(path, 'rb') as file:
+        binary = is_transaction_file(file)
+    if binary:
+        rows = read_transaction_file_header(path).row_count
+        return WORKER_BASE_MEMORY_MB + (rows * MEMORY_PER_ROW + size) / 1e6
+    return WORKER_BASE_MEMORY_MB + size / CSV_BYTES_PER_ROW * MEMORY_PER_ROW / 1e6
+
+
+def detect_file(
+    path: Path,
+    output: Path,
+    output_format: str = 'json',
+    diagnostics: bool = False,
+    cycle_workers: Optional[int] = None,
+    parallel_detectors: Optional[bool] = None,
+    fresh_process: bool = False
+) -> dict:
+    """
+    Detect one file and write its result (runs in a worker process).
+
+    The result is written to a .partial file first and renamed into place,
+    so an existing result is replaced only by a complete one.
+
+    Args:
+        path: CSV or binary transaction file
+        output: Result file to write
+        output_format: 'json' or 'ndjson'
+        diagnostics: Add the stage diagnostics to the result
+        cycle_workers: Worker processes for the cycle search (see run_detection_output)
+        parallel_detectors: See run_detection_output
+        fresh_process: The process detects no other file, so its peak
+            memory is this file's and goes in the record as peak_rss_mb
+
+    Returns:
+        The file's record for the batch summary
+
+    Raises:
+        ValueError: If the file is not valid input
+    """
+    start = time.perf_counter()
+    transactions = load_transactions(path)
+    load_seconds = time.perf_counter() - start
+    result, stage_diagnostics = run_detection_output(
+        transactions, cycle_workers=cycle_workers, parallel_detectors=parallel_detectors
+    )
+    _write_result(result, stage_diagnostics if diagnostics else None, output, output_format)
+    return _file_record(
+        result, stage_diagnostics, len(transactions), start, load_seconds,
+        _peak_rss_mb() if fresh_process else None
+    )
+
+
+def detect_file_sharded(
+    path: Path,
+    output: Path,
+    output_format: str = 'json',
+    diagnostics: bool = False,
+    workers: int = 1,
+    max_memory_mb: Optional[int] = None
+) -> dict:
+    """
+    detect_file for inputs too large for memory: the file is detected in
+    shards of connected components (see run_sharded_detection_output),
+    workers shards at a time within max_memory_mb.
+    """
+    start = time.perf_counter()
+    result, stage_diagnostics = run_sharded_detection_output(path, workers=workers, max_memory_mb=max_memory_mb)
+    _write_result(result, stage_diagnostics if diagnostics else None, output, output_format)
+    transactions = stage_diagnostics.stages['partition'].counters['transactions']
+    return _file_record(result, stage_diagnostics, transactions, start)
+
+
+def _write_result(
+    result: dict,
+    diagnostics: Optional['DetectionDiagnostics'],
+    output: Path,
+    output_format: str
+) -> None:
+    """Write result (with diagnostics, if given) through a .partial file."""
+    if diagnostics is not None:
+        result['diagnostics'] = diagnostics.model_dump()
+    output.parent.mkdir(parents=True, exist_ok=True)
+    partial = output.with_name(output.name + '.partial')
+    try:
+        with open(partial, 'wb') as file:
+            if output_format == 'ndjson':
+                for chunk in iter_ndjson(result):
+                    file.write(chunk)
+            else:
+                file.write(encode_json(result))
+        os.replace(partial, output)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+
+
+def _file_record(
+    result: dict,
+    diagnostics: 'DetectionDiagnostics',
+    transactions: int,
+    start: float,
+    load_seconds: Optional[float] = None,
+    peak_rss_mb: Optional[float] = None
+) -> dict:
+    """
+    A completed file's record for the batch summary.
+
+    peak_rss_mb is only known when the file had a process of its own (a
+    reused process reports the peak of every file before it), else None.
+    """
+    summary = result['summary']
+    stages = {stage: round(timing.seconds, 3) for stage, timing in diagnostics.stages.items()}
+    if load_seconds is not None:
+        stages = {'load': round(load_seconds, 3), **stages}
+    return {
+        'transactions': transactions,
+        'accounts': summary['total_accounts_analyzed'],
+        'suspicious_accounts': summary['suspicious_accounts_flagged'],
+        'fraud_rings': summary['fraud_rings_detected'],
+        'seconds': round(time.perf_counter() - start, 3),
+        'stages': stages,
+        'peak_rss_mb': peak_rss_mb,
+    }
+
+
+def run_batch(
+    inputs: list[Path],
+    output_dir: Path,
+    output_format: str = 'json',
+    workers: int = 1,
+    diagnostics: bool = False,
+    max_memory_mb: Optional[int] = None,
+    on_done: Optional[Callable[[dict], None]] = None,
+    sharded: bool = False
+) -> dict:
+    """
+    Detect every input in a pool of worker processes.
+
+    Files are started in input order while fewer than workers are running.
+    With max_memory_mb, a file is also held back until its estimated memory
+    (estimate_memory_mb) fits the budget beside the files running; a file
+    over the budget on its own runs alone. In that mode each worker detects
+    serially (one process per file) and, on Python 3.11 and later, is
+    replaced after every file, so its memory goes back to the system and
+    the file's peak memory is reported.
+
+    Sharded, the files are detected one at a time instead, each split into
+    shards of connected components (detect_file_sharded) that are spread
+    over the workers within max_memory_mb.
+
+    A file that fails (invalid input, or its worker died) is recorded with
+    its error and the batch goes on. A dying worker breaks the whole pool,
+    so the files that were running in it are retried, each on its own; only
+    a file whose worker dies while it runs alone is recorded as failed.
+
+    Args:
+        inputs: Files to detect (see expand_inputs)
+        output_dir: Where the result files and the batch summary go
+        output_format: 'json' or 'ndjson'
+        workers: Files (sharded: shards) detected at once
+        diagnostics: Add the stage diagnostics to each result
+        max_memory_mb: Memory budget for the running files or shards (None: unbounded)
+        on_done: Called with each file's record when it finishes
+        sharded: Detect each file in shards, for files too large for memory
+
+    Returns:
+        The batch summary, also written to output_dir/batch_summary.json
+
+    Raises:
+        ValueError: If two inputs would write the same result file
+    """
+    started_at = datetime.now()
+    start = time.perf_counter()
+    outputs = output_paths(inputs, output_dir, output_format)
+    records: list[Optional[dict]] = [None] * len(inputs)
+
+    def record_outcome(index: int, result: Optional[dict], exception: Optional[BaseException]) -> None:
+        record = {'input': str(inputs[index]), 'output': str(outputs[index])}
+        if exception is None:
+            record.update(status='completed', **result)
+        else:
+            record.update(status='failed', error=str(exception) or type(exception).__name__)
+        records[index] = record
+        if on_done is not None:
+            on_done(record)
+
+    if sharded:
+        for index in range(len(inputs)):
+            try:
+                result = detect_file_sharded(
+                    inputs[index], outputs[index], output_format, diagnostics, workers, max_memory_mb
+                )
+            except Exception as e:
+                record_outcome(index, None, e)
+            else:
+                record_outcome(index, result, None)
+    else:
+        _run_pool(inputs, outputs, output_format, workers, diagnostics, max_memory_mb, record_outcome)
+
+    completed = [record for record in records if record['status'] == 'completed']
+    summary = {
+        'started_at': started_at.isoformat(timespec='seconds'),
+        'finished_at': datetime.now().isoformat(timespec='seconds'),
+        'wall_seconds': round(time.perf_counter() - start, 3),
+        'settings': {
+            'format': output_format,
+            'workers': workers,
+            'max_memory_mb': max_memory_mb,
+            'sharded': sharded,
+        },
+        'totals': {
+            'files': len(records),
+            'completed': len(completed),
+            'failed': len(records) - len(completed),
+            **{
+                key: sum(record[key] for record in completed)
+                for key in ('transactions', 'suspicious_accounts', 'fraud_rings')
+            },
+        },
+        'files': records,
+    }
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (output_dir / SUMMARY_FILE).write_bytes(encode_json(summary))
+    return summary
+
+
+def _run_pool(
+    inputs: list[Path],
+    outputs: list[Path],
+    output_format: str,
+    workers: int,
+    diagnostics: bool,
+    max_memory_mb: Optional[int],
+    record_outcome: Callable[[int, Optional[dict], Optional[BaseException]], None]
+) -> None:
+    """detect_file over the inputs in a process pool (see run_batch)."""
+    bounded = max_memory_mb is not None
+    estimates = [estimate_memory_mb(path) if bounded else 0.0 for path in inputs]
+    if bounded:
+        # Serial detectors keep each file's memory in its own worker process
+        task_options = {'cycle_workers': 1, 'parallel_detectors': False}
+    else:
+        task_options = {'cycle_workers': max(1, (os.cpu_count() or 1) // workers)}
+    pool_options = {'max_workers': workers}
+    if bounded and sys.version_info >= (3, 11):
+        pool_options['max_tasks_per_child'] = 1
+        task_options['fresh_process'] = True
+
+    pending = list(range(len(inputs)))
+    # Files that were running in a pool that broke; each is retried alone
+    isolated: set[int] = set()
+    # task -> (input index, the pool running it)
+    running: dict[Future, tuple[int, ProcessPoolExecutor]] = {}
+    executor: Optional[ProcessPoolExecutor] = None
+    try:
+        while pending or running:
+            # Start files in order while a worker is free and the budget
+            # allows; an isolated file waits for the others and runs alone
+            used = sum(estimates[index] for index, _ in running.values())
+            while pending and len(running) < workers and (
+                not running or (
+                    pending[0] not in isolated
+                    and not any(index in isolated for index, _ in running.values())
+                    and (not bounded or used + estimates[pending[0]] <= max_memory_mb)
+                )
+            ):
+                index = pending.pop(0)
+                if executor is None:
+                    executor = ProcessPoolExecutor(**pool_options)
+                running[executor.submit(
+                    detect_file, inputs[index], outputs[index], output_format, diagnostics, **task_options
+                )] = (index, executor)
+                used += estimates[index]
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            retry = []
+            for task in sorted(done, key=lambda task: running[task][0]):
+                index, pool = running.pop(task)
+                exception = task.exception()
+                if isinstance(exception, BrokenProcessPool):
+                    if pool is executor:
+                        # A worker died (e.g. killed for memory); the next files get a fresh pool
+                        executor.shutdown(wait=False)
+                        executor = None
+                    if index not in isolated:
+                        # Any file running in the pool may have killed it; retry it alone
+                        isolated.add(index)
+                        retry.append(index)
+                        continue
+                record_outcome(index, task.result() if exception is None else None, exception)
+            pending[:0] = retry
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Peak resident memory of this process so far (MB), where the platform reports it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1e6 if sys.platform == 'darwin' else 1e3), 1)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m backend.cli',
+        description="Run money muling detection over many files, without the API."
+    )
+    parser.add_argument(
+        "inputs", nargs="+",
+        help="CSV or binary transaction files, directories or globs (quote them; '**' recurses)"
+    )
+    parser.add_argument("-o", "--output", type=Path, required=True, help="directory for the results")
+    parser.add_argument("--format", choices=('json', 'ndjson'), default='json', help="result format (default: json)")
+    parser.add_argument(
+        "--workers", type=int, default=config.DETECTION_WORKERS,
+        help="files (--sharded: shards) detected at once (default: DETECTION_WORKERS)"
+    )
+    parser.add_argument(
+        "--timings", action="store_true",
+        help="print each file's stage times and add them to its result as 'diagnostics'"
+    )
+    parser.add_argument(
+        "--max-memory-mb", type=int,
+        help="bounded memory mode: start files only while their estimated memory fits this budget"
+    )
+    parser.add_argument(
+        "--sharded", action="store_true",
+        help="for files too large for memory: detect one file at a time, in shards of connected components"
+    )
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.max_memory_mb is not None and args.max_memory_mb < 1:
+        parser.error("--max-memory-mb must be at least 1")
+    try:
+        inputs = expand_inputs(args.inputs)
+        output_paths(inputs, args.output, args.format)
+    except ValueError as e:
+        parser.error(str(e))
+
+    finished = 0
+
+    def report(record: dict) -> None:
+        nonlocal finished
+        finished += 1
+        prefix = f"[{finished}/{len(inputs)}] {record['input']}"
+        if record['status'] != 'completed':
+            print(f"{prefix}: failed: {record['error']}", file=sys.stderr)
+            return
+        print(
+            f"{prefix}: {record['transactions']:,} transactions, {record['suspicious_accounts']:,} "
+            f"suspicious accounts, {record['fraud_rings']:,} rings in {record['seconds']:.2f}s",
+            file=sys.stderr
+        )
+        if args.timings:
+            for stage, seconds in record['stages'].items():
+                print(f"    {stage:<16} {seconds:>9.3f}s", file=sys.stderr)
+
+    summary = run_batch(
+        inputs, args.output, args.format, args.workers,
+        diagnostics=args.timings, max_memory_mb=args.max_memory_mb, on_done=report, sharded=args.sharded
+    )
+    totals = summary['totals']
+    print(
+        f"{totals['completed']} of {totals['files']} files detected in {summary['wall_seconds']:.1f}s; "
+        f"summary: {args.output / SUMMARY_FILE}",
+        file=sys.stderr
+    )
+    return 1 if totals['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Runtime settings, read once from environment variables."""
+import os
+import tempfile
+from pathlib import Path
+
+
+def _env_int(name: str, default: int, minimum: int = 1) -> int:
+    """Integer of at least minimum from the environment, or default when unset."""
+    value = os.environ.get(name, '').strip()
+    if not value:
+        return default
+    try:
+        parsed = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+    if parsed < minimum:
+        raise ValueError(f"{name} must be at least {minimum}, got {parsed}")
+    return parsed
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    """Boolean (1/true/yes/on or 0/false/no/off) from the environment, or default when unset."""
+    value = os.environ.get(name, '').strip().lower()
+    if not value:
+        return default
+    if value in ('1', 'true', 'yes', 'on'):
+        return True
+    if value in ('0', 'false', 'no', 'off'):
+        return False
+    raise ValueError(f"{name} must be a boolean (1/0, true/false, yes/no, on/off), got {value!r}")
+
+
+# Detections run at the same time, one worker process each. The cores are
+# shared among the detections actually running, so more workers serve more
+# concurrent uploads but give each a smaller share for its cycle search
+# pool and parallel detectors (which need PARALLEL_MIN_CORES); half the
+# cores keeps at least two cores per detection under full load
+DETECTION_WORKERS = _env_int('DETECTION_WORKERS', max(1, (os.cpu_count() or 1) // 2))
+
+# Run the smurfing and shell detectors in worker processes during the cycle
+# search. Only inputs of at least PARALLEL_MIN_TRANSACTIONS, with at least
+# PARALLEL_MIN_CORES cores in the detection's share, run in parallel (see
+# run_detection_output); everything else stays serial. 0 forces serial runs
+PARALLEL_DETECTORS = _env_flag('PARALLEL_DETECTORS', True)
+
+# Finished jobs kept for GET /api/jobs/{id}; the oldest are dropped first
+JOB_HISTORY_LIMIT = _env_int('JOB_HISTORY_LIMIT', 100)
+
+# Result cache: in-memory LRU tier (0 disables it) and optional on-disk tier
+RESULT_CACHE_MEMORY_MB = _env_int('RESULT_CACHE_MEMORY_MB', 256, minimum=0)
+RESULT_CACHE_DIR = os.environ.get('RESULT_CACHE_DIR', '').strip() or None
+RESULT_CACHE_DISK_MB = _env_int('RESULT_CACHE_DISK_MB', 2048, minimum=0)
+
+# Incremental detection sessions kept in memory at once. Sessions live in
+# the API process, so their combined memory (SESSION_LIMIT times
+# SESSION_MAX_TRANSACTIONS rows, below) is the API's own
+SESSION_LIMIT = _env_int('SESSION_LIMIT', 4)
+
+# Transactions one session may hold; its histories keep every row (roughly
+# 400 bytes each), so this bounds a session's memory (about 100 MB)
+SESSION_MAX_TRANSACTIONS = _env_int('SESSION_MAX_TRANSACTIONS', 250_000)
+
+# Transactions one append may add. Appends run on the API's threads, and
+# the first is searched in full (about 2s for 50,000 rows), so this bounds
+# the work a single request does outside the worker pool
+SESSION_MAX_BATCH_TRANSACTIONS = _env_int('SESSION_MAX_BATCH_TRANSACTIONS', 50_000)
+
+# Admin-only features (profiled detections) require this token in the
+# X-Admin-Token header; unset disables them
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '').strip() or None
+
+# Where profiled detections save their cProfile artifacts
+PROFILE_DIR = Path(
+    os.environ.get('PROFILE_DIR', '').strip() or os.path.join(tempfile.gettempdir(), 'money-muling-profiles')
+)
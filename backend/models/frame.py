@@ -0,0 +1,298 @@
+"""Columnar transaction store used internally by the detection pipeline."""
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Iterable, Iterator, Union
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from backend.models.transaction import Transaction
+
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_epoch_seconds(timestamp: datetime) -> int:
+    """Convert a datetime to whole epoch seconds (naive datetimes are taken as UTC)."""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return (timestamp - EPOCH) // timedelta(seconds=1)
+
+
+def from_epoch_seconds(seconds: int) -> datetime:
+    """Convert epoch seconds back to a naive datetime."""
+    return EPOCH + timedelta(seconds=int(seconds))
+
+
+class StringColumn:
+    """
+    Immutable column of strings packed into one UTF-8 buffer.
+
+    Row i is data[offsets[i]:offsets[i + 1]]. Costs one byte per character
+    plus 8 bytes per row, instead of a Python str object per row.
+    """
+
+    __slots__ = ('data', 'offsets')
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray) -> None:
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, values: Iterable[str]) -> 'StringColumn':
+        data = bytearray()
+        offsets = array('q', [0])
+        for value in values:
+            data += value.encode('utf-8')
+            offsets.append(len(data))
+        return cls(np.frombuffer(bytes(data), dtype=np.uint8), np.frombuffer(offsets, dtype=np.int64))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self)
+        start, end = int(self.offsets[index]), int(self.offsets[index + 1])
+        return self.data[start:end].tobytes().decode('utf-8')
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def take(self, rows: np.ndarray) -> 'StringColumn':
+        """New column of the strings at rows, in that order."""
+        starts = self.offsets[rows]
+        lengths = self.offsets[rows + 1] - starts
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        # Byte i of the result comes from data[starts[row] + i - offsets[row]]
+        positions = np.arange(offsets[-1], dtype=np.int64) + np.repeat(starts - offsets[:-1], lengths)
+        return StringColumn(self.data[positions], offsets)
+
+
+class TransactionFrame:
+    """
+    Column-oriented, read-only set of transactions.
+
+    Account IDs are interned to int32 codes; account_ids maps a code back to
+    its string. Timestamps are int64 epoch seconds and amounts float64, each
+    held in one NumPy array, so a transaction costs a few dozen bytes instead
+    of a pydantic object with four Python strings and a datetime.
+
+    Build one with TransactionFrameBuilder (row by row) or
+    TransactionFrame.from_transactions (from pydantic models at the API
+    boundary).
+    """
+
+    __slots__ = ('account_ids', 'sender', 'receiver', 'timestamp', 'amount', 'transaction_ids')
+
+    def __init__(
+        self,
+        account_ids: list[str],
+        sender: np.ndarray,
+        receiver: np.ndarray,
+        timestamp: np.ndarray,
+        amount: np.ndarray,
+        transaction_ids: StringColumn
+    ) -> None:
+        self.account_ids = account_ids
+        self.sender = sender
+        self.receiver = receiver
+        self.timestamp = timestamp
+        self.amount = amount
+        self.transaction_ids = transaction_ids
+        for column in (sender, receiver, timestamp, amount):
+            column.setflags(write=False)
+
+    def __len__(self) -> int:
+        return len(self.sender)
+
+    @property
+    def account_count(self) -> int:
+        return len(self.account_ids)
+
+    def take(self, rows: np.ndarray) -> 'TransactionFrame':
+        """
+        New frame of the given rows, in that order.
+
+        Only the accounts those rows touch are kept, renumbered in their
+        current code order.
+
+        Complexity: O(k + a) for k rows and a accounts in this frame
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        sender, receiver = self.sender[rows], self.receiver[rows]
+        used = np.zeros(self.account_count, dtype=bool)
+        used[sender] = True
+        used[receiver] = True
+        code = np.cumsum(used, dtype=np.int32) - 1
+        account_ids = self.account_ids
+        return TransactionFrame(
+            [account_ids[account] for account in np.flatnonzero(used).tolist()],
+            code[sender],
+            code[receiver],
+            self.timestamp[rows],
+            self.amount[rows],
+            self.transaction_ids.take(rows)
+        )
+
+    @classmethod
+    def from_transactions(cls, transactions: list['Transaction']) -> 'TransactionFrame':
+        """Convert pydantic Transaction objects into a frame."""
+        builder = TransactionFrameBuilder()
+        for tx in transactions:
+            builder.append(
+                tx.transaction_id, tx.sender_id, tx.receiver_id,
+                tx.amount, to_epoch_seconds(tx.timestamp)
+            )
+        return builder.build()
+
+    def to_transactions(self) -> list['Transaction']:
+        """Convert back to pydantic Transaction objects (API boundary only)."""
+        from backend.models.transaction import Transaction
+
+        account_ids = self.account_ids
+        return [
+            Transaction(
+                transaction_id=transaction_id,
+                sender_id=account_ids[sender],
+                receiver_id=account_ids[receiver],
+                amount=amount,
+                timestamp=from_epoch_seconds(timestamp)
+            )
+            for transaction_id, sender, receiver, timestamp, amount in zip(
+                self.transaction_ids, self.sender.tolist(), self.receiver.tolist(),
+                self.timestamp.tolist(), self.amount.tolist()
+            )
+        ]
+
+
+class TransactionFrameBuilder:
+    """
+    Accumulates transactions (row by row or in column batches) and interns
+    account IDs.
+
+    Columns grow in compact array.array buffers; build() hands them to
+    NumPy without copying, after which the builder must not be reused.
+    """
+
+    def __init__(self) -> None:
+        self._codes: dict[str, int] = {}
+        self._sender = array('i')
+        self._receiver = array('i')
+        self._timestamp = array('q')
+        self._amount = array('d')
+        self._tx_id_data = bytearray()
+        self._tx_id_offsets = array('q', [0])
+
+    def __len__(self) -> int:
+        return len(self._sender)
+
+    def intern(self, account_id: str) -> int:
+        """Return the int code for account_id, assigning the next one if new."""
+        codes = self._codes
+        return codes.setdefault(account_id, len(codes))
+
+    def append(
+        self,
+        transaction_id: str,
+        sender_id: str,
+        receiver_id: str,
+        amount: float,
+        timestamp: int
+    ) -> None:
+        """Add one transaction; timestamp is in epoch seconds."""
+        self._sender.append(self.intern(sender_id))
+        self._receiver.append(self.intern(receiver_id))
+        self._timestamp.append(timestamp)
+        self._amount.append(amount)
+        self._tx_id_data += transaction_id.encode('utf-8')
+        self._tx_id_offsets.append(len(self._tx_id_data))
+
+    def extend(
+        self,
+        transaction_ids: list[str],
+        sender_ids: list[str],
+        receiver_ids: list[str],
+        amounts: np.ndarray,
+        timestamps: np.ndarray
+    ) -> None:
+        """Add a batch of transactions given as columns; same result as appending row by row."""
+        codes = self._codes
+        # Intern sender and receiver alternately, in the order append() would
+        interleaved = [None] * (2 * len(sender_ids))
+        interleaved[0::2] = sender_ids
+        interleaved[1::2] = receiver_ids
+        fresh = [account for account in dict.fromkeys(interleaved) if account not in codes]
+        codes.update(zip(fresh, range(len(codes), len(codes) + len(fresh))))
+        interned = np.fromiter(map(codes.__getitem__, interleaved), dtype=np.int32, count=len(interleaved))
+        self._sender.frombytes(interned[0::2].tobytes())
+        self._receiver.frombytes(interned[1::2].tobytes())
+        self._timestamp.frombytes(np.asarray(timestamps, dtype=np.int64).tobytes())
+        self._amount.frombytes(np.asarray(amounts, dtype=np.float64).tobytes())
+
+        encoded = [transaction_id.encode('utf-8') for transaction_id in transaction_ids]
+        ends = np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)))
+        self._tx_id_offsets.frombytes((ends + len(self._tx_id_data)).tobytes())
+        self._tx_id_data += b''.join(encoded)
+
+    def build(self) -> TransactionFrame:
+        """Finalize the accumulated rows into a TransactionFrame."""
+        return TransactionFrame(
+            account_ids=list(self._codes),
+            sender=np.frombuffer(self._sender, dtype=np.int32),
+            receiver=np.frombuffer(self._receiver, dtype=np.int32),
+            timestamp=np.frombuffer(self._timestamp, dtype=np.int64),
+            amount=np.frombuffer(self._amount, dtype=np.float64),
+            transaction_ids=StringColumn(
+                np.frombuffer(bytes(self._tx_id_data), dtype=np.uint8),
+                np.frombuffer(self._tx_id_offsets, dtype=np.int64)
+            )
+        )
+
+
+def concat_frames(frames: list[TransactionFrame]) -> TransactionFrame:
+    """
+    Rows of all frames in one frame, in order.
+
+    Accounts are interned in order of first appearance across the frames'
+    account dictionaries.
+
+    Complexity: O(total rows + total accounts)
+    """
+    codes: dict[str, int] = {}
+    senders, receivers = [], []
+    for frame in frames:
+        code = np.fromiter(
+            (codes.setdefault(account_id, len(codes)) for account_id in frame.account_ids),
+            dtype=np.int32, count=frame.account_count
+        )
+        senders.append(code[frame.sender])
+        receivers.append(code[frame.receiver])
+
+    offsets = [np.zeros(1, dtype=np.int64)]
+    end = 0
+    for frame in frames:
+        offsets.append(frame.transaction_ids.offsets[1:] + end)
+        end += int(frame.transaction_ids.offsets[-1])
+    return TransactionFrame(
+        list(codes),
+        np.concatenate(senders or [np.zeros(0, dtype=np.int32)]),
+        np.concatenate(receivers or [np.zeros(0, dtype=np.int32)]),
+        np.concatenate([frame.timestamp for frame in frames] or [np.zeros(0, dtype=np.int64)]),
+        np.concatenate([frame.amount for frame in frames] or [np.zeros(0, dtype=np.float64)]),
+        StringColumn(
+            np.concatenate([frame.transaction_ids.data for frame in frames] or [np.zeros(0, dtype=np.uint8)]),
+            np.concatenate(offsets)
+        )
+    )
+
+
+def as_transaction_frame(
+    transactions: Union[list['Transaction'], TransactionFrame]
+) -> TransactionFrame:
+    """Accept either representation and return a TransactionFrame."""
+    if isinstance(transactions, TransactionFrame):
+        return transactions
+    return TransactionFrame.from_transactions(transactions)
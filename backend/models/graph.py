@@ -0,0 +1,233 @@
+"""Compressed-sparse-row transaction graph used by the detectors."""
+from typing import TYPE_CHECKING, Optional, Union
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from networkx import DiGraph
+    from backend.models.frame import TransactionFrame
+
+
+class TransactionGraph:
+    """
+    Read-only directed graph in compressed-sparse-row form.
+
+    Nodes are numbered 0..n-1 in ascending account ID order (node_ids maps
+    a node back to its account ID), so node order is ID order and every
+    adjacency row is sorted. There is one edge per (sender, receiver) pair:
+
+    - out_targets[out_offsets[u]:out_offsets[u + 1]]: successors of u; edge
+      e = out_offsets[u] + i is the i-th of them
+    - in_sources[in_offsets[v]:in_offsets[v + 1]]: predecessors of v, and
+      in_edges the matching edge numbers
+    - edge_count / edge_amount / edge_first_timestamp / edge_last_timestamp:
+      aggregates over the edge's transactions (epoch seconds)
+    - edge_rows[edge_row_offsets[e]:edge_row_offsets[e + 1]]: the edge's rows
+      in frame, sorted by time, so transactions are referenced, not copied
+    - node_of_account: node number of each frame account code
+
+    Build one with build_transaction_graph; from_networkx / to_networkx
+    convert from and to networkx for callers that still use it.
+    """
+
+    __slots__ = (
+        'frame', 'node_ids', 'node_of_account',
+        'out_offsets', 'out_targets', 'in_offsets', 'in_sources', 'in_edges',
+        'edge_count', 'edge_amount', 'edge_first_timestamp', 'edge_last_timestamp',
+        'edge_row_offsets', 'edge_rows'
+    )
+
+    def __init__(
+        self,
+        frame: Optional['TransactionFrame'],
+        node_ids: list[str],
+        **arrays: np.ndarray
+    ) -> None:
+        self.frame = frame
+        self.node_ids = node_ids
+        for name in self.__slots__[2:]:
+            column = arrays[name]
+            column.setflags(write=False)
+            setattr(self, name, column)
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    def number_of_edges(self) -> int:
+        return len(self.out_targets)
+
+    @property
+    def out_degree(self) -> np.ndarray:
+        return np.diff(self.out_offsets)
+
+    @property
+    def in_degree(self) -> np.ndarray:
+        return np.diff(self.in_offsets)
+
+    def successors(self, node: int) -> np.ndarray:
+        """Successor nodes of node, ascending."""
+        return self.out_targets[self.out_offsets[node]:self.out_offsets[node + 1]]
+
+    def predecessors(self, node: int) -> np.ndarray:
+        """Predecessor nodes of node, ascending."""
+        return self.in_sources[self.in_offsets[node]:self.in_offsets[node + 1]]
+
+    def edge_transaction_rows(self, edge: int) -> np.ndarray:
+        """Rows of frame aggregated into edge, sorted by timestamp."""
+        return self.edge_rows[self.edge_row_offsets[edge]:self.edge_row_offsets[edge + 1]]
+
+    def successor_lists(self) -> list[list[int]]:
+        """Adjacency as plain lists, for pure-Python traversals."""
+        targets = self.out_targets.tolist()
+        offsets = self.out_offsets.tolist()
+        return [targets[offsets[u]:offsets[u + 1]] for u in range(len(self))]
+
+    def strongly_connected_components(self) -> list[list[int]]:
+        """
+        Strongly connected components (iterative Tarjan).
+
+        Complexity: O(n + m)
+        """
+        successors = self.successor_lists()
+        n = len(successors)
+        index = [-1] * n
+        low = [0] * n
+        on_stack = [False] * n
+        stack: list[int] = []
+        components: list[list[int]] = []
+        counter = 0
+
+        for root in range(n):
+            if index[root] != -1:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            work = [(root, 0)]
+            while work:
+                v, i = work[-1]
+                if i < len(successors[v]):
+                    work[-1] = (v, i + 1)
+                    w = successors[v][i]
+                    if index[w] == -1:
+                        index[w] = low[w] = counter
+                        counter += 1
+                        stack.append(w)
+                        on_stack[w] = True
+                        work.append((w, 0))
+                    elif on_stack[w] and index[w] < low[v]:
+                        low[v] = index[w]
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if low[v] < low[parent]:
+                        low[parent] = low[v]
+                if low[v] == index[v]:
+                    component = []
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = False
+                        component.append(w)
+                        if w == v:
+                            break
+                    components.append(component)
+
+        return components
+
+    @classmethod
+    def from_edges(
+        cls,
+        frame: Optional['TransactionFrame'],
+        node_ids: list[str],
+        node_of_account: np.ndarray,
+        source: np.ndarray,
+        target: np.ndarray,
+        **edge_arrays: np.ndarray
+    ) -> 'TransactionGraph':
+        """Build both adjacency directions from edges sorted by (source, target)."""
+        n_nodes = len(node_ids)
+        out_offsets = np.zeros(n_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(source, minlength=n_nodes), out=out_offsets[1:])
+
+        in_edges = np.lexsort((source, target))
+        in_offsets = np.zeros(n_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(target, minlength=n_nodes), out=in_offsets[1:])
+
+        return cls(
+            frame,
+            node_ids,
+            node_of_account=node_of_account,
+            out_offsets=out_offsets,
+            out_targets=target.astype(np.int32),
+            in_offsets=in_offsets,
+            in_sources=source[in_edges].astype(np.int32),
+            in_edges=in_edges,
+            **edge_arrays
+        )
+
+    @classmethod
+    def from_networkx(cls, G: 'DiGraph') -> 'TransactionGraph':
+        """
+        Convert a networkx DiGraph (adapter for callers that still build one).
+
+        Edge aggregates are read from the amount, count, first_timestamp and
+        last_timestamp attributes when present. The result references no
+        frame, so it has no per-edge transaction rows.
+        """
+        node_ids = sorted(G.nodes())
+        node_index = {node: i for i, node in enumerate(node_ids)}
+        edges = sorted(
+            (node_index[u], node_index[v], data) for u, v, data in G.edges(data=True)
+        )
+        source = np.array([u for u, _, _ in edges], dtype=np.int64)
+        target = np.array([v for _, v, _ in edges], dtype=np.int64)
+        return cls.from_edges(
+            None, node_ids, np.arange(len(node_ids), dtype=np.int32), source, target,
+            edge_count=np.array([data.get('count', 1) for _, _, data in edges], dtype=np.int64),
+            edge_amount=np.array([data.get('amount', 0.0) for _, _, data in edges], dtype=np.float64),
+            edge_first_timestamp=np.array(
+                [data.get('first_timestamp', 0) for _, _, data in edges], dtype=np.int64
+            ),
+            edge_last_timestamp=np.array(
+                [data.get('last_timestamp', 0) for _, _, data in edges], dtype=np.int64
+            ),
+            edge_row_offsets=np.zeros(len(edges) + 1, dtype=np.int64),
+            edge_rows=np.zeros(0, dtype=np.int64)
+        )
+
+    def to_networkx(self) -> 'DiGraph':
+        """
+        Convert to a networkx DiGraph with the same edge aggregates as
+        attributes (amount, count, first_timestamp, last_timestamp).
+
+        networkx is an optional dependency, only imported here.
+        """
+        import networkx as nx
+
+        node_ids = self.node_ids
+        sources = np.repeat(np.arange(len(self)), self.out_degree)
+        G = nx.DiGraph()
+        G.add_nodes_from(node_ids)
+        G.add_edges_from(
+            (
+                node_ids[u],
+                node_ids[v],
+                {'amount': amount, 'count': count, 'first_timestamp': first, 'last_timestamp': last}
+            )
+            for u, v, amount, count, first, last in zip(
+                sources.tolist(), self.out_targets.tolist(), self.edge_amount.tolist(),
+                self.edge_count.tolist(), self.edge_first_timestamp.tolist(),
+                self.edge_last_timestamp.tolist()
+            )
+        )
+        return G
+
+
+def as_transaction_graph(graph: Union[TransactionGraph, 'DiGraph']) -> TransactionGraph:
+    """Accept either representation and return a TransactionGraph."""
+    if isinstance(graph, TransactionGraph):
+        return graph
+    return TransactionGraph.from_networkx(graph)
@@ -0,0 +1,15 @@
+"""Detection job models."""
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+
+
+class JobInfo(BaseModel):
+    """State of a detection job submitted through the job API."""
+    job_id: str
+    status: str  # queued | running | completed | failed | cancelled
+    submitted_at: datetime
+    finished_at: Optional[datetime] = None
+    # DetectionResult as produced by the worker (already validated there)
+    result: Optional[dict] = None
+    error: Optional[str] = None
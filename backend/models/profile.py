@@ -0,0 +1,27 @@
+"""Profiling report models."""
+from pydantic import BaseModel
+
+
+class FunctionProfile(BaseModel):
+    """CPU profile of one function."""
+    function: str  # file:line(name)
+    calls: int
+    total_seconds: float  # in the function itself
+    cumulative_seconds: float  # including everything it called
+
+
+class AllocationSite(BaseModel):
+    """Memory held by blocks allocated on one source line (at the heaviest stage end)."""
+    site: str  # file:line
+    size_kb: float
+    blocks: int
+
+
+class ProfileReport(BaseModel):
+    """CPU and memory profile of one detection (see /api/detect?profile=true)."""
+    profile_id: str
+    wall_seconds: float
+    peak_memory_mb: float
+    stage_peak_memory_mb: dict[str, float]  # traced peak within each stage
+    top_functions: list[FunctionProfile]
+    top_allocations: list[AllocationSite]
@@ -0,0 +1,11 @@
+"""Detection session models."""
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class SessionInfo(BaseModel):
+    """State of an incremental detection session (see /api/sessions)."""
+    session_id: str
+    created_at: datetime
+    transactions_analyzed: int
+    accounts_analyzed: int
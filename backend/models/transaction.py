@@ -9,7 +9,7 @@ class Transaction(BaseModel):
     transaction_id: str
     sender_id: str
     receiver_id: str
-    amount: float = Field(gt=0)
+    amount: float = Field(gt=0, allow_inf_nan=False)
     timestamp: datetime
 
     @field_validator('timestamp', mode='before')
@@ -45,8 +45,24 @@ class DetectionSummary(BaseModel):
     processing_time_seconds: float
 
 
+class StageDiagnostics(BaseModel):
+    """Wall time and work counters of one pipeline stage."""
+    seconds: float
+    counters: dict[str, int] = {}
+
+
+class DetectionDiagnostics(BaseModel):
+    """Per-stage breakdown of one detection run, in pipeline order."""
+    stages: dict[str, StageDiagnostics]
+    total_seconds: float  # wall time of the run
+    parallel_detectors: bool = False  # smurfing and shells ran alongside the cycle search
+
+
 class DetectionResult(BaseModel):
     """Complete detection result matching output schema."""
     suspicious_accounts: list[SuspiciousAccount]
     fraud_rings: list[FraudRing]
     summary: DetectionSummary
+    # Set by run_detection; not part of the output schema, so never
+    # serialized with the result (callers add it explicitly)
+    diagnostics: Optional[DetectionDiagnostics] = Field(default=None, exclude=True)
@@ -1,75 +1,363 @@
 """Cycle detection algorithm for money muling rings."""
-import networkx as nx
-from typing import TYPE_CHECKING
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from itertools import repeat
+from typing import TYPE_CHECKING, Collection, Iterable, Iterator, Mapping, Optional, Union
+
+import numpy as np
+
+from backend.models.graph import TransactionGraph, as_transaction_graph
+from backend.services.graph_snapshot import GraphSnapshot
+from backend.services.ring_grouping import RingBuilder
 
 if TYPE_CHECKING:
     from networkx import DiGraph
 
 
-def detect_cycles(G: 'DiGraph', min_length: int = 3, max_length: int = 5) -> dict[str, list[list[str]]]:
+# Below this many edges outside the largest candidate component (which the
+# calling process searches itself) the search runs in-process; pool start-up
+# and sharing the graph would outweigh the parallel speedup.
+PARALLEL_MIN_EDGES = 20_000
+
+
+def iter_bounded_cycles(
+    G: Union[TransactionGraph, 'DiGraph'],
+    min_length: int = 3,
+    max_length: int = 5
+) -> Iterator[list[str]]:
+    """
+    Enumerate simple cycles whose length lies in [min_length, max_length].
+
+    Algorithm: Nodes are ranked by ID. For every start node, a DFS only walks
+    nodes ranked above the start, so each cycle is found exactly once, rooted
+    at its smallest node (canonical rotation). A reverse BFS of radius
+    max_length // 2 gives nearby nodes' hop distance back to the start; once
+    a path is that close to the length bound, the DFS only extends it to
+    nodes that can still close the cycle within max_length hops.
+
+    Successors are visited in ascending order and a closing edge is reported
+    before the path is extended, so cycles are yielded in lexicographic order
+    and callers need no separate sort.
+
+    Complexity: O(n * d^l) where d = average degree and l = max_length,
+    with the last max_length // 2 levels of every DFS pruned to nodes
+    that can still close a cycle. Cycles longer than max_length are never
+    enumerated.
+
+    Args:
+        G: Transaction graph (a networkx DiGraph is converted first)
+        min_length: Minimum cycle length (default: 3)
+        max_length: Maximum cycle length (default: 5)
+
+    Yields:
+        Cycles as lists of node IDs, smallest node first
+    """
+    graph = as_transaction_graph(G)
+    node_ids = graph.node_ids
+    adjacency = dict(enumerate(graph.successor_lists()))
+    for cycle in _iter_adjacency_cycles(adjacency, min_length, max_length):
+        yield [node_ids[i] for i in cycle]
+
+
+def _iter_adjacency_cycles(
+    adjacency: Mapping[int, list[int]],
+    min_length: int,
+    max_length: int,
+    stats: Optional[dict[str, int]] = None
+) -> Iterator[list[int]]:
+    """
+    Bounded cycle search over a plain node -> successors mapping.
+
+    The number of DFS expansions is added to stats['dfs_expansions'] once
+    the search is exhausted, when stats is given.
+    """
+    if max_length < 1 or min_length > max_length:
+        return
+
+    nodes = sorted(adjacency)
+    rank = {node: i for i, node in enumerate(nodes)}
+    successors = [sorted(rank[v] for v in adjacency[u] if v in rank) for u in nodes]
+    predecessors: list[list[int]] = [[] for _ in nodes]
+    for u, succ in enumerate(successors):
+        for v in succ:
+            predecessors[v].append(u)
+
+    # Distances back to the start are only needed for the last hops of a
+    # path, so the reverse BFS stops at half the length bound
+    radius = max_length // 2
+    expansions = 0
+
+    for start in range(len(nodes)):
+        # Hop distance from nearby higher-ranked nodes back to start
+        dist = {start: 0}
+        frontier = deque([start])
+        while frontier:
+            v = frontier.popleft()
+            d = dist[v] + 1
+            if d > radius:
+                continue
+            for u in predecessors[v]:
+                if u > start and u not in dist:
+                    dist[u] = d
+                    frontier.append(u)
+
+        path = [start]
+        on_path = {start}
+
+        def extend(u: int) -> Iterator[list[str]]:
+            nonlocal expansions
+            expansions += 1
+            depth = len(path)
+            # Hops left to close the cycle after stepping to the next node
+            budget = max_length - depth
+            for v in successors[u]:
+                if v == start:
+                    if depth >= min_length:
+                        yield [nodes[i] for i in path]
+                    continue
+                if v < start or v in on_path:
+                    continue
+                # Within reach of the BFS, v must be able to close in time
+                if budget <= radius and dist.get(v, budget + 1) > budget:
+                    continue
+                path.append(v)
+                on_path.add(v)
+                yield from extend(v)
+                on_path.discard(v)
+                path.pop()
+
+        yield from extend(start)
+
+    if stats is not None:
+        stats['dfs_expansions'] = stats.get('dfs_expansions', 0) + expansions
+
+
+def iter_cycles_through_edges(
+    successors: Mapping[str, Collection[str]],
+    predecessors: Mapping[str, Collection[str]],
+    edges: Iterable[tuple[str, str]],
+    min_length: int = 3,
+    max_length: int = 5
+) -> Iterator[tuple[str, ...]]:
+    """
+    Enumerate the bounded simple cycles that use at least one of edges.
+
+    Used to extend a known cycle set after edges are added: a new cycle
+    must pass through a new edge (u, v), so it is v's path back to u. Each
+    edge gets the same search as iter_bounded_cycles, rooted at u with the
+    first hop fixed to v and without the rank restriction, so the work
+    depends on the edges' neighbourhoods rather than the graph size.
+
+    Args:
+        successors / predecessors: Adjacency of the whole graph, edges included
+        edges: (sender, receiver) pairs to search through
+        min_length: Minimum cycle length (default: 3)
+        max_length: Maximum cycle length (default: 5)
+
+    Yields:
+        Cycles rotated to start at their smallest node, each once
+    """
+    if max_length < 1 or min_length > max_length:
+        return
+
+    radius = max_length // 2
+    seen: set[tuple[str, ...]] = set()
+
+    def canonical(path: list[str]) -> tuple[str, ...]:
+        i = path.index(min(path))
+        return tuple(path[i:] + path[:i])
+
+    for start, first in edges:
+        if start == first:
+            if min_length <= 1 and (start,) not in seen:
+                seen.add((start,))
+                yield (start,)
+            continue
+
+        # Hop distance from nearby nodes back to start
+        dist = {start: 0}
+        frontier = deque([start])
+        while frontier:
+            v = frontier.popleft()
+            d = dist[v] + 1
+            if d > radius:
+                continue
+            for u in predecessors.get(v, ()):
+                if u not in dist:
+                    dist[u] = d
+                    frontier.append(u)
+
+        path = [start]
+        on_path = {start}
+
+        def step(v: str) -> Iterator[tuple[str, ...]]:
+            path.append(v)
+            on_path.add(v)
+            yield from extend(v)
+            on_path.discard(v)
+            path.pop()
+
+        def extend(u: str) -> Iterator[tuple[str, ...]]:
+            depth = len(path)
+            budget = max_length - depth
+            for v in successors.get(u, ()):
+                if v == start:
+                    if depth >= min_length:
+                        cycle = canonical(path)
+                        if cycle not in seen:
+                            seen.add(cycle)
+                            yield cycle
+                    continue
+                if v in on_path:
+                    continue
+                if budget <= radius and dist.get(v, budget + 1) > budget:
+                    continue
+                yield from step(v)
+
+        # The first hop is the new edge, pruned like any other step
+        budget = max_length - 1
+        if budget > radius or dist.get(first, budget + 1) <= budget:
+            yield from step(first)
+
+
+def detect_cycles(
+    G: Union[TransactionGraph, 'DiGraph'],
+    min_length: int = 3,
+    max_length: int = 5,
+    workers: Optional[int] = None,
+    stats: Optional[dict[str, int]] = None,
+    snapshot: Optional[GraphSnapshot] = None
+) -> dict[str, list[list[str]]]:
     """
     Detect simple cycles of specified length range.
-    
-    Algorithm: Uses NetworkX simple_cycles with bounded length.
-    Complexity: O((n+m) * c) where:
+
+    Algorithm: Every cycle lies inside one strongly connected component, so
+    the graph is split into SCCs first and components with fewer than
+    min_length nodes (singletons, pairs) are dropped. The remaining
+    components are searched with a length-bounded DFS (see
+    iter_bounded_cycles), largest first. When the components other than
+    the largest (by edges) hold enough work to pay for it, they go to a
+    process pool while the largest is searched in-process; one dominant
+    component thus never waits on pool start-up for nothing. Pool workers
+    read the graph from a shared-memory snapshot and build their
+    component's adjacency themselves, so only node lists are pickled.
+    Complexity: O(n + m) for the SCC split, plus O(k * (k+e) + c * max_length)
+    per component where:
         - n = nodes, m = edges
-        - c = number of cycles (can be exponential in worst case, but bounded by max_length)
-    
+        - k, e = component nodes and edges
+        - c = number of cycles within the length bound
+
     Args:
-        G: Directed graph
+        G: Transaction graph (a networkx DiGraph is converted first)
         min_length: Minimum cycle length (default: 3)
         max_length: Maximum cycle length (default: 5)
-        
+        workers: Worker processes for the component search
+            (default: os.cpu_count(); 1 searches in-process)
+        stats: Work counters to fill in when given: components searched,
+            their total and largest node counts, DFS expansions and cycles
+        snapshot: GraphSnapshot of G for the pool workers (one is made for
+            the search if it needs one and none is given)
+
     Returns:
         Dictionary mapping ring_id to list of cycles (each cycle is list of node IDs)
     """
-    cycles = []
-    
-    # Get all simple cycles
-    # Note: simple_cycles can be expensive for large graphs, but max_length=5 bounds it
-    # nx.simple_cycles may return cycles in graph-dependent order; sort for determinism
-    all_cycles = list(nx.simple_cycles(G))
-    # sort cycles by tuple for consistency
-    all_cycles.sort(key=lambda c: tuple(c))
-    
-    # Filter by length
-    filtered_cycles = [
-        cycle for cycle in all_cycles
-        if min_length <= len(cycle) <= max_length
+    graph = as_transaction_graph(G)
+    components = [
+        set(component) for component in graph.strongly_connected_components()
+        if len(component) >= min_length
     ]
-    
-    if not filtered_cycles:
+    if stats is None:
+        stats = {}
+    stats.update(
+        components=len(components),
+        component_nodes=sum(map(len, components)),
+        largest_component=max(map(len, components), default=0),
+        dfs_expansions=0,
+        cycles=0
+    )
+    if not components:
         return {}
-    
-    # Group cycles by shared nodes (same ring)
-    ring_map: dict[str, list[list[str]]] = {}
-    ring_counter = 1
-    node_to_ring: dict[str, str] = {}
-    
-    for cycle in filtered_cycles:
-        # Check if any node in cycle already belongs to a ring
-        existing_ring = None
-        for node in cycle:
-            if node in node_to_ring:
-                existing_ring = node_to_ring[node]
-                break
-        
-        if existing_ring:
-            ring_id = existing_ring
-        else:
-            ring_id = f"RING_{ring_counter:03d}"
-            ring_counter += 1
-        
-        # Add cycle to ring
-        if ring_id not in ring_map:
-            ring_map[ring_id] = []
-        ring_map[ring_id].append(cycle)
-        
-        # Mark all nodes in cycle as belonging to this ring
-        for node in cycle:
-            node_to_ring[node] = ring_id
-    
-    return ring_map
+
+    # Largest components first so the longest searches start earliest
+    components.sort(key=lambda c: (-len(c), min(c)))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    # Edges with both ends in the same candidate component, per component
+    component_of = np.full(len(graph), -1, dtype=np.int64)
+    for index, component in enumerate(components):
+        component_of[list(component)] = index
+    source_component = np.repeat(component_of, graph.out_degree)
+    internal = (source_component >= 0) & (source_component == component_of[graph.out_targets])
+    component_edges = np.bincount(source_component[internal], minlength=len(components))
+    largest = int(np.argmax(component_edges))
+    other_edges = int(component_edges.sum() - component_edges[largest])
+
+    # Group cycles by shared nodes (same ring) as components finish
+    node_ids = graph.node_ids
+    rings = RingBuilder()
+    successors = graph.successor_lists()
+
+    def search_in_process(component: set[int]) -> None:
+        adjacency = {node: [v for v in successors[node] if v in component] for node in component}
+        rings.update(
+            [node_ids[i] for i in cycle]
+            for cycle in _iter_adjacency_cycles(adjacency, min_length, max_length, stats)
+        )
+
+    if workers > 1 and len(components) > 1 and other_edges >= PARALLEL_MIN_EDGES:
+        others = components[:largest] + components[largest + 1:]
+        with ExitStack() as stack:
+            if snapshot is None:
+                snapshot = stack.enter_context(GraphSnapshot.create(graph))
+            executor = stack.enter_context(
+                ProcessPoolExecutor(max_workers=min(workers - 1, len(others)))
+            )
+            results = executor.map(
+                _shared_component_cycles, repeat(snapshot), map(sorted, others),
+                repeat(min_length), repeat(max_length)
+            )
+            # The pool works through the other components meanwhile
+            search_in_process(components[largest])
+            for cycles, expansions in results:
+                rings.update([node_ids[i] for i in cycle] for cycle in cycles)
+                stats['dfs_expansions'] += expansions
+    else:
+        for component in components:
+            search_in_process(component)
+
+    stats['cycles'] = len(rings)
+    return rings.build()
+
+
+def _component_cycles(
+    adjacency: Mapping[int, list[int]],
+    min_length: int,
+    max_length: int
+) -> tuple[list[list[int]], int]:
+    """Collect the bounded cycles of one component and the DFS expansions."""
+    stats = {'dfs_expansions': 0}
+    cycles = list(_iter_adjacency_cycles(adjacency, min_length, max_length, stats))
+    return cycles, stats['dfs_expansions']
+
+
+def _shared_component_cycles(
+    snapshot: GraphSnapshot,
+    component: list[int],
+    min_length: int,
+    max_length: int
+) -> tuple[list[list[int]], int]:
+    """_component_cycles of the component's adjacency in the snapshot's graph (runs in a worker process)."""
+    graph = snapshot.graph
+    targets, offsets = graph.out_targets, graph.out_offsets
+    members = set(component)
+    adjacency = {
+        node: [v for v in targets[offsets[node]:offsets[node + 1]].tolist() if v in members]
+        for node in component
+    }
+    return _component_cycles(adjacency, min_length, max_length)
 
 
 def get_cycle_pattern_label(cycle_length: int) -> str:
@@ -0,0 +1,359 @@
+"""Incremental detection over a growing set of transactions."""
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional, Union
+
+import numpy as np
+
+from backend.models.frame import TransactionFrame, as_transaction_frame
+from backend.models.transaction import DetectionResult
+from backend.services.cycle_detection import detect_cycles, iter_cycles_through_edges
+from backend.services.detection_engine import DETECTION_PARAMETERS, assign_rings
+from backend.services.graph_builder import build_transaction_graph
+from backend.services.json_formatter import build_detection_output
+from backend.services.pattern_registry import build_pattern_registry
+from backend.services.ring_grouping import RingBuilder
+from backend.services.scoring import account_velocity_score, calculate_suspicion_scores
+from backend.services.shell_detection import iter_chains_through
+from backend.services.smurfing_detection import _find_dense_window, _smurfing_info
+
+if TYPE_CHECKING:
+    from backend.models.transaction import Transaction
+
+
+class SessionFullError(ValueError):
+    """Appending a batch would take a session past its transaction limit."""
+
+
+class BatchTooLargeError(ValueError):
+    """A batch has more transactions than a session takes at once."""
+
+
+class _AccountHistory:
+    """
+    One account's transactions, kept sorted by (timestamp, row).
+
+    inbound / outbound hold (timestamp, row, counterparty) tuples; months
+    counts distinct transactions per calendar month (a self-transfer once).
+    """
+
+    __slots__ = ('inbound', 'outbound', 'months')
+
+    def __init__(self) -> None:
+        self.inbound: list[tuple[int, int, str]] = []
+        self.outbound: list[tuple[int, int, str]] = []
+        self.months: dict[int, int] = defaultdict(int)
+
+
+class DetectionSession:
+    """
+    Detection state that is updated in place as transaction batches arrive.
+
+    The session keeps the transaction graph as adjacency sets, every
+    account's time-sorted history, and the patterns found so far. After
+    append(), result() equals run_detection over all transactions appended
+    (apart from processing time), but each append only re-examines what the
+    batch can have changed:
+
+    - Cycles: edges are never removed, so known cycles stay valid and new
+      ones must pass through a new sender -> receiver pair; only those are
+      searched (iter_cycles_through_edges).
+    - Shells: a chain appears or disappears (its intermediates' degree
+      grew) only if it touches an endpoint of a new pair, so those chains
+      are dropped and searched again (iter_chains_through).
+    - Smurfing: only accounts in the batch are rechecked, and only over
+      the windows that can contain one of their new timestamps.
+    - Velocity: recomputed for accounts in the batch from running counts.
+
+    Ring numbering and scores are rebuilt from the stored patterns in
+    result(), which is proportional to the patterns and accounts, not to
+    the transaction history. The first batch is analysed in one pass.
+
+    Every transaction stays in the histories (a batch may arrive out of
+    time order, so no window can be ruled out), so memory grows with the
+    session; max_transactions caps it. Appends run in the caller's thread
+    (the first one searches the whole batch for cycles and chains), so
+    max_batch_transactions caps the work of any one append.
+
+    Safe to use from several threads; appends are serialized.
+    """
+
+    def __init__(
+        self,
+        max_transactions: Optional[int] = None,
+        max_batch_transactions: Optional[int] = None
+    ) -> None:
+        self.parameters = dict(DETECTION_PARAMETERS)
+        self.max_transactions = max_transactions
+        self.max_batch_transactions = max_batch_transactions
+        self.created_at = datetime.now()
+        self.transaction_count = 0
+        self._successors: dict[str, set[str]] = {}
+        self._predecessors: dict[str, set[str]] = {}
+        self._accounts: dict[str, _AccountHistory] = {}
+        # Cycles rotated to their smallest account
+        self._cycles: set[tuple[str, ...]] = set()
+        # Shell chains, one per account set (the lexicographically smallest)
+        self._chains: dict[frozenset[str], tuple[str, ...]] = {}
+        self._chains_by_account: dict[str, set[frozenset[str]]] = defaultdict(set)
+        # First dense window per account and direction: (count, start, end)
+        self._fan_in: dict[str, tuple[int, int, int]] = {}
+        self._fan_out: dict[str, tuple[int, int, int]] = {}
+        self._velocity: dict[str, float] = {}
+        self._elapsed = 0.0
+        self._output: Optional[dict] = None
+        self._lock = threading.Lock()
+
+    @property
+    def account_count(self) -> int:
+        return len(self._accounts)
+
+    def append(self, transactions: Union[list['Transaction'], TransactionFrame]) -> None:
+        """
+        Add a batch of transactions and update the detections.
+
+        Complexity: O(b h) worst case to file b transactions into sorted
+        histories of length h (each insert moves the later entries; O(b)
+        when a batch only adds newer timestamps), plus searches bounded by
+        the neighbourhoods of the new edges and the windows around the new
+        timestamps.
+
+        Args:
+            transactions: TransactionFrame, or Transaction objects
+
+        Raises:
+            BatchTooLargeError: If the batch has more than
+                max_batch_transactions transactions
+            SessionFullError: If the batch would take the session past
+                max_transactions
+            (in both cases the session is left unchanged)
+        """
+        start_time = time.time()
+        frame = as_transaction_frame(transactions)
+        if not len(frame):
+            return
+        if self.max_batch_transactions is not None and len(frame) > self.max_batch_transactions:
+            raise BatchTooLargeError(
+                f"Batch of {len(frame):,} transactions is over the session limit of "
+                f"{self.max_batch_transactions:,} per batch; split it"
+            )
+        with self._lock:
+            if self.max_transactions is not None and self.transaction_count + len(frame) > self.max_transactions:
+                raise SessionFullError(
+                    f"Session limit of {self.max_transactions:,} transactions reached "
+                    f"({self.transaction_count:,} analysed, batch of {len(frame):,}); start a new session"
+                )
+            seeding = not self._accounts
+            new_edges, new_inbound, new_outbound = self._ingest(frame)
+
+            if seeding:
+                self._seed_cycles(frame)
+            else:
+                min_length = self.parameters['cycle_min_length']
+                max_length = self.parameters['cycle_max_length']
+                self._cycles.update(iter_cycles_through_edges(
+                    self._successors, self._predecessors, new_edges, min_length, max_length
+                ))
+
+            if new_edges:
+                self._refresh_chains({account for edge in new_edges for account in edge})
+
+            window_seconds = self.parameters['smurfing_time_window_hours'] * 3600
+            for account_id, earliest in new_inbound.items():
+                self._refresh_window(self._fan_in, account_id, 'inbound', earliest - window_seconds)
+            for account_id, earliest in new_outbound.items():
+                self._refresh_window(self._fan_out, account_id, 'outbound', earliest - window_seconds)
+
+            for account_id in new_inbound.keys() | new_outbound.keys():
+                score = self._velocity_score(self._accounts[account_id])
+                if score:
+                    self._velocity[account_id] = score
+                else:
+                    self._velocity.pop(account_id, None)
+
+            self._output = None
+            self._elapsed = time.time() - start_time
+
+    def result(self) -> DetectionResult:
+        """DetectionResult over every transaction appended so far (see result_output)."""
+        return DetectionResult.model_validate(self.result_output())
+
+    def result_output(self) -> dict:
+        """
+        Result over every transaction appended so far, as plain data (the
+        schema of run_detection_output). It is built once per append; do
+        not modify it.
+        """
+        with self._lock:
+            if self._output is None:
+                self._output = self._build_output()
+            return self._output
+
+    def _ingest(
+        self, frame: TransactionFrame
+    ) -> tuple[list[tuple[str, str]], dict[str, int], dict[str, int]]:
+        """
+        File the batch into the graph and histories (lock held).
+
+        Returns:
+            (sender -> receiver pairs not seen before, and per account the
+            earliest new inbound / outbound timestamp)
+        """
+        account_ids = frame.account_ids
+        months = frame.timestamp.astype('datetime64[s]').astype('datetime64[M]').astype(np.int64)
+        new_edges: list[tuple[str, str]] = []
+        new_inbound: dict[str, int] = {}
+        new_outbound: dict[str, int] = {}
+
+        rows = zip(
+            frame.sender.tolist(), frame.receiver.tolist(),
+            frame.timestamp.tolist(), months.tolist()
+        )
+        for row, (sender_code, receiver_code, timestamp, month) in enumerate(
+            rows, start=self.transaction_count
+        ):
+            sender_id = account_ids[sender_code]
+            receiver_id = account_ids[receiver_code]
+            sender = self._account(sender_id)
+            receiver = self._account(receiver_id)
+
+            insort(sender.outbound, (timestamp, row, receiver_id))
+            insort(receiver.inbound, (timestamp, row, sender_id))
+            sender.months[month] += 1
+            if receiver_id != sender_id:
+                receiver.months[month] += 1
+
+            if timestamp < new_outbound.get(sender_id, timestamp + 1):
+                new_outbound[sender_id] = timestamp
+            if timestamp < new_inbound.get(receiver_id, timestamp + 1):
+                new_inbound[receiver_id] = timestamp
+
+            successors = self._successors[sender_id]
+            if receiver_id not in successors:
+                successors.add(receiver_id)
+                self._predecessors[receiver_id].add(sender_id)
+                new_edges.append((sender_id, receiver_id))
+
+        self.transaction_count += len(frame)
+        return new_edges, new_inbound, new_outbound
+
+    def _account(self, account_id: str) -> _AccountHistory:
+        history = self._accounts.get(account_id)
+        if history is None:
+            history = self._accounts[account_id] = _AccountHistory()
+            self._successors[account_id] = set()
+            self._predecessors[account_id] = set()
+        return history
+
+    def _seed_cycles(self, frame: TransactionFrame) -> None:
+        """
+        Find every cycle of the first batch with the full search (lock held).
+
+        The search runs in-process: sessions are appended from the API's
+        threads, beside the detection job pool, and must not start a
+        process pool of their own.
+        """
+        cycle_rings = detect_cycles(
+            build_transaction_graph(frame),
+            min_length=self.parameters['cycle_min_length'],
+            max_length=self.parameters['cycle_max_length'],
+            workers=1
+        )
+        self._cycles.update(
+            tuple(cycle) for cycles in cycle_rings.values() for cycle in cycles
+        )
+
+    def _refresh_chains(self, touched: set[str]) -> None:
+        """Re-search the shell chains through touched accounts (lock held)."""
+        for account_id in touched:
+            for key in self._chains_by_account.pop(account_id, ()):
+                if self._chains.pop(key, None) is not None:
+                    for member in key:
+                        if member not in touched:
+                            self._chains_by_account[member].discard(key)
+
+        for chain in iter_chains_through(
+            self._successors, self._predecessors, touched,
+            min_chain_length=self.parameters['shell_min_chain_length'],
+            max_intermediate_degree=self.parameters['shell_max_intermediate_degree']
+        ):
+            key = frozenset(chain)
+            known = self._chains.get(key)
+            if known is None:
+                for member in key:
+                    self._chains_by_account[member].add(key)
+            if known is None or chain < known:
+                self._chains[key] = chain
+
+    def _refresh_window(
+        self,
+        matches: dict[str, tuple[int, int, int]],
+        account_id: str,
+        direction: str,
+        since: int
+    ) -> None:
+        """
+        Recheck one account's first dense window (lock held).
+
+        Windows starting before since cannot contain a new transaction, so
+        they are unchanged: a match among them stands, and otherwise the
+        search resumes at since.
+        """
+        match = matches.get(account_id)
+        if match is not None and match[1] < since:
+            return
+        entries = getattr(self._accounts[account_id], direction)
+        entries = entries[bisect_left(entries, (since,)):]
+        match = _find_dense_window(
+            [entry[0] for entry in entries], [entry[2] for entry in entries],
+            self.parameters['smurfing_threshold'], self.parameters['smurfing_time_window_hours'] * 3600
+        )
+        if match:
+            matches[account_id] = match
+        else:
+            matches.pop(account_id, None)
+
+    @staticmethod
+    def _velocity_score(history: _AccountHistory) -> float:
+        inbound, outbound = history.inbound, history.outbound
+        first = min(entries[0][0] for entries in (inbound, outbound) if entries)
+        last = max(entries[-1][0] for entries in (inbound, outbound) if entries)
+        month_counts = [history.months[month] for month in sorted(history.months)]
+        return account_velocity_score(len(inbound) + len(outbound), first, last, month_counts)
+
+    def _build_output(self) -> dict:
+        """Number the rings, score and format the stored patterns (lock held)."""
+        start_time = time.time()
+        params = self.parameters
+
+        cycle_rings = RingBuilder()
+        cycle_rings.update(list(cycle) for cycle in self._cycles)
+        cycle_accounts = cycle_rings.build()
+
+        shell_rings = RingBuilder()
+        shell_rings.update(list(chain) for chain in self._chains.values())
+        shell_accounts, account_ring_map = assign_rings(cycle_accounts, shell_rings.build())
+
+        # Fan-in takes priority over fan-out, as in detect_smurfing
+        smurfing_accounts: dict[str, dict] = {}
+        for pattern_type, matches in (('fan_out', self._fan_out), ('fan_in', self._fan_in)):
+            for account_id, match in matches.items():
+                smurfing_accounts[account_id] = _smurfing_info(
+                    account_id, pattern_type, params['smurfing_threshold'],
+                    params['smurfing_time_window_hours'], *match
+                )
+
+        patterns = build_pattern_registry(cycle_accounts, smurfing_accounts, shell_accounts)
+        suspicion_scores = calculate_suspicion_scores(
+            None, None, cycle_accounts, smurfing_accounts, shell_accounts,
+            account_ring_map, velocity_scores=self._velocity, patterns=patterns
+        )
+
+        processing_time = self._elapsed + time.time() - start_time
+        return build_detection_output(
+            self._accounts.keys(), None, cycle_accounts, smurfing_accounts,
+            shell_accounts, suspicion_scores, account_ring_map, processing_time, patterns
+        )
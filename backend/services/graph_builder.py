@@ -1,58 +1,73 @@
 """Graph construction from transactions."""
-import networkx as nx
-from typing import TYPE_CHECKING
+import numpy as np
+from typing import TYPE_CHECKING, Union
+
+from backend.models.frame import TransactionFrame, as_transaction_frame
+from backend.models.graph import TransactionGraph
 
 if TYPE_CHECKING:
     from backend.models.transaction import Transaction
 
 
-def build_transaction_graph(transactions: list['Transaction']) -> nx.DiGraph:
+def build_transaction_graph(
+    transactions: Union[list['Transaction'], TransactionFrame]
+) -> TransactionGraph:
     """
     Build directed graph from transactions.
-    
-    Nodes: account IDs (sender_id, receiver_id)
-    Edges: transactions with attributes (amount, timestamp, transaction_id)
-    
-    Complexity: O(n) where n = number of transactions
-    
+
+    Nodes: account IDs (sender_id, receiver_id), numbered in ID order
+    Edges: one per (sender, receiver) pair, aggregating its transactions:
+        - edge_amount: total amount
+        - edge_count: number of transactions
+        - edge_first_timestamp / edge_last_timestamp: epoch seconds
+        - edge_rows: the pair's rows in the frame (offsets, not copies)
+
+    Complexity: O(n log n) where n = number of transactions (the
+    aggregation is a vectorized sort over the frame's columns)
+
     Args:
-        transactions: List of Transaction objects
-        
+        transactions: TransactionFrame (or Transaction objects, converted once)
+
     Returns:
-        Directed graph with edge attributes
+        TransactionGraph in compressed-sparse-row form
     """
-    G = nx.DiGraph()
-    
-    for tx in transactions:
-        # Add edge with transaction data as attributes
-        if G.has_edge(tx.sender_id, tx.receiver_id):
-            # If edge exists, append to list (multiple transactions between same accounts)
-            if 'transactions' not in G[tx.sender_id][tx.receiver_id]:
-                # Convert existing single transaction to list
-                existing = G[tx.sender_id][tx.receiver_id]
-                G[tx.sender_id][tx.receiver_id]['transactions'] = [existing]
-                G[tx.sender_id][tx.receiver_id]['amount'] = existing.get('amount', 0)
-                G[tx.sender_id][tx.receiver_id]['timestamp'] = existing.get('timestamp')
-            
-            G[tx.sender_id][tx.receiver_id]['transactions'].append({
-                'transaction_id': tx.transaction_id,
-                'amount': tx.amount,
-                'timestamp': tx.timestamp
-            })
-            G[tx.sender_id][tx.receiver_id]['amount'] += tx.amount
-        else:
-            # New edge
-            G.add_edge(
-                tx.sender_id,
-                tx.receiver_id,
-                amount=tx.amount,
-                timestamp=tx.timestamp,
-                transaction_id=tx.transaction_id,
-                transactions=[{
-                    'transaction_id': tx.transaction_id,
-                    'amount': tx.amount,
-                    'timestamp': tx.timestamp
-                }]
-            )
-    
-    return G
+    frame = as_transaction_frame(transactions)
+    account_ids = frame.account_ids
+    n_nodes = len(account_ids)
+
+    # Number nodes in account ID order so adjacency rows come out sorted
+    order = np.argsort(np.array(account_ids, dtype=str), kind='stable')
+    node_of_account = np.empty(n_nodes, dtype=np.int32)
+    node_of_account[order] = np.arange(n_nodes, dtype=np.int32)
+    node_ids = [account_ids[i] for i in order.tolist()]
+
+    # Group rows by (sender, receiver) pair, by time within a pair
+    pair_keys = (
+        node_of_account[frame.sender].astype(np.int64) * max(n_nodes, 1)
+        + node_of_account[frame.receiver]
+    )
+    edge_rows = np.lexsort((frame.timestamp, pair_keys))
+    sorted_keys = pair_keys[edge_rows]
+    boundary = np.ones(len(sorted_keys), dtype=bool)
+    boundary[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    starts = np.flatnonzero(boundary)
+    edge_row_offsets = np.append(starts, len(edge_rows)).astype(np.int64)
+    edges = sorted_keys[starts]
+
+    timestamps = frame.timestamp[edge_rows]
+    return TransactionGraph.from_edges(
+        frame,
+        node_ids,
+        node_of_account,
+        edges // max(n_nodes, 1),
+        edges % max(n_nodes, 1),
+        edge_count=np.diff(edge_row_offsets),
+        edge_amount=(
+            np.add.reduceat(frame.amount[edge_rows], starts) if len(starts)
+            else np.zeros(0, dtype=np.float64)
+        ),
+        edge_first_timestamp=timestamps[starts],
+        edge_last_timestamp=timestamps[edge_row_offsets[1:] - 1],
+        edge_row_offsets=edge_row_offsets,
+        edge_rows=edge_rows
+    )
@@ -0,0 +1,232 @@
+"""Shared-memory snapshot of a detection run's arrays, for worker processes."""
+import atexit
+import sys
+import threading
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterable, Optional
+
+import numpy as np
+
+from backend.models.frame import StringColumn, TransactionFrame
+from backend.models.graph import TransactionGraph
+from backend.services.activity_index import AccountActivityIndex
+
+# Array starts are aligned to this many bytes within the block
+ALIGNMENT = 64
+
+_FRAME_ARRAYS = ('sender', 'receiver', 'timestamp', 'amount')
+_GRAPH_ARRAYS = TransactionGraph.__slots__[2:]
+_ACTIVITY_ARRAYS = AccountActivityIndex.__slots__[1:]
+
+# Whether _open_block may rely on the resource tracker's private _fd (set
+# once this process talks to a tracker, including one inherited from the
+# owner). Checked against CPython 3.9.18, 3.10.13, 3.11.7 and 3.12.1: pool
+# workers (fork and spawn) and an independent process attach without
+# unlinking the block or a leaked-segment warning. 3.13 added track=False
+_TRACKER_FD_CHECKED = sys.implementation.name == 'cpython' and (3, 9) <= sys.version_info < (3, 13)
+
+# Snapshot attached last in this process; a worker serves one run at a time
+_attached: dict[str, 'GraphSnapshot'] = {}
+_attach_lock = threading.Lock()
+
+
+class GraphSnapshot:
+    """
+    A TransactionGraph, its frame and (optionally) the activity index, with
+    every array copied once into a single shared-memory block.
+
+    Pickling a snapshot sends only the block name and the array layout. In
+    the receiving process it attaches to the block and rebuilds the
+    objects as read-only NumPy views of it, so worker processes share one
+    copy of the arrays instead of unpickling their own. There, node_ids,
+    account_ids and transaction IDs are StringColumns, indexable like the
+    lists they replace.
+
+    The creating process owns the block: close() (or leaving the with
+    block) unlinks it, and if that process dies first, its
+    multiprocessing resource tracker unlinks it. Attached copies never
+    unlink it; they are released when their process exits.
+
+    Usage:
+        with GraphSnapshot.create(G, activity) as snapshot:
+            executor.submit(worker, snapshot)  # worker reads snapshot.graph
+    """
+
+    __slots__ = ('name', 'graph', 'frame', 'activity', '_block', '_layout', '_owner')
+
+    def __init__(self, block: SharedMemory, layout: dict[str, tuple[str, int, int]], owner: bool) -> None:
+        self.name = block.name
+        self._block = block
+        self._layout = layout
+        self._owner = owner
+
+        def view(key: str) -> np.ndarray:
+            dtype, offset, length = layout[key]
+            array = np.frombuffer(block.buf, dtype=dtype, count=length, offset=offset)
+            array.setflags(write=False)
+            return array
+
+        def strings(key: str) -> StringColumn:
+            return StringColumn(view(f'{key}.data'), view(f'{key}.offsets'))
+
+        self.frame: Optional[TransactionFrame] = None
+        if 'frame.sender' in layout:
+            self.frame = TransactionFrame(
+                strings('frame.account_ids'),
+                *(view(f'frame.{name}') for name in _FRAME_ARRAYS),
+                strings('frame.transaction_ids')
+            )
+        self.graph = TransactionGraph(
+            self.frame,
+            strings('graph.node_ids'),
+            **{name: view(f'graph.{name}') for name in _GRAPH_ARRAYS}
+        )
+        self.activity: Optional[AccountActivityIndex] = None
+        if 'activity.in_rows' in layout:
+            self.activity = AccountActivityIndex(
+                self.frame, **{name: view(f'activity.{name}') for name in _ACTIVITY_ARRAYS}
+            )
+
+    @classmethod
+    def create(
+        cls,
+        graph: TransactionGraph,
+        activity: Optional[AccountActivityIndex] = None
+    ) -> 'GraphSnapshot':
+        """
+        Copy graph, graph.frame (if any) and activity into a new block.
+
+        Args:
+            graph: Graph to share
+            activity: Activity index of graph.frame to share as well
+
+        Returns:
+            The owning snapshot, whose objects are views of the block
+
+        Raises:
+            ValueError: If activity does not index graph.frame
+
+        Complexity: O(total array size), one copy
+        """
+        if activity is not None and (graph.frame is None or activity.frame is not graph.frame):
+            raise ValueError("activity must index the graph's frame")
+
+        arrays: dict[str, np.ndarray] = {}
+
+        def add_strings(key: str, values: Iterable[str]) -> None:
+            if isinstance(values, StringColumn):
+                data, offsets = values.data, values.offsets
+            else:
+                encoded = [value.encode('utf-8') for value in values]
+                offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+                np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+                data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+            arrays[f'{key}.data'] = data
+            arrays[f'{key}.offsets'] = offsets
+
+        frame = graph.frame
+        if frame is not None:
+            add_strings('frame.account_ids', frame.account_ids)
+            for name in _FRAME_ARRAYS:
+                arrays[f'frame.{name}'] = getattr(frame, name)
+            add_strings('frame.transaction_ids', frame.transaction_ids)
+        add_strings('graph.node_ids', graph.node_ids)
+        for name in _GRAPH_ARRAYS:
+            arrays[f'graph.{name}'] = getattr(graph, name)
+        if activity is not None:
+            for name in _ACTIVITY_ARRAYS:
+                arrays[f'activity.{name}'] = getattr(activity, name)
+
+        layout: dict[str, tuple[str, int, int]] = {}
+        size = 0
+        for key, array in arrays.items():
+            layout[key] = (array.dtype.str, size, len(array))
+            size += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+        block = SharedMemory(create=True, size=max(size, 1))
+        try:
+            for key, array in arrays.items():
+                dtype, offset, length = layout[key]
+                np.frombuffer(block.buf, dtype=dtype, count=length, offset=offset)[:] = array
+            return cls(block, layout, owner=True)
+        except BaseException:
+            block.close()
+            block.unlink()
+            raise
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the shared block."""
+        return self._block.size
+
+    def close(self) -> None:
+        """Drop this process's views; the owner also unlinks the block."""
+        self.graph = self.frame = self.activity = None
+        try:
+            self._block.close()
+        except BufferError:
+            pass  # views handed out are still alive; the mapping goes with them
+        if self._owner:
+            self._owner = False
+            try:
+                self._block.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self) -> 'GraphSnapshot':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __reduce__(self):
+        return _attach, (self.name, self._layout)
+
+
+def _attach(name: str, layout: dict[str, tuple[str, int, int]]) -> GraphSnapshot:
+    """Unpickle a snapshot: attach to its block, once per process."""
+    with _attach_lock:
+        snapshot = _attached.get(name)
+        if snapshot is None:
+            for previous in _attached.values():
+                previous.close()
+            _attached.clear()
+            snapshot = _attached[name] = GraphSnapshot(_open_block(name), layout, owner=False)
+        return snapshot
+
+
+def _close_attached() -> None:
+    """Release attached blocks at exit, before interpreter shutdown tears down their views."""
+    with _attach_lock:
+        for snapshot in _attached.values():
+            snapshot.close()
+        _attached.clear()
+
+
+atexit.register(_close_attached)
+
+
+def _open_block(name: str) -> SharedMemory:
+    """
+    Attach to an existing block without tracking it.
+
+    Before Python 3.13 attaching registers the block with this process's
+    resource tracker as well, which would unlink it when this process
+    exits; only the owner may do that. Worker processes share the owner's
+    tracker (its descriptor is inherited), which holds one entry per block,
+    so there the registration is a no-op and must not be undone: that
+    would drop the owner's. A process with a tracker of its own started by
+    the attach unregisters the block again. Where the tracker's internals
+    were not checked (_TRACKER_FD_CHECKED), the registration is kept, which
+    is right for worker processes, the snapshot's only users.
+    """
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name, track=False)
+    if not _TRACKER_FD_CHECKED:
+        return SharedMemory(name)
+    shared_tracker = resource_tracker._resource_tracker._fd is not None
+    block = SharedMemory(name)
+    if not shared_tracker:
+        resource_tracker.unregister(block._name, 'shared_memory')
+    return block
@@ -0,0 +1,220 @@
+"""Detection jobs run in a process pool, off the API's event loop."""
+import os
+import threading
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Optional
+
+from backend.models.frame import TransactionFrame
+from backend.models.job import JobInfo
+
+
+class DetectionJob:
+    """One submitted detection and the future that will hold its result."""
+
+    __slots__ = ('job_id', 'future', 'submitted_at', 'finished_at', 'cancelled')
+
+    def __init__(self, job_id: str, future: Future) -> None:
+        self.job_id = job_id
+        self.future = future
+        self.submitted_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self.cancelled = False
+
+    @property
+    def status(self) -> str:
+        future = self.future
+        if self.cancelled or future.cancelled():
+            return 'cancelled'
+        if future.done():
+            return 'failed' if future.exception() is not None else 'completed'
+        return 'running' if future.running() else 'queued'
+
+    def info(self) -> JobInfo:
+        status = self.status
+        return JobInfo(
+            job_id=self.job_id,
+            status=status,
+            submitted_at=self.submitted_at,
+            finished_at=self.finished_at,
+            result=self.future.result() if status == 'completed' else None,
+            error=str(self.future.exception()) if status == 'failed' else None
+        )
+
+
+class JobManager:
+    """
+    Runs run_detection in worker processes and tracks the jobs.
+
+    At most max_workers detections run at once. Further jobs wait in the
+    manager's own queue and are handed to the pool only when a worker is
+    free, so 'queued' and 'running' are reported accurately and a queued job
+    can always be cancelled. Each job gets a share of the cores for its own
+    parallel cycle search (and parallel detectors): the cores divided by the
+    jobs that will be running once it starts, so a lone job gets them all
+    and a full pool does not oversubscribe the machine. A share is fixed
+    when the job starts, so jobs started while the pool was quiet keep
+    their larger share when others follow. Finished jobs are kept until history_limit newer ones have
+    finished. Outcomes are recorded under the manager's lock but the job
+    futures are resolved after it is released, so done callbacks (such as
+    storing the result in the cache) never hold up get() or submit().
+
+    A running job cannot be interrupted without killing its worker (and
+    with it the pool), so cancelling it marks it cancelled, lets it run to
+    completion and discards its result.
+    """
+
+    def __init__(self, max_workers: int, history_limit: int = 100) -> None:
+        self.max_workers = max_workers
+        self.history_limit = history_limit
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._jobs: OrderedDict[str, DetectionJob] = OrderedDict()
+        self._queue: deque[tuple[DetectionJob, TransactionFrame, bool]] = deque()
+        self._running = 0
+        self._lock = threading.RLock()
+
+    def submit(self, transactions: TransactionFrame, profile: bool = False) -> DetectionJob:
+        """
+        Queue a detection over transactions and return its job.
+
+        With profile, the detection runs under the profiler (see
+        profile_detection) and the result gets a 'profile' report.
+        """
+        job = DetectionJob(uuid.uuid4().hex, Future())
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._queue.append((job, transactions, profile))
+            outcomes = self._dispatch()
+        _resolve(outcomes)
+        return job
+
+    def add_completed(self, result: dict) -> DetectionJob:
+        """Record a job whose result is already known (e.g. from the result cache)."""
+        job = DetectionJob(uuid.uuid4().hex, Future())
+        job.future.set_running_or_notify_cancel()
+        with self._lock:
+            self._jobs[job.job_id] = job
+            outcome = self._complete(job, result=result)
+        _resolve([outcome])
+        return job
+
+    def get(self, job_id: str) -> Optional[DetectionJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[DetectionJob]:
+        """Cancel a job that has not finished; returns None if unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.finished_at is None:
+                job.cancelled = True
+                if job.future.cancel():
+                    # Still queued: it is skipped when its turn comes
+                    job.finished_at = datetime.now()
+                    self._evict()
+            return job
+
+    def shutdown(self) -> None:
+        """Stop the worker processes and cancel queued jobs."""
+        with self._lock:
+            for job, _, _ in self._queue:
+                if job.future.cancel():
+                    job.finished_at = datetime.now()
+            self._queue.clear()
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _dispatch(self) -> list[tuple]:
+        """
+        Start queued jobs while workers are free (lock held).
+
+        Returns the outcomes of jobs that could not be started, to be
+        resolved once the lock is released.
+        """
+        outcomes = []
+        while self._queue and self._running < self.max_workers:
+            job, transactions, profile = self._queue.popleft()
+            if not job.future.set_running_or_notify_cancel():
+                continue  # cancelled while queued
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            # Jobs running alongside this one: those already running and the
+            # queued ones that start with it
+            concurrent = min(self.max_workers, self._running + 1 + len(self._queue))
+            cycle_workers = max(1, (os.cpu_count() or 1) // concurrent)
+            try:
+                task = self._executor.submit(_run_detection_job, transactions, cycle_workers, profile)
+            except BrokenProcessPool as e:
+                # A worker died (e.g. killed for memory); the next job gets a fresh pool
+                self._executor = None
+                outcomes.append(self._complete(job, exception=e))
+                continue
+            self._running += 1
+            task.add_done_callback(lambda task, job=job: self._task_done(job, task))
+        return outcomes
+
+    def _task_done(self, job: DetectionJob, task: Future) -> None:
+        with self._lock:
+            self._running -= 1
+            exception = task.exception()
+            if isinstance(exception, BrokenProcessPool):
+                self._executor = None
+            if exception is not None:
+                outcomes = [self._complete(job, exception=exception)]
+            else:
+                outcomes = [self._complete(job, result=task.result())]
+            outcomes.extend(self._dispatch())
+        _resolve(outcomes)
+
+    def _complete(self, job: DetectionJob, result: Optional[dict] = None,
+                  exception: Optional[BaseException] = None) -> tuple:
+        """
+        Record a job's outcome (lock held) and return it for _resolve.
+
+        The job counts as finished from here on, though its future is only
+        resolved once the lock is released.
+        """
+        job.finished_at = datetime.now()
+        # A job cancelled while running keeps no result
+        outcome = (job, None if job.cancelled else result, exception)
+        self._evict()
+        return outcome
+
+    def _evict(self) -> None:
+        """Drop the oldest finished jobs beyond history_limit (lock held)."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None]
+        for job_id in finished[:max(0, len(finished) - self.history_limit)]:
+            del self._jobs[job_id]
+
+
+def _resolve(outcomes: list[tuple]) -> None:
+    """Resolve the futures of (job, result, exception) outcomes; call without the lock."""
+    for job, result, exception in outcomes:
+        if exception is not None:
+            job.future.set_exception(exception)
+        else:
+            job.future.set_result(result)
+
+
+def _run_detection_job(transactions: TransactionFrame, cycle_workers: int, profile: bool = False) -> dict:
+    """
+    Run one detection (in a worker process) and return the result as a dict,
+    with its stage diagnostics under 'diagnostics' and, if profiled, the
+    profile report under 'profile'.
+    """
+    if profile:
+        from backend import config
+        from backend.services.profiling import profile_detection
+
+        output, diagnostics, report = profile_detection(transactions, artifact_dir=config.PROFILE_DIR)
+        return {**output, 'diagnostics': diagnostics.model_dump(), 'profile': report.model_dump()}
+
+    from backend.services.detection_engine import run_detection_output
+
+    output, diagnostics = run_detection_output(transactions, cycle_workers=cycle_workers)
+    return {**output, 'diagnostics': diagnostics.model_dump()}
+
@@ -1,24 +1,60 @@
 """JSON output formatter with exact schema matching."""
-from typing import TYPE_CHECKING
-from collections import defaultdict
+import json
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # optional: the standard library encoder gives the same bytes, slower
+    orjson = None
 
 if TYPE_CHECKING:
+    from backend.models.frame import TransactionFrame
     from backend.models.transaction import Transaction, DetectionResult
-    from networkx import DiGraph
+    from backend.services.pattern_registry import PatternRegistry
+
+# NDJSON lines encoded per chunk of a streamed response
+NDJSON_CHUNK_LINES = 1000
 
 
 def format_detection_result(
-    G: 'DiGraph',
-    transactions: list['Transaction'],
+    account_ids: Iterable[str],
+    transactions: Union[list['Transaction'], 'TransactionFrame'],
     cycle_accounts: dict[str, list[list[str]]],
     smurfing_accounts: dict[str, dict],
     shell_accounts: dict[str, list[list[str]]],
     suspicion_scores: dict[str, float],
     account_ring_map: dict[str, str],
-    processing_time: float
+    processing_time: float,
+    patterns: Optional['PatternRegistry'] = None
 ) -> 'DetectionResult':
     """
-    Format detection results into exact JSON schema.
+    Format detection results as a DetectionResult.
+    
+    Same arguments as build_detection_output; prefer that function when the
+    result is only going to be serialized, since it creates no per-account
+    objects.
+    """
+    from backend.models.transaction import DetectionResult
+    
+    return DetectionResult.model_validate(build_detection_output(
+        account_ids, transactions, cycle_accounts, smurfing_accounts,
+        shell_accounts, suspicion_scores, account_ring_map, processing_time, patterns
+    ))
+
+
+def build_detection_output(
+    account_ids: Iterable[str],
+    transactions: Union[list['Transaction'], 'TransactionFrame'],
+    cycle_accounts: dict[str, list[list[str]]],
+    smurfing_accounts: dict[str, dict],
+    shell_accounts: dict[str, list[list[str]]],
+    suspicion_scores: dict[str, float],
+    account_ring_map: dict[str, str],
+    processing_time: float,
+    patterns: Optional['PatternRegistry'] = None
+) -> dict:
+    """
+    Format detection results into exact JSON schema, as plain lists and dicts.
     
     Schema:
     {
@@ -47,134 +83,121 @@ def format_detection_result(
     }
     
     Args:
-        G: Transaction graph
-        transactions: Original transaction list
+        account_ids: Every account analyzed (e.g. the graph's node_ids)
+        transactions: TransactionFrame (or Transaction list)
         cycle_accounts: Cycle detection results
         smurfing_accounts: Smurfing detection results
         shell_accounts: Shell detection results
         suspicion_scores: Account suspicion scores
         account_ring_map: Account to ring mapping
         processing_time: Processing time in seconds
+        patterns: The detector outputs as a PatternRegistry, read instead of
+            cycle_accounts, smurfing_accounts and shell_accounts when given
         
     Returns:
-        DetectionResult object matching schema
+        Dict matching schema (DetectionResult.model_dump() of the same result)
     """
-    from backend.models.transaction import (
-        SuspiciousAccount, FraudRing, DetectionSummary, DetectionResult
-    )
-    
     # Collect all unique accounts
-    all_accounts = set(G.nodes())
+    all_accounts = set(account_ids)
     total_accounts = len(all_accounts)
     
-    # Build account patterns map
-    account_patterns: dict[str, list[str]] = defaultdict(list)
-    
-    # Add cycle patterns
-    for ring_id, cycles in cycle_accounts.items():
-        for cycle in cycles:
-            pattern_label = f"cycle_length_{len(cycle)}"
-            for account_id in cycle:
-                if pattern_label not in account_patterns[account_id]:
-                    account_patterns[account_id].append(pattern_label)
-    
-    # Add smurfing patterns
-    for account_id, info in smurfing_accounts.items():
-        pattern_label = info['pattern_label']
-        if pattern_label not in account_patterns[account_id]:
-            account_patterns[account_id].append(pattern_label)
+    if patterns is None:
+        from backend.services.pattern_registry import build_pattern_registry
+        patterns = build_pattern_registry(cycle_accounts, smurfing_accounts, shell_accounts)
+    account_patterns = patterns.account_patterns
     
-    # Add shell patterns
-    for ring_id, chains in shell_accounts.items():
-        for chain in chains:
-            pattern_label = f"layered_shell_{len(chain)}hop"
-            for account_id in chain:
-                if pattern_label not in account_patterns[account_id]:
-                    account_patterns[account_id].append(pattern_label)
-    
-    # Build suspicious accounts list (only accounts with score > 0)
+    # Build suspicious accounts list (only accounts with score > 0); the
+    # scored accounts are usually far fewer than the accounts analyzed
     suspicious_accounts_list = []
-    for account_id in all_accounts:
-        score = suspicion_scores.get(account_id, 0.0)
-        if score > 0:
-            patterns = account_patterns.get(account_id, [])
-            ring_id = account_ring_map.get(account_id)
-            
-            # ensure consistent pattern order
-            patterns_sorted = sorted(patterns)
-            suspicious_accounts_list.append(
-                SuspiciousAccount(
-                    account_id=account_id,
-                    suspicion_score=round(score, 1),
-                    detected_patterns=patterns_sorted,
-                    ring_id=ring_id
-                )
-            )
+    for account_id, score in suspicion_scores.items():
+        if score > 0 and account_id in all_accounts:
+            suspicious_accounts_list.append({
+                'account_id': account_id,
+                'suspicion_score': round(score, 1),
+                # sorted, for a consistent pattern order
+                'detected_patterns': patterns.mask_labels(account_patterns.get(account_id, 0)),
+                'ring_id': account_ring_map.get(account_id)
+            })
     
     # Sort by suspicion_score descending, then account_id ascending for determinism
-    suspicious_accounts_list.sort(key=lambda x: (-x.suspicion_score, x.account_id))
+    suspicious_accounts_list.sort(key=lambda x: (-x['suspicion_score'], x['account_id']))
     
     # Build fraud rings
     fraud_rings_list = []
     
-    # Collect all unique ring IDs
-    all_ring_ids = set()
-    all_ring_ids.update(cycle_accounts.keys())
-    all_ring_ids.update(shell_accounts.keys())
-    
-    # Build ring member sets
-    ring_members: dict[str, set[str]] = defaultdict(set)
-    
-    # Add cycle ring members
-    for ring_id, cycles in cycle_accounts.items():
-        for cycle in cycles:
-            for account_id in cycle:
-                ring_members[ring_id].add(account_id)
-    
-    # Add shell ring members
-    for ring_id, chains in shell_accounts.items():
-        for chain in chains:
-            for account_id in chain:
-                ring_members[ring_id].add(account_id)
-    
-    # Create fraud ring objects
-    for ring_id in all_ring_ids:
-        members = sorted(list(ring_members[ring_id]))
-        
-        # Determine pattern type
-        if ring_id in cycle_accounts:
-            pattern_type = "cycle"
-        elif ring_id in shell_accounts:
-            pattern_type = "shell"
-        else:
-            pattern_type = "unknown"
+    for ring_id, (pattern_type, ring_members) in patterns.rings.items():
+        members = sorted(ring_members)
         
         # Calculate risk score (average of member suspicion scores)
         member_scores = [suspicion_scores.get(m, 0.0) for m in members]
         risk_score = sum(member_scores) / len(member_scores) if member_scores else 0.0
         
-        fraud_rings_list.append(
-            FraudRing(
-                ring_id=ring_id,
-                member_accounts=members,
-                pattern_type=pattern_type,
-                risk_score=round(risk_score, 1)
-            )
-        )
+        fraud_rings_list.append({
+            'ring_id': ring_id,
+            'member_accounts': members,
+            'pattern_type': pattern_type,
+            'risk_score': round(risk_score, 1)
+        })
     
     # Sort fraud rings by risk_score descending, then ring_id ascending
-    fraud_rings_list.sort(key=lambda x: (-x.risk_score, x.ring_id))
+    fraud_rings_list.sort(key=lambda x: (-x['risk_score'], x['ring_id']))
     
     # Build summary
-    summary = DetectionSummary(
-        total_accounts_analyzed=total_accounts,
-        suspicious_accounts_flagged=len(suspicious_accounts_list),
-        fraud_rings_detected=len(fraud_rings_list),
-        processing_time_seconds=round(processing_time, 2)
-    )
+    summary = {
+        'total_accounts_analyzed': total_accounts,
+        'suspicious_accounts_flagged': len(suspicious_accounts_list),
+        'fraud_rings_detected': len(fraud_rings_list),
+        'processing_time_seconds': round(processing_time, 2)
+    }
+    
+    return {
+        'suspicious_accounts': suspicious_accounts_list,
+        'fraud_rings': fraud_rings_list,
+        'summary': summary
+    }
+
+
+def encode_json(content: Any) -> bytes:
+    """
+    Encode plain lists and dicts as compact UTF-8 JSON, the same bytes
+    FastAPI's JSONResponse renders; uses orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(',', ':')
+    ).encode('utf-8')
+
+
+def decode_json(payload: bytes) -> Any:
+    """Inverse of encode_json."""
+    return orjson.loads(payload) if orjson is not None else json.loads(payload)
+
+
+def iter_ndjson(output: dict, chunk_lines: int = NDJSON_CHUNK_LINES) -> Iterator[bytes]:
+    """
+    Encode a detection output as NDJSON, chunk_lines lines at a time.
     
-    return DetectionResult(
-        suspicious_accounts=suspicious_accounts_list,
-        fraud_rings=fraud_rings_list,
-        summary=summary
-    )
+    Every line is an object with a "type": first the summary, then one line
+    per suspicious account and per fraud ring, in output order, and then
+    any further top-level block (e.g. diagnostics) as a line of its own.
+    The body is never held in memory as a whole.
+    
+    Args:
+        output: Dict with the DetectionResult schema (see build_detection_output)
+        chunk_lines: Lines per yielded chunk
+        
+    Yields:
+        Chunks of newline-terminated JSON lines
+    """
+    yield encode_json({'type': 'summary', **output['summary']}) + b'\n'
+    for key, line_type in (('suspicious_accounts', 'suspicious_account'), ('fraud_rings', 'fraud_ring')):
+        items = output[key]
+        for start in range(0, len(items), chunk_lines):
+            yield b''.join(
+                encode_json({'type': line_type, **item}) + b'\n'
+                for item in items[start:start + chunk_lines]
+            )
+    for key, block in output.items():
+        if key not in ('summary', 'suspicious_accounts', 'fraud_rings'):
+            yield encode_json({'type': key, **block}) + b'\n'
@@ -0,0 +1,159 @@
+"""Registry of the patterns found by the detectors, shared by scoring and formatting."""
+from typing import Callable, Iterator, Optional
+
+from backend.services.cycle_detection import get_cycle_pattern_label
+from backend.services.shell_detection import get_shell_pattern_label
+from backend.services.scoring import pattern_score
+
+
+class PatternRegistry:
+    """
+    Detector patterns of one run, collected in a single pass.
+
+    Every distinct pattern label is interned as a small integer id with its
+    metadata (detector kind, size such as cycle length or chain hops, and
+    score weight). An account's patterns are a bitset of those ids held in
+    an int, so registering a pattern is O(1) and duplicates cost nothing.
+    Rings keep their pattern type and member set.
+
+    Scoring sums the weights of an account's patterns and formatting reads
+    their labels; neither walks the detector outputs again nor parses
+    labels. A new detector only has to register its patterns here.
+    """
+    __slots__ = (
+        'labels', 'kinds', 'sizes', 'scores', 'account_patterns', 'rings',
+        '_ids', '_mask_scores', '_mask_labels'
+    )
+
+    def __init__(self) -> None:
+        # Pattern metadata, indexed by pattern id
+        self.labels: list[str] = []
+        self.kinds: list[str] = []
+        self.sizes: list[Optional[int]] = []
+        self.scores: list[float] = []
+        # account_id -> bitset of pattern ids
+        self.account_patterns: dict[str, int] = {}
+        # ring_id -> (pattern_type, member accounts)
+        self.rings: dict[str, tuple[str, set[str]]] = {}
+        self._ids: dict[str, int] = {}
+        # Accounts share few distinct bitsets, so their scores and labels are cached
+        self._mask_scores: dict[int, float] = {}
+        self._mask_labels: dict[int, list[str]] = {}
+
+    def pattern_id(self, label: str, kind: str, size: Optional[int] = None, score: float = 0.0) -> int:
+        """Id of label, registered with the given metadata on first use."""
+        pattern_id = self._ids.get(label)
+        if pattern_id is None:
+            pattern_id = self._ids[label] = len(self.labels)
+            self.labels.append(label)
+            self.kinds.append(kind)
+            self.sizes.append(size)
+            self.scores.append(score)
+        return pattern_id
+
+    def add_account(self, account_id: str, pattern_id: int) -> None:
+        """Record that account_id shows the pattern."""
+        self.account_patterns[account_id] = self.account_patterns.get(account_id, 0) | (1 << pattern_id)
+
+    def add_rings(
+        self,
+        rings: dict[str, list[list[str]]],
+        kind: str,
+        label: Callable[[int], str],
+        score: Callable[[int], float]
+    ) -> None:
+        """
+        Register ring-shaped detector output.
+
+        A ring already registered keeps its pattern type and gains the new
+        members, so the detector registered first takes priority.
+
+        Args:
+            rings: ring_id -> account groups (cycles, chains)
+            kind: Detector kind, also the pattern_type of new rings
+            label: Pattern label of a group of the given size
+            score: Score weight of a group of the given size
+
+        Complexity: O(total group size)
+        """
+        account_patterns = self.account_patterns
+        bits: dict[int, int] = {}
+        for ring_id, groups in rings.items():
+            members = self.rings.setdefault(ring_id, (kind, set()))[1]
+            for group in groups:
+                size = len(group)
+                bit = bits.get(size)
+                if bit is None:
+                    bit = bits[size] = 1 << self.pattern_id(label(size), kind, size, score(size))
+                for account_id in group:
+                    account_patterns[account_id] = account_patterns.get(account_id, 0) | bit
+                members.update(group)
+
+    def mask_score(self, mask: int) -> float:
+        """Sum of the score weights of the patterns in mask."""
+        score = self._mask_scores.get(mask)
+        if score is None:
+            score = 0.0
+            for pattern_id in _bits(mask):
+                score += self.scores[pattern_id]
+            self._mask_scores[mask] = score
+        return score
+
+    def mask_labels(self, mask: int) -> list[str]:
+        """Sorted labels of the patterns in mask, as a new list."""
+        labels = self._mask_labels.get(mask)
+        if labels is None:
+            labels = self._mask_labels[mask] = sorted(self.labels[pattern_id] for pattern_id in _bits(mask))
+        return list(labels)
+
+
+def _bits(mask: int) -> Iterator[int]:
+    """Positions of the set bits of mask, lowest first."""
+    position = 0
+    while mask:
+        if mask & 1:
+            yield position
+        mask >>= 1
+        position += 1
+
+
+def build_pattern_registry(
+    cycle_accounts: dict[str, list[list[str]]],
+    smurfing_accounts: dict[str, dict],
+    shell_accounts: dict[str, list[list[str]]]
+) -> PatternRegistry:
+    """
+    Register the output of the built-in detectors.
+
+    Cycles are registered before shells, so a ring ID present in both is a
+    cycle ring (as assign_rings numbers them, this does not happen).
+
+    Args:
+        cycle_accounts: Cycle detection results (ring_id -> cycles)
+        smurfing_accounts: Smurfing detection results
+        shell_accounts: Shell detection results (ring_id -> chains)
+
+    Returns:
+        PatternRegistry with score weights from scoring.pattern_score
+
+    Complexity: O(total size of the detector outputs)
+    """
+    registry = PatternRegistry()
+    registry.add_rings(
+        cycle_accounts, 'cycle', get_cycle_pattern_label, lambda length: pattern_score('cycle', length)
+    )
+
+    smurfing_ids: dict[str, int] = {}
+    for account_id, info in smurfing_accounts.items():
+        label = info.get('pattern_label', 'smurfing')
+        pattern_id = smurfing_ids.get(label)
+        if pattern_id is None:
+            pattern_id = smurfing_ids[label] = registry.pattern_id(
+                label, 'smurfing', score=pattern_score('smurfing', label=label)
+            )
+        registry.add_account(account_id, pattern_id)
+
+    registry.add_rings(
+        shell_accounts, 'shell', get_shell_pattern_label, lambda length: pattern_score('shell', length)
+    )
+    return registry
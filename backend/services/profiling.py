@@ -0,0 +1,141 @@
+"""CPU and memory profiling of a single detection run."""
+import cProfile
+import pstats
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from backend.models.frame import TransactionFrame
+from backend.models.profile import AllocationSite, FunctionProfile, ProfileReport
+from backend.services.detection_engine import run_detection_output
+
+if TYPE_CHECKING:
+    from backend.models.transaction import DetectionDiagnostics
+
+# Profile artifacts kept in the artifact directory; the oldest are deleted first
+ARTIFACT_LIMIT = 20
+
+# Allocations of the profiler and tracer themselves are left out of the report
+_TRACE_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, cProfile.__file__),
+    tracemalloc.Filter(False, __file__),
+)
+_UNREPORTED_FILES = (tracemalloc.__file__, __file__)
+
+
+def profile_detection(
+    transactions: TransactionFrame,
+    top: int = 25,
+    artifact_dir: Optional[Path] = None
+) -> tuple[dict, 'DetectionDiagnostics', ProfileReport]:
+    """
+    Run run_detection_output under cProfile and tracemalloc.
+
+    The cycle search and the other detectors run in-process
+    (cycle_workers=1, parallel_detectors=False) so the profile sees all of
+    the work. Memory is traced per stage: the report gives each stage's
+    peak, and the allocation sites are taken from a snapshot at the end of
+    the stage that held the most memory, while that stage's intermediate
+    data is still alive. Both tools slow the run down several times, so
+    timings are only meaningful relative to each other; the snapshots are
+    left out of the top functions but do count in the cumulative time of
+    run_detection_output.
+
+    Args:
+        transactions: Transactions to analyze
+        top: Functions and allocation sites to report
+        artifact_dir: If given, the cProfile statistics are saved there as
+            <profile_id>.prof (pstats format: python -m pstats, snakeviz)
+
+    Returns:
+        (output, diagnostics) as from run_detection_output, and the ProfileReport
+    """
+    profile_id = uuid.uuid4().hex
+    profiler = cProfile.Profile()
+    stage_peaks: dict[str, float] = {}
+    heaviest: list = [-1, None]  # traced bytes and snapshot of the heaviest stage end
+
+    def on_stage(stage: str) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        stage_peaks[stage] = peak / 1e6
+        if current > heaviest[0]:
+            heaviest[:] = [current, tracemalloc.take_snapshot()]
+        tracemalloc.reset_peak()
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        profiler.enable()
+        try:
+            output, diagnostics = run_detection_output(
+                transactions, cycle_workers=1, on_stage=on_stage, parallel_detectors=False
+            )
+        finally:
+            profiler.disable()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    wall_seconds = time.perf_counter() - start
+
+    stats = pstats.Stats(profiler)
+    functions = sorted(
+        (item for item in stats.stats.items() if item[0][0] not in _UNREPORTED_FILES),
+        key=lambda item: item[1][3], reverse=True
+    )
+    top_functions = [
+        FunctionProfile(
+            function=pstats.func_std_string(function),
+            calls=calls,
+            total_seconds=total,
+            cumulative_seconds=cumulative
+        )
+        for function, (_, calls, total, cumulative, _) in functions[:top]
+    ]
+
+    top_allocations = []
+    if heaviest[1] is not None:
+        for stat in heaviest[1].filter_traces(_TRACE_FILTERS).statistics('lineno')[:top]:
+            frame = stat.traceback[0]
+            top_allocations.append(AllocationSite(
+                site=f"{frame.filename}:{frame.lineno}",
+                size_kb=stat.size / 1024,
+                blocks=stat.count
+            ))
+
+    if artifact_dir is not None:
+        save_artifact(profiler, profile_id, artifact_dir)
+
+    return output, diagnostics, ProfileReport(
+        profile_id=profile_id,
+        wall_seconds=wall_seconds,
+        peak_memory_mb=max(stage_peaks.values(), default=0.0),
+        stage_peak_memory_mb=stage_peaks,
+        top_functions=top_functions,
+        top_allocations=top_allocations
+    )
+
+
+def save_artifact(profiler: cProfile.Profile, profile_id: str, artifact_dir: Path) -> Path:
+    """Write profiler stats to artifact_dir/<profile_id>.prof, keeping the newest ARTIFACT_LIMIT files."""
+    artifact_dir.mkdir(parents=True, exist_ok=True)
+    path = artifact_dir / f"{profile_id}.prof"
+    profiler.dump_stats(path)
+
+    artifacts = sorted(artifact_dir.glob('*.prof'), key=lambda p: p.stat().st_mtime)
+    for old in artifacts[:max(0, len(artifacts) - ARTIFACT_LIMIT)]:
+        old.unlink(missing_ok=True)
+    return path
+
+
+def artifact_path(profile_id: str, artifact_dir: Path) -> Optional[Path]:
+    """Saved artifact of profile_id, or None if unknown (or not a profile id)."""
+    if len(profile_id) != 32 or any(c not in '0123456789abcdef' for c in profile_id):
+        return None
+    path = artifact_dir / f"{profile_id}.prof"
+    return path if path.is_file() else None
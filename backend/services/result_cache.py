@@ -0,0 +1,214 @@
+"""Content-addressed cache of serialized detection results."""
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+# Bytes read per hashing step
+_HASH_CHUNK_BYTES = 1 << 20
+
+# Version of the detection output, part of every cache key. Bump it whenever
+# a change to the detectors, scoring or result schema can change the output
+# for the same upload, so results stored by an older version (including
+# on disk, across restarts) are not served.
+RESULT_FORMAT_VERSION = 1
+
+
+def cache_key(file: BinaryIO, parameters: dict) -> str:
+    """
+    SHA-256 over RESULT_FORMAT_VERSION, the detection parameters and the
+    uploaded bytes.
+
+    The file is read from its current position to the end and rewound to
+    where it started, so it can be parsed afterwards.
+    """
+    header = {'format_version': RESULT_FORMAT_VERSION, 'parameters': parameters}
+    digest = hashlib.sha256(json.dumps(header, sort_keys=True).encode('utf-8'))
+    start = file.tell()
+    for chunk in iter(lambda: file.read(_HASH_CHUNK_BYTES), b''):
+        digest.update(chunk)
+    file.seek(start)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier LRU cache of JSON-encoded DetectionResults keyed by cache_key.
+
+    The memory tier holds up to max_memory_bytes of payloads. The optional
+    disk tier (one <key>.json file per entry under disk_dir) holds up to
+    max_disk_bytes and survives restarts; a disk hit is promoted to memory
+    and its file's mtime refreshed. Payloads larger than a tier's limit are
+    not stored in it. Safe to use from several threads.
+
+    The disk tier's entries, sizes and LRU order are kept in memory, read
+    from the directory once at startup (oldest mtime first), so lookups
+    and eviction never scan it. The lock only guards that bookkeeping:
+    files are read, written (to a temporary file renamed into place) and
+    deleted outside it, so cache I/O does not hold up other requests.
+    """
+
+    def __init__(
+        self,
+        max_memory_bytes: int,
+        disk_dir: Optional[str] = None,
+        max_disk_bytes: int = 0
+    ) -> None:
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_bytes = 0
+        # key -> payload size of each disk entry, least recently used first
+        self._disk: OrderedDict[str, int] = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._hits = {'memory': 0, 'disk': 0}
+        self._misses = 0
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._load_disk_index()
+            self._unlink(self._evict_disk())
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the stored payload for key, or None on a miss."""
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+                self._hits['memory'] += 1
+                return payload
+            on_disk = key in self._disk
+            if on_disk:
+                self._disk.move_to_end(key)
+
+        if on_disk:
+            path = self._disk_path(key)
+            try:
+                payload = path.read_bytes()
+                os.utime(path)
+            except FileNotFoundError:
+                # Evicted (or deleted) since the lookup
+                payload = None
+            with self._lock:
+                if payload is not None:
+                    self._hits['disk'] += 1
+                    self._store_memory(key, payload)
+                    return payload
+                self._forget_disk(key)
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def put(self, key: str, payload: bytes) -> None:
+        """Store payload under key in both tiers."""
+        with self._lock:
+            self._store_memory(key, payload)
+        path = self._disk_path(key)
+        if path is None or len(payload) > self.max_disk_bytes:
+            return
+        tmp = path.with_name(f"{key}.{uuid.uuid4().hex}.tmp")
+        try:
+            tmp.write_bytes(payload)
+            os.replace(tmp, path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        with self._lock:
+            self._forget_disk(key)
+            self._disk[key] = len(payload)
+            self._disk_bytes += len(payload)
+            evicted = self._evict_disk()
+        self._unlink(evicted)
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers and reset the counters."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            evicted = [self._disk_path(key) for key in self._disk]
+            self._disk.clear()
+            self._disk_bytes = 0
+            self._hits = {'memory': 0, 'disk': 0}
+            self._misses = 0
+        self._unlink(evicted)
+
+    def stats(self) -> dict:
+        """Entry counts, sizes, limits and hit/miss counters per tier."""
+        with self._lock:
+            return {
+                'memory': {
+                    'entries': len(self._memory),
+                    'bytes': self._memory_bytes,
+                    'max_bytes': self.max_memory_bytes,
+                    'hits': self._hits['memory'],
+                },
+                'disk': {
+                    'enabled': self.disk_dir is not None,
+                    'entries': len(self._disk),
+                    'bytes': self._disk_bytes,
+                    'max_bytes': self.max_disk_bytes,
+                    'hits': self._hits['disk'],
+                },
+                'misses': self._misses,
+            }
+
+    def _store_memory(self, key: str, payload: bytes) -> None:
+        """Insert into the memory tier and evict least recently used (lock held)."""
+        if len(payload) > self.max_memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[key] = payload
+        self._memory_bytes += len(payload)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        return self.disk_dir / f"{key}.json" if self.disk_dir is not None else None
+
+    def _load_disk_index(self) -> None:
+        """Index the disk tier's files, oldest mtime first, and drop stale temporary files."""
+        entries = []
+        for path in self.disk_dir.iterdir():
+            try:
+                if path.suffix == '.tmp':
+                    path.unlink(missing_ok=True)
+                elif path.suffix == '.json':
+                    stat = path.stat()
+                    entries.append((stat.st_mtime, path.stem, stat.st_size))
+            except FileNotFoundError:
+                continue
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    def _forget_disk(self, key: str) -> None:
+        """Drop key from the disk index (lock held)."""
+        size = self._disk.pop(key, None)
+        if size is not None:
+            self._disk_bytes -= size
+
+    def _evict_disk(self) -> list[Path]:
+        """
+        Drop least recently used entries from the disk index until the tier
+        fits (lock held); returns their files, for _unlink once released.
+        """
+        evicted = []
+        while self._disk_bytes > self.max_disk_bytes:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            evicted.append(self._disk_path(key))
+        return evicted
+
+    @staticmethod
+    def _unlink(paths: list[Path]) -> None:
+        for path in paths:
+            path.unlink(missing_ok=True)
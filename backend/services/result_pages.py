@@ -0,0 +1,104 @@
+"""Cursor pagination over the ranked lists of a detection output."""
+import base64
+import json
+from typing import Optional
+
+# Paginated lists and their ranking fields: score descending, then ID ascending
+RANKED_LISTS = {
+    'suspicious_accounts': ('suspicion_score', 'account_id'),
+    'fraud_rings': ('risk_score', 'ring_id'),
+}
+
+
+def encode_cursor(score: float, item_id: str) -> str:
+    """Opaque cursor pointing just past the item with this score and ID."""
+    return base64.urlsafe_b64encode(json.dumps([score, item_id]).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> tuple[float, str]:
+    """
+    Inverse of encode_cursor.
+
+    Raises:
+        ValueError: If cursor was not made by encode_cursor
+    """
+    try:
+        score, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    if not isinstance(score, (int, float)) or not isinstance(item_id, str):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return float(score), item_id
+
+
+def paginate(
+    items: list[dict],
+    list_name: str,
+    limit: int,
+    cursor: Optional[str] = None
+) -> tuple[list[dict], Optional[str]]:
+    """
+    One page of a ranked list of the output.
+
+    The cursor holds the ranking key of the last item returned, so it
+    stays valid for any copy of the same result (e.g. the cached one) and
+    the page start is found by binary search.
+
+    Args:
+        items: suspicious_accounts or fraud_rings of an output, in output order
+        list_name: Key of items in the output (see RANKED_LISTS)
+        limit: Maximum items in the page (at least 1)
+        cursor: next_cursor of the previous page; None for the first page
+
+    Returns:
+        (page, next_cursor), next_cursor being None on the last page
+
+    Raises:
+        ValueError: If cursor is invalid
+
+    Complexity: O(log n + limit)
+    """
+    score_field, id_field = RANKED_LISTS[list_name]
+    start = 0
+    if cursor is not None:
+        score, item_id = decode_cursor(cursor)
+        after = (-score, item_id)
+        low, high = 0, len(items)
+        while low < high:
+            middle = (low + high) // 2
+            item = items[middle]
+            if (-item[score_field], item[id_field]) <= after:
+                low = middle + 1
+            else:
+                high = middle
+        start = low
+
+    page = items[start:start + limit]
+    if start + limit >= len(items):
+        return page, None
+    last = page[-1]
+    return page, encode_cursor(last[score_field], last[id_field])
+
+
+def paginate_output(output: dict, limit: int, cursors: dict[str, Optional[str]]) -> dict:
+    """
+    The output with each ranked list cut to one page, plus a "page" block
+    with the limit and each list's next cursor (None when it is done). The
+    summary still counts the whole result.
+
+    Args:
+        output: Dict with the DetectionResult schema
+        limit: Page size of every list
+        cursors: Cursor per list name (missing or None: first page)
+
+    Raises:
+        ValueError: If a cursor is invalid
+    """
+    paged = dict(output)
+    next_cursors = {}
+    for list_name in RANKED_LISTS:
+        paged[list_name], next_cursors[list_name] = paginate(
+            output[list_name], list_name, limit, cursors.get(list_name)
+        )
+    paged['page'] = {'limit': limit, 'next_cursors': next_cursors}
+    return paged
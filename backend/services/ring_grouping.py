@@ -0,0 +1,90 @@
+"""Ring grouping: merge detected patterns that share accounts into rings."""
+from collections import defaultdict
+from typing import Iterable
+
+
+class RingBuilder:
+    """
+    Disjoint-set (union-find) grouping of patterns into rings.
+
+    Detectors call add() for every pattern (cycle, chain) as they find it.
+    Patterns that share an account end up in the same ring, including when
+    a later pattern bridges two rings formed earlier, so the grouping does
+    not depend on the order patterns arrive in.
+
+    Complexity: O(p * α(n)) for p pattern memberships (union by size with
+    path compression), plus O(k log k) to sort k patterns in build().
+    """
+
+    def __init__(self) -> None:
+        self._parent: dict[str, str] = {}
+        self._size: dict[str, int] = {}
+        self._patterns: list[list[str]] = []
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def add(self, pattern: list[str]) -> None:
+        """Record one pattern and union all of its accounts."""
+        if not pattern:
+            return
+        self._patterns.append(pattern)
+        root = self._find(pattern[0])
+        for node in pattern[1:]:
+            root = self._union(root, self._find(node))
+
+    def update(self, patterns: Iterable[list[str]]) -> None:
+        """Record several patterns."""
+        for pattern in patterns:
+            self.add(pattern)
+
+    def build(self, start: int = 1) -> dict[str, list[list[str]]]:
+        """
+        Assign RING_xxx ids to the merged groups.
+
+        Patterns inside a ring are sorted, and rings are numbered in order of
+        their smallest pattern, so ids are stable for a given set of patterns.
+
+        Args:
+            start: Number of the first ring (default: 1)
+
+        Returns:
+            Dictionary mapping ring_id to list of patterns
+        """
+        groups: dict[str, list[list[str]]] = defaultdict(list)
+        for pattern in self._patterns:
+            groups[self._find(pattern[0])].append(pattern)
+
+        for patterns in groups.values():
+            patterns.sort()
+        rings = sorted(groups.values(), key=lambda patterns: patterns[0])
+
+        ring_map: dict[str, list[list[str]]] = {}
+        for ring_number, patterns in enumerate(rings, start=start):
+            ring_map[f"RING_{ring_number:03d}"] = patterns
+        return ring_map
+
+    def _find(self, node: str) -> str:
+        """Return the root of node's set, compressing the path behind it."""
+        parent = self._parent
+        if node not in parent:
+            parent[node] = node
+            self._size[node] = 1
+            return node
+
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    def _union(self, a: str, b: str) -> str:
+        """Merge the sets rooted at a and b; return the new root."""
+        if a == b:
+            return a
+        if self._size[a] < self._size[b]:
+            a, b = b, a
+        self._parent[b] = a
+        self._size[a] += self._size[b]
+        return a
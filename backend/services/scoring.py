@@ -1,10 +1,17 @@
 """Suspicion scoring system."""
-from typing import TYPE_CHECKING
-from collections import defaultdict
+from typing import TYPE_CHECKING, Optional, Union
+import math
+
+import numpy as np
+
+from backend.services.activity_index import build_activity_index
 
 if TYPE_CHECKING:
-    from networkx import DiGraph
+    from backend.models.graph import TransactionGraph
+    from backend.models.frame import TransactionFrame
     from backend.models.transaction import Transaction
+    from backend.services.activity_index import AccountActivityIndex
+    from backend.services.pattern_registry import PatternRegistry
 
 
 # Scoring weights per design spec:
@@ -28,12 +35,15 @@ PAYROLL_PATTERN_THRESHOLD = 0.8  # similarity threshold for payroll patterns
 
 
 def calculate_suspicion_scores(
-    G: 'DiGraph',
-    transactions: list['Transaction'],
+    G: 'TransactionGraph',
+    transactions: Union[list['Transaction'], 'TransactionFrame'],
     cycle_accounts: dict[str, list[list[str]]],
     smurfing_accounts: dict[str, dict],
     shell_accounts: dict[str, list[list[str]]],
-    account_ring_map: dict[str, str]
+    account_ring_map: dict[str, str],
+    activity: Optional['AccountActivityIndex'] = None,
+    velocity_scores: Optional[dict[str, float]] = None,
+    patterns: Optional['PatternRegistry'] = None
 ) -> dict[str, float]:
     """
     Calculate suspicion scores for all accounts.
@@ -46,162 +56,177 @@ def calculate_suspicion_scores(
     
     Scores are capped at 100.
     
-    Complexity: O(n) where n = number of accounts
+    Complexity: O(n) where n = number of accounts; the velocity and payroll
+    checks read the shared activity index instead of the transaction list,
+    and the pattern weights come from the PatternRegistry (built here from
+    the detector outputs unless passed in)
     
     Args:
         G: Transaction graph
-        transactions: Original transaction list
+        transactions: TransactionFrame (or Transaction list)
         cycle_accounts: Accounts involved in cycles (ring_id -> cycles)
         smurfing_accounts: Accounts with smurfing patterns
         shell_accounts: Accounts involved in shells (ring_id -> chains)
         account_ring_map: Mapping of account_id -> ring_id
+        activity: Shared per-account index (built from transactions if omitted)
+        velocity_scores: Precomputed velocity scores (see account_velocity_score),
+            used instead of the activity index when given
+        patterns: The detector outputs as a PatternRegistry, read instead of
+            cycle_accounts, smurfing_accounts and shell_accounts when given
         
     Returns:
         Dictionary mapping account_id to suspicion_score
     """
-    from collections import defaultdict
-
-    scores: dict[str, float] = defaultdict(float)
-
-    # Build unique pattern list for each account
-    account_patterns: dict[str, set[str]] = defaultdict(set)
-
-    # Cycle patterns
-    for ring_id, cycles in cycle_accounts.items():
-        for cycle in cycles:
-            pattern_label = f"cycle_length_{len(cycle)}"
-            for account_id in cycle:
-                account_patterns[account_id].add(pattern_label)
-
-    # Smurfing patterns
-    for account_id, info in smurfing_accounts.items():
-        label = info.get("pattern_label", "smurfing")
-        account_patterns[account_id].add(label)
-
-    # Shell patterns
-    for ring_id, chains in shell_accounts.items():
-        for chain in chains:
-            pattern_label = f"layered_shell_{len(chain)}hop"
-            for account_id in chain:
-                account_patterns[account_id].add(pattern_label)
+    if patterns is None:
+        from backend.services.pattern_registry import build_pattern_registry
+        patterns = build_pattern_registry(cycle_accounts, smurfing_accounts, shell_accounts)
 
     # Score based on unique patterns
-    for account_id, patterns in account_patterns.items():
-        for label in patterns:
-            if label.startswith("cycle_length_"):
-                try:
-                    length = int(label.split("_")[-1])
-                except ValueError:
-                    length = 3
-                if length == 3:
-                    scores[account_id] += SCORE_CYCLE_LENGTH_3
-                elif length == 4:
-                    scores[account_id] += SCORE_CYCLE_LENGTH_4
-                else:
-                    scores[account_id] += SCORE_CYCLE_LENGTH_5
-            elif label.startswith("layered_shell_"):
-                # extract hop count
-                hop_str = label.replace("layered_shell_", "").replace("hop", "")
-                try:
-                    hop = int(hop_str)
-                except ValueError:
-                    hop = 3
-                if hop == 3:
-                    scores[account_id] += SCORE_SHELL_3_HOP
-                elif hop == 4:
-                    scores[account_id] += SCORE_SHELL_4_HOP
-                else:
-                    scores[account_id] += SCORE_SHELL_5_HOP
-            elif label == "smurfing":
-                scores[account_id] += SCORE_SMURFING
-            # other patterns could be added here
+    scores: dict[str, float] = {}
+    for account_id, mask in patterns.account_patterns.items():
+        score = patterns.mask_score(mask)
+        if score:
+            scores[account_id] = score
 
     # Score high velocity (if not payroll pattern)
-    velocity_scores = _calculate_velocity_scores(transactions)
+    if velocity_scores is None:
+        if activity is None:
+            activity = build_activity_index(transactions)
+        velocity_scores = _calculate_velocity_scores(activity)
     for account_id, velocity_score in velocity_scores.items():
-        if not _is_payroll_pattern(account_id, transactions):
-            scores[account_id] += velocity_score
+        scores[account_id] = scores.get(account_id, 0.0) + velocity_score
 
     # Cap scores at 100
-    for account_id in scores:
-        scores[account_id] = min(scores[account_id], 100.0)
+    for account_id, score in scores.items():
+        scores[account_id] = min(score, 100.0)
 
-    return dict(scores)
+    return scores
 
 
-def _calculate_velocity_scores(transactions: list['Transaction']) -> dict[str, float]:
+def pattern_score(kind: str, size: Optional[int] = None, label: Optional[str] = None) -> float:
     """
-    Calculate velocity-based scores.
+    Score weight of a pattern found by a built-in detector.
+
+    Args:
+        kind: 'cycle', 'shell' or 'smurfing'
+        size: Cycle length or shell chain length
+        label: Pattern label
+
+    Returns:
+        Points added to the score of each account showing the pattern
+    """
+    if kind == 'cycle':
+        if size == 3:
+            return SCORE_CYCLE_LENGTH_3
+        if size == 4:
+            return SCORE_CYCLE_LENGTH_4
+        return SCORE_CYCLE_LENGTH_5
+    if kind == 'shell':
+        if size == 3:
+            return SCORE_SHELL_3_HOP
+        if size == 4:
+            return SCORE_SHELL_4_HOP
+        return SCORE_SHELL_5_HOP
+    # Only the generic "smurfing" label is weighted; the fan_in_* and
+    # fan_out_* labels of detect_smurfing have never added points
+    if kind == 'smurfing' and label == 'smurfing':
+        return SCORE_SMURFING
+    # other patterns could be added here
+    return 0.0
+
+
+def _calculate_velocity_scores(activity: 'AccountActivityIndex') -> dict[str, float]:
+    """
+    Calculate velocity-based scores, vectorized over all accounts.
     
     High velocity: Many transactions in short time period.
+    Accounts matching a payroll pattern are left out (see _payroll_accounts).
     """
-    from collections import defaultdict
-    from datetime import timedelta
-    
-    account_tx_map: dict[str, list['Transaction']] = defaultdict(list)
-    
-    for tx in transactions:
-        account_tx_map[tx.sender_id].append(tx)
-        account_tx_map[tx.receiver_id].append(tx)
-    
-    velocity_scores: dict[str, float] = {}
+    # A self-transfer counts twice, as sent and as received
+    tx_count = activity.inbound_counts + activity.outbound_counts
+    
+    # Check transactions per day
+    time_span = (activity.last_timestamp - activity.first_timestamp) / 86400
+    time_span[time_span == 0] = 1  # Avoid division by zero
+    tx_per_day = tx_count / time_span
+    
+    high_velocity = (tx_count >= HIGH_VELOCITY_THRESHOLD) & (tx_per_day >= HIGH_VELOCITY_THRESHOLD)
+    high_velocity &= ~_payroll_accounts(activity)
+    
+    account_ids = activity.frame.account_ids
+    return {
+        account_ids[account]: SCORE_HIGH_VELOCITY
+        for account in np.flatnonzero(high_velocity).tolist()
+    }
+
+
+def account_velocity_score(
+    tx_count: int,
+    first_timestamp: int,
+    last_timestamp: int,
+    month_counts: list[int]
+) -> float:
+    """
+    Velocity score of a single account; same rules and float arithmetic as
+    _calculate_velocity_scores, for callers that track accounts one by one.
     
-    for account_id, tx_list in account_tx_map.items():
-        if len(tx_list) < HIGH_VELOCITY_THRESHOLD:
-            continue
-        
-        # Check transactions per day
-        tx_list_sorted = sorted(tx_list, key=lambda t: t.timestamp)
-        time_span = (tx_list_sorted[-1].timestamp - tx_list_sorted[0].timestamp).total_seconds() / 86400
-        
-        if time_span == 0:
-            time_span = 1  # Avoid division by zero
-        
-        tx_per_day = len(tx_list) / time_span
+    Args:
+        tx_count: Transactions sent plus received (a self-transfer counts twice)
+        first_timestamp / last_timestamp: Bounds of the activity (epoch seconds)
+        month_counts: Distinct transactions per active calendar month, in month order
         
-        if tx_per_day >= HIGH_VELOCITY_THRESHOLD:
-            velocity_scores[account_id] = SCORE_HIGH_VELOCITY
-    
-    return velocity_scores
-
-
-def _is_payroll_pattern(account_id: str, transactions: list['Transaction']) -> bool:
+    Returns:
+        SCORE_HIGH_VELOCITY or 0.0
     """
-    Detect payroll-style patterns (repetitive monthly transactions).
-    
-    This helps avoid flagging legitimate high-volume accounts.
+    time_span = (last_timestamp - first_timestamp) / 86400
+    if time_span == 0:
+        time_span = 1
+    tx_per_day = tx_count / time_span
+    if tx_count < HIGH_VELOCITY_THRESHOLD or tx_per_day < HIGH_VELOCITY_THRESHOLD:
+        return 0.0
+    
+    # Payroll check, as in _payroll_accounts
+    months = len(month_counts)
+    total = 0.0
+    for count in month_counts:
+        total += count
+    avg_count = total / months if months > 0 else 0.0
+    deviation = 0.0
+    for count in month_counts:
+        deviation += (count - avg_count) ** 2
+    variance = deviation / months if months > 0 else 0.0
+    cv = math.sqrt(variance) / avg_count if avg_count > 0 else 1.0
+    if total >= 10 and months >= 3 and cv < 0.3:
+        return 0.0
+    return SCORE_HIGH_VELOCITY
+
+
+def _payroll_accounts(activity: 'AccountActivityIndex') -> np.ndarray:
     """
-    from collections import defaultdict
-    
-    # Get transactions involving this account
-    account_txs = [
-        tx for tx in transactions
-        if tx.sender_id == account_id or tx.receiver_id == account_id
-    ]
-    
-    if len(account_txs) < 10:
-        return False
+    Detect payroll-style patterns (repetitive monthly transactions).
     
-    # Group by month
-    monthly_counts: dict[str, int] = defaultdict(int)
-    for tx in account_txs:
-        month_key = tx.timestamp.strftime('%Y-%m')
-        monthly_counts[month_key] += 1
+    This helps avoid flagging legitimate high-volume accounts. An account
+    qualifies with >= 10 transactions spread over >= 3 months whose
+    monthly counts have a coefficient of variation below 0.3.
     
-    if len(monthly_counts) < 3:
-        return False
+    Returns:
+        Boolean array indexed by account code
+    """
+    n_accounts = len(activity)
+    account = activity.month_account
+    counts = activity.month_count.astype(np.float64)
     
-    # Check if counts are similar (payroll pattern)
-    counts = list(monthly_counts.values())
-    avg_count = sum(counts) / len(counts)
+    months = np.bincount(account, minlength=n_accounts)
+    total = np.bincount(account, weights=counts, minlength=n_accounts)
+    avg_count = np.divide(total, months, out=np.zeros(n_accounts), where=months > 0)
     
     # Calculate coefficient of variation
-    if avg_count == 0:
-        return False
-    
-    variance = sum((c - avg_count) ** 2 for c in counts) / len(counts)
-    std_dev = variance ** 0.5
-    cv = std_dev / avg_count if avg_count > 0 else 1.0
+    deviation = (counts - avg_count[account]) ** 2
+    variance = np.divide(
+        np.bincount(account, weights=deviation, minlength=n_accounts), months,
+        out=np.zeros(n_accounts), where=months > 0
+    )
+    cv = np.divide(np.sqrt(variance), avg_count, out=np.ones(n_accounts), where=avg_count > 0)
     
     # Low coefficient of variation indicates regular pattern
-    return cv < 0.3  # Threshold for regularity
+    return (total >= 10) & (months >= 3) & (cv < 0.3)  # Threshold for regularity
@@ -0,0 +1,480 @@
+"""Out-of-core detection: shards of weakly connected components, detected one at a time."""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import chain
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+import numpy as np
+
+from backend import config
+from backend.models.frame import TransactionFrame, concat_frames
+from backend.models.transaction import DetectionDiagnostics, DetectionResult, StageDiagnostics
+from backend.services.activity_index import build_activity_index
+from backend.services.cycle_detection import detect_cycles
+from backend.services.detection_engine import (
+    DETECTION_PARAMETERS, MEMORY_PER_ROW, WORKER_BASE_MEMORY_MB, _run_detector, assign_rings
+)
+from backend.services.graph_builder import build_transaction_graph
+from backend.services.json_formatter import build_detection_output
+from backend.services.pattern_registry import build_pattern_registry
+from backend.services.ring_grouping import RingBuilder
+from backend.services.scoring import _calculate_velocity_scores, calculate_suspicion_scores
+from backend.services.shell_detection import detect_layered_shells
+from backend.services.smurfing_detection import detect_smurfing
+from backend.utils.csv_parser import iter_csv_frames
+from backend.utils.transaction_file import is_transaction_file, load_transaction_file, write_transaction_file
+
+# Rows read, labelled and partitioned at a time
+SHARD_CHUNK_ROWS = 1_000_000
+
+# Components are packed into shards of about this many rows; a component
+# larger than this is a shard of its own
+SHARD_ROWS = 2_000_000
+
+
+class ComponentLabeler:
+    """
+    Union-find over account IDs, fed one frame of transactions at a time.
+
+    Accounts get global codes in order of first appearance. The parent
+    array is kept fully compressed between frames, so parent[code] is the
+    root (smallest code) of the account's weakly connected component. A
+    frame's edges are merged in vectorized rounds: every edge whose ends
+    still have different roots hooks the larger root onto the smaller one,
+    then pointer jumping compresses the paths again. Roots only ever get
+    smaller, so the rounds end, usually after a few.
+
+    Memory: the account dictionary plus 16 bytes per account; rows are
+    not kept.
+    """
+
+    __slots__ = ('codes', '_parent', '_rows')
+
+    def __init__(self) -> None:
+        # account_id -> global code
+        self.codes: dict[str, int] = {}
+        # Capacity grows by doubling; only the first len(codes) entries are used
+        self._parent = np.zeros(0, dtype=np.int64)
+        # Rows sent by each account, so each row is counted once
+        self._rows = np.zeros(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def add(self, frame: TransactionFrame) -> np.ndarray:
+        """
+        Register frame's accounts and merge the components its rows connect.
+
+        Returns:
+            Global code of each of frame's account codes
+
+        Complexity: O(k + a) per round for k rows and a accounts so far
+        """
+        codes = self.codes
+        known = len(codes)
+        code = np.fromiter(
+            (codes.setdefault(account_id, len(codes)) for account_id in frame.account_ids),
+            dtype=np.int64, count=frame.account_count
+        )
+        accounts = len(codes)
+        if accounts > len(self._parent):
+            capacity = max(accounts, 2 * len(self._parent))
+            self._parent = np.concatenate((self._parent, np.zeros(capacity - len(self._parent), dtype=np.int64)))
+            self._rows = np.concatenate((self._rows, np.zeros(capacity - len(self._rows), dtype=np.int64)))
+        self._parent[known:accounts] = np.arange(known, accounts)
+
+        sender, receiver = code[frame.sender], code[frame.receiver]
+        self._rows[:accounts] += np.bincount(sender, minlength=accounts)
+        self._union(sender, receiver)
+        return code
+
+    def codes_of(self, frame: TransactionFrame) -> np.ndarray:
+        """Global code of each of frame's account codes (all must be registered)."""
+        return np.fromiter(map(self.codes.__getitem__, frame.account_ids), dtype=np.int64, count=frame.account_count)
+
+    def labels(self) -> np.ndarray:
+        """Component root of every account, by global code."""
+        return self._parent[:len(self.codes)].copy()
+
+    def sent_rows(self) -> np.ndarray:
+        """Rows sent by every account, by global code."""
+        return self._rows[:len(self.codes)].copy()
+
+    def _union(self, u: np.ndarray, v: np.ndarray) -> None:
+        parent = self._parent[:len(self.codes)]
+        while True:
+            root_u, root_v = parent[u], parent[v]
+            apart = root_u != root_v
+            if not apart.any():
+                return
+            # Edges already inside one component drop out of later rounds
+            u, v, root_u, root_v = u[apart], v[apart], root_u[apart], root_v[apart]
+            np.minimum.at(parent, np.maximum(root_u, root_v), np.minimum(root_u, root_v))
+            while True:
+                grandparent = parent[parent]
+                if np.array_equal(grandparent, parent):
+                    break
+                parent[:] = grandparent
+
+
+class Shard:
+    """One partition of the transactions: whole components, as binary part files."""
+
+    __slots__ = ('directory', 'rows', 'accounts')
+
+    def __init__(self, directory: Path, rows: int, accounts: int) -> None:
+        self.directory = directory
+        self.rows = rows
+        self.accounts = accounts
+
+    @property
+    def parts(self) -> list[Path]:
+        return sorted(self.directory.glob('part_*.mmtx'))
+
+    def estimate_memory_mb(self) -> float:
+        """Rough peak memory (MB) of a worker detecting this shard (see MEMORY_PER_ROW)."""
+        return WORKER_BASE_MEMORY_MB + self.rows * MEMORY_PER_ROW / 1e6
+
+
+def partition_by_component(
+    source: Union[str, Path],
+    directory: Union[str, Path],
+    chunk_rows: int = SHARD_CHUNK_ROWS,
+    shard_rows: int = SHARD_ROWS,
+    stats: Optional[dict[str, int]] = None
+) -> tuple[list[Shard], ComponentLabeler]:
+    """
+    Split a transactions file into shards of whole weakly connected components.
+
+    Every pattern the detectors look for (cycles, shell chains, fan-in and
+    fan-out) lies inside one weakly connected component, so each shard can
+    be detected on its own. Two passes over chunk_rows rows at a time:
+
+    1. Parse each chunk, register its accounts with a ComponentLabeler and
+       merge the components its rows connect. A CSV chunk is spilled to a
+       binary transaction file for the second pass; a binary source is
+       read again instead.
+    2. Pack the components into shards, largest first, and write each
+       chunk's rows to a part file per shard (rows keep their file order).
+
+    Only one chunk and the labeler are held in memory. Disk use is about
+    twice the source's size in binary form.
+
+    Args:
+        source: CSV or binary transaction file
+        directory: Existing directory for the spills and shards
+        chunk_rows: Rows per chunk
+        shard_rows: Target rows per shard
+        stats: Work counters to fill in when given: transactions, accounts,
+            components, chunks, shards and largest_shard (rows)
+
+    Returns:
+        (shards, largest first; the labeler, holding every account ID)
+
+    Raises:
+        ValueError: If the source is not a valid transactions file
+    """
+    directory = Path(directory)
+    with open(source, 'rb') as file:
+        binary = is_transaction_file(file)
+
+    # Pass 1: label components
+    labeler = ComponentLabeler()
+    spills: list[Path] = []
+    rows = chunk_count = 0
+    for index, chunk in enumerate(_iter_chunks(source, binary, chunk_rows)):
+        labeler.add(chunk)
+        rows += len(chunk)
+        chunk_count += 1
+        if not binary:
+            spills.append(directory / f'chunk_{index:05d}.mmtx')
+            write_transaction_file(chunk, spills[-1])
+
+    # Pack components into shards: in decreasing size, a component goes to
+    # the shard its first row would fall into if they were laid end to end
+    roots = labeler.labels()
+    components = np.flatnonzero(roots == np.arange(len(roots)))
+    component_rows = np.bincount(roots, weights=labeler.sent_rows(), minlength=len(roots))[components].astype(np.int64)
+    order = np.argsort(-component_rows, kind='stable')
+    starts = np.cumsum(component_rows[order]) - component_rows[order]
+    component_shard = np.empty(len(components), dtype=np.int64)
+    component_shard[order] = np.unique(starts // shard_rows, return_inverse=True)[1]
+    component_index = np.empty(len(roots), dtype=np.int64)
+    component_index[components] = np.arange(len(components))
+    account_shard = component_shard[component_index[roots]]
+
+    n_shards = int(component_shard.max()) + 1 if len(components) else 0
+    shards = [
+        Shard(directory / f'shard_{shard:05d}', int(shard_size), int(accounts))
+        for shard, (shard_size, accounts) in enumerate(zip(
+            np.bincount(component_shard, weights=component_rows, minlength=n_shards).tolist(),
+            np.bincount(account_shard, minlength=n_shards).tolist()
+        ))
+    ]
+    for shard in shards:
+        shard.directory.mkdir()
+
+    # Pass 2: write each chunk's rows to their shards' part files
+    chunks = _iter_chunks(source, True, chunk_rows) if binary else (
+        load_transaction_file(spill, verify=False) for spill in spills
+    )
+    for index, chunk in enumerate(chunks):
+        row_shard = account_shard[labeler.codes_of(chunk)[chunk.sender]]
+        order = np.argsort(row_shard, kind='stable')
+        bounds = np.searchsorted(row_shard[order], np.arange(n_shards + 1))
+        for shard in np.flatnonzero(np.diff(bounds)).tolist():
+            write_transaction_file(
+                chunk.take(order[bounds[shard]:bounds[shard + 1]]),
+                shards[shard].directory / f'part_{index:05d}.mmtx'
+            )
+
+    shards.sort(key=lambda shard: -shard.rows)
+    if stats is not None:
+        stats.update(
+            transactions=rows,
+            accounts=len(labeler),
+            components=len(components),
+            chunks=chunk_count,
+            shards=n_shards,
+            largest_shard=max((shard.rows for shard in shards), default=0)
+        )
+    return shards, labeler
+
+
+def detect_shard(shard: Shard, cycle_workers: Optional[int] = None) -> dict:
+    """
+    Run the detectors over one shard (in a worker process when run in parallel).
+
+    Returns the raw detector outputs and the velocity scores, not a result:
+    ring numbering and scoring need every shard's patterns (see
+    run_sharded_detection_output).
+
+    Returns:
+        Dict with 'cycles' and 'shells' (ring_id -> patterns), 'smurfing',
+        'velocity' (account_id -> score) and 'stages' (name -> StageDiagnostics)
+    """
+    params = DETECTION_PARAMETERS
+    stages: dict[str, StageDiagnostics] = {}
+    clock = time.perf_counter()
+
+    def finish(stage: str, **counters: int) -> None:
+        nonlocal clock
+        now = time.perf_counter()
+        stages[stage] = StageDiagnostics(seconds=now - clock, counters=counters)
+        clock = now
+
+    frame = concat_frames([load_transaction_file(part, verify=False) for part in shard.parts])
+    finish('frame', transactions=len(frame), accounts=frame.account_count)
+    G = build_transaction_graph(frame)
+    finish('build_graph', nodes=len(G), edges=G.number_of_edges())
+    activity = build_activity_index(frame)
+    finish('activity_index')
+
+    found: dict[str, dict] = {}
+    for stage, counter, detect, kwargs in (
+        ('cycles', 'rings', detect_cycles, {
+            'G': G,
+            'min_length': params['cycle_min_length'],
+            'max_length': params['cycle_max_length'],
+            'workers': cycle_workers,
+        }),
+        ('smurfing', 'flagged', detect_smurfing, {
+            'G': G,
+            'transactions': frame,
+            'activity': activity,
+            'threshold': params['smurfing_threshold'],
+            'time_window_hours': params['smurfing_time_window_hours'],
+        }),
+        ('shells', 'rings', detect_layered_shells, {
+            'G': G,
+            'min_chain_length': params['shell_min_chain_length'],
+            'max_intermediate_degree': params['shell_max_intermediate_degree'],
+        }),
+    ):
+        found[stage], stats, _ = _run_detector(detect, kwargs)
+        finish(stage, **{counter: len(found[stage])}, **stats)
+    velocity = _calculate_velocity_scores(activity)
+    finish('velocity', accounts=len(velocity))
+
+    return {
+        'cycles': found['cycles'],
+        'smurfing': found['smurfing'],
+        'shells': found['shells'],
+        'velocity': velocity,
+        'stages': stages,
+    }
+
+
+def run_sharded_detection(source: Union[str, Path], **options) -> DetectionResult:
+    """
+    Run the sharded detection pipeline (see run_sharded_detection_output).
+
+    Returns:
+        DetectionResult matching output schema, with the diagnostics in
+        result.diagnostics (not serialized by default)
+    """
+    output, diagnostics = run_sharded_detection_output(source, **options)
+    result = DetectionResult.model_validate(output)
+    result.diagnostics = diagnostics
+    return result
+
+
+def run_sharded_detection_output(
+    source: Union[str, Path],
+    workers: Optional[int] = None,
+    max_memory_mb: Optional[int] = None,
+    shard_rows: int = SHARD_ROWS,
+    chunk_rows: int = SHARD_CHUNK_ROWS,
+    work_dir: Optional[Union[str, Path]] = None
+) -> tuple[dict, DetectionDiagnostics]:
+    """
+    Detect a transactions file too large to hold in memory, shard by shard.
+
+    The file is split into shards of whole weakly connected components
+    (partition_by_component), each shard's detectors run on their own in
+    worker processes, and their patterns are merged as run_detection_output
+    would have found them over the whole file: rings are grouped and
+    numbered over all shards' patterns, then scored and formatted once. The
+    result is the one run_detection_output gives for the same file.
+
+    Shards start largest first while fewer than workers run and, with
+    max_memory_mb, while their estimated memory (Shard.estimate_memory_mb)
+    fits the budget beside the shards running; a shard over the budget on
+    its own runs alone. Each worker is replaced after every shard so its
+    memory goes back to the system; that needs Python 3.11
+    (max_tasks_per_child), so older Pythons refuse max_memory_mb with
+    more than one worker. With max_memory_mb every shard's cycle search
+    runs in its own process; otherwise each shard gets its share of the
+    cores. This process holds one chunk while
+    partitioning, then the account IDs and the detector outputs.
+
+    Args:
+        source: CSV or binary transaction file
+        workers: Shards detected at once (default: config.DETECTION_WORKERS);
+            1 detects them in this process
+        max_memory_mb: Memory budget for the shards running (None: unbounded)
+        shard_rows: Target rows per shard
+        chunk_rows: Rows read at a time while partitioning
+        work_dir: Where the shard files go (default: system temp dir); they
+            are removed when done
+
+    Returns:
+        (output, diagnostics): as run_detection_output. The stages are
+        'partition', the shard stages summed over all shards ('frame' to
+        'shells', plus 'velocity'; they overlap when shards run in
+        parallel), then 'rings', 'scoring' and 'formatting'
+
+    Raises:
+        ValueError: If the source is not a valid transactions file, or
+            max_memory_mb is given with workers > 1 before Python 3.11
+    """
+    start_time = time.time()
+    started = time.perf_counter()
+    if workers is None:
+        workers = config.DETECTION_WORKERS
+    if max_memory_mb is not None and workers > 1 and sys.version_info < (3, 11):
+        raise ValueError(
+            "A memory budget with more than one worker needs Python 3.11 or later "
+            "(workers must be replaced after every shard); use one worker"
+        )
+
+    stages: dict[str, StageDiagnostics] = {}
+    with tempfile.TemporaryDirectory(prefix='shards-', dir=work_dir) as directory:
+        partition_stats: dict[str, int] = {}
+        shards, labeler = partition_by_component(source, directory, chunk_rows, shard_rows, partition_stats)
+        stages['partition'] = StageDiagnostics(seconds=time.perf_counter() - started, counters=partition_stats)
+        results = _detect_shards(shards, workers, max_memory_mb)
+
+    # Shard stage times and counters, summed (largest_* counters: maximum)
+    for result in results:
+        for stage, timing in result['stages'].items():
+            total = stages.setdefault(stage, StageDiagnostics(seconds=0.0, counters={}))
+            total.seconds += timing.seconds
+            for counter, value in timing.counters.items():
+                previous = total.counters.get(counter, 0)
+                total.counters[counter] = max(previous, value) if counter.startswith('largest') else previous + value
+    clock = time.perf_counter()
+
+    # Group the patterns of all shards into rings, numbered as over the whole graph
+    cycle_rings = RingBuilder()
+    shell_rings = RingBuilder()
+    smurfing_accounts: dict[str, dict] = {}
+    velocity_scores: dict[str, float] = {}
+    for result in results:
+        cycle_rings.update(chain.from_iterable(result['cycles'].values()))
+        shell_rings.update(chain.from_iterable(result['shells'].values()))
+        smurfing_accounts.update(result['smurfing'])
+        velocity_scores.update(result['velocity'])
+    cycle_accounts = cycle_rings.build()
+    shell_accounts, account_ring_map = assign_rings(cycle_accounts, shell_rings.build())
+    patterns = build_pattern_registry(cycle_accounts, smurfing_accounts, shell_accounts)
+    now = time.perf_counter()
+    stages['rings'] = StageDiagnostics(
+        seconds=now - clock,
+        counters={'rings': len(cycle_accounts) + len(shell_accounts), 'accounts': len(account_ring_map)}
+    )
+    clock = now
+
+    suspicion_scores = calculate_suspicion_scores(
+        None, None, cycle_accounts, smurfing_accounts, shell_accounts,
+        account_ring_map, velocity_scores=velocity_scores, patterns=patterns
+    )
+    now = time.perf_counter()
+    stages['scoring'] = StageDiagnostics(seconds=now - clock, counters={'accounts_scored': len(suspicion_scores)})
+    clock = now
+
+    processing_time = time.time() - start_time
+    output = build_detection_output(
+        labeler.codes.keys(), None, cycle_accounts, smurfing_accounts,
+        shell_accounts, suspicion_scores, account_ring_map, processing_time, patterns
+    )
+    stages['formatting'] = StageDiagnostics(
+        seconds=time.perf_counter() - clock,
+        counters={'suspicious_accounts': len(output['suspicious_accounts'])}
+    )
+    return output, DetectionDiagnostics(stages=stages, total_seconds=time.perf_counter() - started)
+
+
+def _detect_shards(shards: list[Shard], workers: int, max_memory_mb: Optional[int]) -> list[dict]:
+    """detect_shard over every shard, in a process pool unless workers is 1 (see run_sharded_detection_output)."""
+    # Under a memory budget a shard must not fork a cycle search pool of its own
+    cycle_workers = 1 if max_memory_mb is not None else max(1, (os.cpu_count() or 1) // workers)
+    if workers == 1 or len(shards) <= 1:
+        return [detect_shard(shard, cycle_workers) for shard in shards]
+
+    pool_options = {'max_workers': workers}
+    if sys.version_info >= (3, 11):
+        # Older Pythons only get here without a memory budget
+        pool_options['max_tasks_per_child'] = 1
+    results: list[dict] = []
+    pending = list(shards)  # largest first
+    running: dict[Future, Shard] = {}
+    with ProcessPoolExecutor(**pool_options) as executor:
+        while pending or running:
+            used = sum(shard.estimate_memory_mb() for shard in running.values())
+            while pending and len(running) < workers and (
+                max_memory_mb is None or not running or used + pending[0].estimate_memory_mb() <= max_memory_mb
+            ):
+                shard = pending.pop(0)
+                running[executor.submit(detect_shard, shard, cycle_workers)] = shard
+                used += shard.estimate_memory_mb()
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for task in done:
+                del running[task]
+                results.append(task.result())
+    return results
+
+
+def _iter_chunks(source: Union[str, Path], binary: bool, chunk_rows: int) -> Iterator[TransactionFrame]:
+    """Frames of chunk_rows consecutive rows of a CSV or (mapped) binary transaction file."""
+    if binary:
+        frame = load_transaction_file(source)
+        for start in range(0, len(frame), chunk_rows):
+            yield frame.take(np.arange(start, min(start + chunk_rows, len(frame))))
+        return
+    with open(source, encoding='utf-8', newline='') as text:
+        yield from iter_csv_frames(text, chunk_rows)
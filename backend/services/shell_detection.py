@@ -1,108 +1,170 @@
 """Layered shell detection: chains with low-degree intermediate nodes."""
-from typing import TYPE_CHECKING, Set
+from typing import TYPE_CHECKING, Any, Callable, Collection, Iterable, Iterator, Mapping, Optional, Union
+
+from backend.models.graph import TransactionGraph, as_transaction_graph
+from backend.services.ring_grouping import RingBuilder
 
 if TYPE_CHECKING:
     from networkx import DiGraph
 
 
-def detect_layered_shells(G: 'DiGraph', min_chain_length: int = 3, max_intermediate_degree: int = 3) -> dict[str, list[list[str]]]:
+def detect_layered_shells(
+    G: Union[TransactionGraph, 'DiGraph'],
+    min_chain_length: int = 3,
+    max_intermediate_degree: int = 3,
+    stats: Optional[dict[str, int]] = None
+) -> dict[str, list[list[str]]]:
     """
     Detect layered shell patterns: chains with low-degree intermediate nodes.
-    
-    Pattern: Chain of length >= min_chain_length where intermediate nodes
-    have total degree <= max_intermediate_degree.
-    
-    Algorithm: DFS-based chain detection with degree filtering.
+
+    Pattern: Chain of min_chain_length to min_chain_length + 2 nodes where
+    intermediate nodes have total degree <= max_intermediate_degree.
+
+    Algorithm: One DFS per start node that reports chains of every length in
+    range as it goes. A node only becomes intermediate when the chain is
+    extended past it, so the DFS never steps through a node whose degree
+    (read from a precomputed table) is above max_intermediate_degree.
     Complexity: O(n * d^l) where:
         - n = nodes
-        - d = average degree
-        - l = chain length (bounded by graph structure)
-    
+        - d = average degree among low-degree nodes
+        - l = maximum chain length (min_chain_length + 2)
+
     Args:
-        G: Directed graph
+        G: Transaction graph (a networkx DiGraph is converted first)
         min_chain_length: Minimum chain length (default: 3)
         max_intermediate_degree: Maximum degree for intermediate nodes (default: 3)
-        
+        stats: Work counters to fill in when given: DFS expansions and
+            distinct chains
+
     Returns:
         Dictionary mapping ring_id to list of chains (each chain is list of node IDs)
     """
-    chains = []
-    
-    # Find all nodes that could be chain starts (high out-degree potential)
-    # and chain ends (high in-degree potential)
-    # use sorted node lists for deterministic behavior
-    potential_starts = [n for n in sorted(G.nodes()) if G.out_degree(n) > 0]
-    potential_ends = [n for n in sorted(G.nodes()) if G.in_degree(n) > 0]
-    
-    # DFS to find chains
-    visited_chains: set[tuple] = set()
-    
-    def is_valid_intermediate(node: str, position: int, chain_length: int) -> bool:
-        """Check if node can be intermediate node in chain."""
-        if position == 0 or position == chain_length - 1:
-            return True  # Start/end nodes have no restrictions
-        total_degree = G.in_degree(node) + G.out_degree(node)
-        return total_degree <= max_intermediate_degree
-    
-    def dfs_chain(current: str, chain: list[str], target_length: int):
-        """DFS to find chains of target length."""
-        if len(chain) == target_length:
-            chain_tuple = tuple(sorted(chain))
-            if chain_tuple not in visited_chains:
-                # Validate intermediate nodes
-                valid = all(
-                    is_valid_intermediate(chain[i], i, target_length)
-                    for i in range(1, target_length - 1)
-                )
-                if valid:
-                    chains.append(chain.copy())
-                    visited_chains.add(chain_tuple)
-            return
-        
-        # Continue chain
-        for neighbor in G.successors(current):
-            if neighbor not in chain:  # Avoid cycles
-                chain.append(neighbor)
-                dfs_chain(neighbor, chain, target_length)
-                chain.pop()
-    
-    # Try different chain lengths
-    for length in range(min_chain_length, min_chain_length + 3):  # Try lengths 3, 4, 5
-        for start in potential_starts:
-            dfs_chain(start, [start], length)
-    
-    if not chains:
-        return {}
-    
-    # Group chains by shared nodes (same ring)
-    ring_map: dict[str, list[list[str]]] = {}
-    ring_counter = 1
-    node_to_ring: dict[str, str] = {}
-    
-    for chain in chains:
-        # Check if any node in chain already belongs to a ring
-        existing_ring = None
-        for node in chain:
-            if node in node_to_ring:
-                existing_ring = node_to_ring[node]
-                break
-        
-        if existing_ring:
-            ring_id = existing_ring
-        else:
-            ring_id = f"RING_{ring_counter:03d}"
-            ring_counter += 1
-        
-        # Add chain to ring
-        if ring_id not in ring_map:
-            ring_map[ring_id] = []
-        ring_map[ring_id].append(chain)
-        
-        # Mark all nodes in chain as belonging to this ring
-        for node in chain:
-            node_to_ring[node] = ring_id
-    
-    return ring_map
+    max_chain_length = min_chain_length + 2  # Try lengths 3, 4, 5
+
+    # Group chains by shared nodes (same ring) as they are found
+    rings = RingBuilder()
+
+    # Node numbers follow account ID order and successor rows are sorted,
+    # so the search is deterministic
+    graph = as_transaction_graph(G)
+    node_ids = graph.node_ids
+    successors = graph.successor_lists()
+    degree = (graph.in_degree + graph.out_degree).tolist()
+
+    # Chains over the same account set are reported once (first in lexicographic order)
+    if stats is None:
+        stats = {}
+    stats['dfs_expansions'] = 0
+    visited_chains: set[frozenset[int]] = set()
+    for chain in _iter_chains(
+        successors, degree.__getitem__, range(len(graph)),
+        min_chain_length, max_chain_length, max_intermediate_degree, stats
+    ):
+        chain_key = frozenset(chain)
+        if chain_key not in visited_chains:
+            visited_chains.add(chain_key)
+            rings.add([node_ids[node] for node in chain])
+
+    stats['chains'] = len(rings)
+    return rings.build()
+
+
+def iter_chains_through(
+    successors: Mapping[str, Collection[str]],
+    predecessors: Mapping[str, Collection[str]],
+    nodes: Iterable[str],
+    min_chain_length: int = 3,
+    max_intermediate_degree: int = 3
+) -> Iterator[tuple[str, ...]]:
+    """
+    Yield every shell chain (without deduplication) that contains one of nodes.
+
+    Used to refresh chains locally after edges are added: only chains
+    through the new edges' endpoints can appear or (as their degree grows)
+    disappear. Start candidates come from a reverse BFS that, like the
+    chain DFS, only walks back through low-degree nodes, so the work is
+    bounded by the neighbourhood of nodes.
+
+    Args:
+        successors / predecessors: Adjacency of the whole graph
+        nodes: Accounts the chains must touch
+        min_chain_length: Minimum chain length (default: 3)
+        max_intermediate_degree: Maximum degree for intermediate nodes (default: 3)
+
+    Yields:
+        Chains as tuples of node IDs (several per account set if they
+        visit it in different orders)
+    """
+    max_chain_length = min_chain_length + 2
+    targets = set(nodes)
+
+    def degree(node: str) -> int:
+        return len(successors.get(node, ())) + len(predecessors.get(node, ()))
+
+    # Nodes a chain through a target can start from
+    starts = set(targets)
+    frontier = list(targets)
+    for _ in range(max_chain_length - 1):
+        previous, frontier = frontier, []
+        for node in previous:
+            for predecessor in predecessors.get(node, ()):
+                if predecessor not in starts:
+                    starts.add(predecessor)
+                    # Only a low-degree predecessor can be passed through
+                    if degree(predecessor) <= max_intermediate_degree:
+                        frontier.append(predecessor)
+
+    for chain in _iter_chains(
+        successors, degree, starts, min_chain_length, max_chain_length, max_intermediate_degree
+    ):
+        if not targets.isdisjoint(chain):
+            yield tuple(chain)
+
+
+def _iter_chains(
+    successors: Mapping,
+    degree: Callable[[Any], int],
+    starts: Iterable,
+    min_chain_length: int,
+    max_chain_length: int,
+    max_intermediate_degree: int,
+    stats: Optional[dict[str, int]] = None
+) -> Iterator[list]:
+    """
+    Yield every chain from starts in DFS order (lexicographic when starts
+    and successor lists are sorted). A node only becomes intermediate when
+    the chain is extended past it, so the DFS never steps through a node
+    whose degree is above max_intermediate_degree. DFS expansions are
+    added to stats['dfs_expansions'] when stats is given.
+    """
+    expansions = 0
+
+    def dfs_chain(chain: list, on_chain: set):
+        """Extend chain by one hop, reporting it whenever its length is in range."""
+        nonlocal expansions
+        expansions += 1
+        for neighbor in successors[chain[-1]]:
+            if neighbor in on_chain:  # Avoid cycles
+                continue
+            chain.append(neighbor)
+
+            if len(chain) >= min_chain_length:
+                yield chain.copy()
+
+            # Extending makes neighbor an intermediate node: prune high-degree hubs
+            if len(chain) < max_chain_length and degree(neighbor) <= max_intermediate_degree:
+                on_chain.add(neighbor)
+                yield from dfs_chain(chain, on_chain)
+                on_chain.discard(neighbor)
+
+            chain.pop()
+
+    for start in starts:
+        if successors[start]:
+            yield from dfs_chain([start], {start})
+
+    if stats is not None:
+        stats['dfs_expansions'] = stats.get('dfs_expansions', 0) + expansions
 
 
 def get_shell_pattern_label(chain_length: int) -> str:
@@ -1,18 +1,26 @@
 """Smurfing detection: fan-in and fan-out patterns."""
-from datetime import datetime, timedelta
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional, Union
 from collections import defaultdict
 
+import numpy as np
+
+from backend.models.frame import from_epoch_seconds
+from backend.services.activity_index import build_activity_index
+
 if TYPE_CHECKING:
-    from networkx import DiGraph
+    from backend.models.graph import TransactionGraph
+    from backend.models.frame import TransactionFrame
     from backend.models.transaction import Transaction
+    from backend.services.activity_index import AccountActivityIndex
 
 
 def detect_smurfing(
-    G: 'DiGraph',
-    transactions: list['Transaction'],
+    G: 'TransactionGraph',
+    transactions: Union[list['Transaction'], 'TransactionFrame'],
     threshold: int = 10,
-    time_window_hours: int = 72
+    time_window_hours: int = 72,
+    activity: Optional['AccountActivityIndex'] = None,
+    stats: Optional[dict[str, int]] = None
 ) -> dict[str, dict]:
     """
     Detect smurfing patterns: fan-in and fan-out.
@@ -20,14 +28,18 @@ def detect_smurfing(
     Fan-in: >=threshold unique senders → 1 receiver within time_window
     Fan-out: 1 sender → >=threshold receivers within time_window
     
-    Complexity: O(n) where n = number of transactions
-    Uses timestamp filtering and aggregation
+    Complexity: O(n) where n = number of transactions, given the activity
+    index (its per-account lists are already time-sorted); each account is
+    scanned with a linear two-pointer sliding window
     
     Args:
         G: Directed graph
-        transactions: Original transaction list for timestamp filtering
+        transactions: TransactionFrame (or Transaction list) for timestamp filtering
         threshold: Minimum number of connections (default: 10)
         time_window_hours: Time window in hours (default: 72)
+        activity: Shared per-account index (built from transactions if omitted)
+        stats: Work counters to fill in when given: accounts scanned and
+            transactions passed through the sliding windows
         
     Returns:
         Dictionary mapping account_id to detection info:
@@ -40,74 +52,116 @@ def detect_smurfing(
             'time_window_end': datetime
         }
     """
-    results: dict[str, dict] = {}
+    if activity is None:
+        activity = build_activity_index(transactions)
+    frame = activity.frame
     
-    # Build time-indexed transaction map for efficient filtering
-    # Group by receiver (fan-in) and sender (fan-out)
-    receiver_tx_map: dict[str, list['Transaction']] = defaultdict(list)
-    sender_tx_map: dict[str, list['Transaction']] = defaultdict(list)
-    
-    for tx in transactions:
-        receiver_tx_map[tx.receiver_id].append(tx)
-        sender_tx_map[tx.sender_id].append(tx)
+    results: dict[str, dict] = {}
+    window_seconds = time_window_hours * 3600
+    if stats is None:
+        stats = {}
+    stats.update(accounts_scanned=0, window_transactions=0)
     
     # Detect fan-in patterns
-    for receiver_id, tx_list in receiver_tx_map.items():
-        # Sort by timestamp
-        tx_list_sorted = sorted(tx_list, key=lambda t: t.timestamp)
-        
-        # Sliding window approach
-        for i, start_tx in enumerate(tx_list_sorted):
-            window_start = start_tx.timestamp
-            window_end = window_start + timedelta(hours=time_window_hours)
-            
-            # Count unique senders in window
-            unique_senders = set()
-            for tx in tx_list_sorted[i:]:
-                if tx.timestamp > window_end:
-                    break
-                unique_senders.add(tx.sender_id)
-            
-            if len(unique_senders) >= threshold:
-                results[receiver_id] = {
-                    'account_id': receiver_id,
-                    'pattern_type': 'fan_in',
-                    'pattern_label': f'fan_in_{threshold}_{time_window_hours}h',
-                    'count': len(unique_senders),
-                    'time_window_start': window_start,
-                    'time_window_end': window_end
-                }
-                break  # Found pattern, move to next receiver
+    # Accounts with fewer unique senders overall than the threshold cannot qualify
+    for receiver in np.flatnonzero(activity.unique_senders >= threshold).tolist():
+        rows = activity.inbound_rows(receiver)
+        stats['accounts_scanned'] += 1
+        stats['window_transactions'] += len(rows)
+        match = _find_dense_window(
+            frame.timestamp[rows].tolist(), frame.sender[rows].tolist(),
+            threshold, window_seconds
+        )
+        if match:
+            receiver_id = frame.account_ids[receiver]
+            results[receiver_id] = _smurfing_info(
+                receiver_id, 'fan_in', threshold, time_window_hours, *match
+            )
     
     # Detect fan-out patterns
-    for sender_id, tx_list in sender_tx_map.items():
+    for sender in np.flatnonzero(activity.unique_receivers >= threshold).tolist():
+        sender_id = frame.account_ids[sender]
         # Skip if already detected as fan-in
         if sender_id in results:
             continue
-            
-        tx_list_sorted = sorted(tx_list, key=lambda t: t.timestamp)
         
-        # Sliding window approach
-        for i, start_tx in enumerate(tx_list_sorted):
-            window_start = start_tx.timestamp
-            window_end = window_start + timedelta(hours=time_window_hours)
-            
-            # Count unique receivers in window
-            unique_receivers = set()
-            for tx in tx_list_sorted[i:]:
-                if tx.timestamp > window_end:
-                    break
-                unique_receivers.add(tx.receiver_id)
-            
-            if len(unique_receivers) >= threshold:
-                results[sender_id] = {
-                    'account_id': sender_id,
-                    'pattern_type': 'fan_out',
-                    'pattern_label': f'fan_out_{threshold}_{time_window_hours}h',
-                    'count': len(unique_receivers),
-                    'time_window_start': window_start,
-                    'time_window_end': window_end
-                }
-                break  # Found pattern, move to next sender
+        rows = activity.outbound_rows(sender)
+        stats['accounts_scanned'] += 1
+        stats['window_transactions'] += len(rows)
+        match = _find_dense_window(
+            frame.timestamp[rows].tolist(), frame.receiver[rows].tolist(),
+            threshold, window_seconds
+        )
+        if match:
+            results[sender_id] = _smurfing_info(
+                sender_id, 'fan_out', threshold, time_window_hours, *match
+            )
     
     return results
+
+
+def _smurfing_info(
+    account_id: str,
+    pattern_type: str,
+    threshold: int,
+    time_window_hours: int,
+    count: int,
+    window_start: int,
+    window_end: int
+) -> dict:
+    """Build the detection info dict for one flagged account."""
+    return {
+        'account_id': account_id,
+        'pattern_type': pattern_type,
+        'pattern_label': f'{pattern_type}_{threshold}_{time_window_hours}h',
+        'count': count,
+        'time_window_start': from_epoch_seconds(window_start),
+        'time_window_end': from_epoch_seconds(window_end)
+    }
+
+
+def _find_dense_window(
+    timestamps: list[int],
+    counterparties: list[int],
+    threshold: int,
+    window_seconds: int
+) -> Optional[tuple[int, int, int]]:
+    """
+    Find the first window [t, t + window] holding >= threshold unique counterparties.
+    
+    Windows start at each transaction in time order. Two pointers bound the
+    current window and a multiplicity counter tracks its counterparties as
+    transactions enter on the right and leave on the left, so every
+    transaction is added and removed once: O(k) for k transactions.
+    
+    Args:
+        timestamps: One account's transaction timestamps (epoch seconds), sorted
+        counterparties: Counterparty account code of each transaction
+        threshold: Minimum number of unique counterparties
+        window_seconds: Window length in seconds
+        
+    Returns:
+        (unique counterparty count, window_start, window_end) for the first
+        qualifying window, or None
+    """
+    multiplicity: dict[int, int] = defaultdict(int)
+    right = 0
+    
+    for left, window_start in enumerate(timestamps):
+        window_end = window_start + window_seconds
+        
+        # Admit every transaction up to the end of this window
+        while right < len(timestamps) and timestamps[right] <= window_end:
+            multiplicity[counterparties[right]] += 1
+            right += 1
+        
+        if len(multiplicity) >= threshold:
+            return len(multiplicity), window_start, window_end
+        
+        # Slide: the start transaction leaves the window
+        counterparty = counterparties[left]
+        multiplicity[counterparty] -= 1
+        if multiplicity[counterparty] == 0:
+            del multiplicity[counterparty]
+    
+    return None
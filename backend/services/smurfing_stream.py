@@ -0,0 +1,156 @@
+"""Online smurfing detection over a time-ordered transaction stream."""
+from collections import deque
+from typing import TYPE_CHECKING, Iterable, Iterator, Union
+
+from backend.models.frame import TransactionFrame, to_epoch_seconds
+from backend.services.smurfing_detection import _smurfing_info
+
+if TYPE_CHECKING:
+    from backend.models.transaction import Transaction
+
+
+class _CounterpartyWindow:
+    """One account's counterparties in one direction inside the time window."""
+
+    __slots__ = ('entries', 'multiplicity', 'alerted')
+
+    def __init__(self) -> None:
+        self.entries: deque[tuple[int, str]] = deque()
+        self.multiplicity: dict[str, int] = {}
+        self.alerted = False
+
+
+class StreamingSmurfingDetector:
+    """
+    Fan-in / fan-out detection for transactions arriving in timestamp order.
+
+    For every account and direction the detector keeps only the
+    transactions of the last time_window_hours, with a multiplicity count
+    per counterparty. An alert is raised by the transaction that brings an
+    account to threshold unique counterparties inside the window
+    [t - window, t], so over a complete stream an account is alerted for
+    fan-in exactly when detect_smurfing reports it as fan_in (fan-out
+    alerts are raised independently of fan-in). After the window drops
+    below the threshold again, the account can alert anew.
+
+    Expired entries are evicted in arrival order from one global queue, so
+    memory is proportional to the transactions inside the window, not to
+    the length of the stream, and accounts with no recent activity hold
+    nothing.
+
+    Complexity: amortized O(1) per transaction (each entry is added and
+    evicted once).
+    """
+
+    __slots__ = (
+        'threshold', 'time_window_hours', '_window_seconds',
+        '_windows', '_expiry', '_last_timestamp'
+    )
+
+    def __init__(self, threshold: int = 10, time_window_hours: int = 72) -> None:
+        self.threshold = threshold
+        self.time_window_hours = time_window_hours
+        self._window_seconds = time_window_hours * 3600
+        # (account_id, pattern_type) -> counterparties inside the window
+        self._windows: dict[tuple[str, str], _CounterpartyWindow] = {}
+        # (timestamp, window key) of every retained entry, oldest first
+        self._expiry: deque[tuple[int, tuple[str, str]]] = deque()
+        self._last_timestamp = None
+
+    def __len__(self) -> int:
+        """Number of retained window entries (two per transaction in the window)."""
+        return len(self._expiry)
+
+    @property
+    def account_count(self) -> int:
+        """Accounts with activity inside the window."""
+        return len({account_id for account_id, _ in self._windows})
+
+    def update(self, sender_id: str, receiver_id: str, timestamp: int) -> list[dict]:
+        """
+        Consume one transaction.
+
+        Args:
+            sender_id: Sending account
+            receiver_id: Receiving account
+            timestamp: Epoch seconds; must not be earlier than the previous one
+
+        Returns:
+            Alerts raised by this transaction (at most one fan_in for the
+            receiver and one fan_out for the sender), each shaped like a
+            detect_smurfing entry with the window [oldest entry, timestamp]
+
+        Raises:
+            ValueError: If timestamp goes back in time
+        """
+        if self._last_timestamp is not None and timestamp < self._last_timestamp:
+            raise ValueError(
+                f"Transactions must arrive in timestamp order: {timestamp} after {self._last_timestamp}"
+            )
+        self._last_timestamp = timestamp
+        self._evict(timestamp - self._window_seconds)
+
+        alerts = []
+        for key, counterparty in (
+            ((receiver_id, 'fan_in'), sender_id),
+            ((sender_id, 'fan_out'), receiver_id),
+        ):
+            window = self._windows.get(key)
+            if window is None:
+                window = self._windows[key] = _CounterpartyWindow()
+            window.entries.append((timestamp, counterparty))
+            window.multiplicity[counterparty] = window.multiplicity.get(counterparty, 0) + 1
+            self._expiry.append((timestamp, key))
+
+            if not window.alerted and len(window.multiplicity) >= self.threshold:
+                window.alerted = True
+                alerts.append(_smurfing_info(
+                    key[0], key[1], self.threshold, self.time_window_hours,
+                    len(window.multiplicity), window.entries[0][0], timestamp
+                ))
+        return alerts
+
+    def process(
+        self, transactions: Union[Iterable['Transaction'], TransactionFrame]
+    ) -> Iterator[dict]:
+        """
+        Consume transactions in order and yield alerts as they are raised.
+
+        Args:
+            transactions: Transaction objects (any iterable, e.g. a generator
+                over a feed) or a TransactionFrame, sorted by timestamp
+
+        Yields:
+            Alerts (see update)
+        """
+        if isinstance(transactions, TransactionFrame):
+            account_ids = transactions.account_ids
+            for sender, receiver, timestamp in zip(
+                transactions.sender.tolist(), transactions.receiver.tolist(),
+                transactions.timestamp.tolist()
+            ):
+                yield from self.update(account_ids[sender], account_ids[receiver], timestamp)
+        else:
+            for transaction in transactions:
+                yield from self.update(
+                    transaction.sender_id, transaction.receiver_id,
+                    to_epoch_seconds(transaction.timestamp)
+                )
+
+    def _evict(self, cutoff: int) -> None:
+        """Drop entries older than cutoff; windows are emptied in the same order."""
+        expiry = self._expiry
+        windows = self._windows
+        while expiry and expiry[0][0] < cutoff:
+            _, key = expiry.popleft()
+            window = windows[key]
+            _, counterparty = window.entries.popleft()
+            count = window.multiplicity[counterparty] - 1
+            if count:
+                window.multiplicity[counterparty] = count
+            else:
+                del window.multiplicity[counterparty]
+                if not window.multiplicity:
+                    del windows[key]
+                elif len(window.multiplicity) < self.threshold:
+                    window.alerted = False
@@ -1,13 +1,28 @@
 """CSV parsing utilities with strict schema validation."""
 import csv
 from datetime import datetime
-from typing import Iterator
-from io import StringIO
+from itertools import chain, islice, repeat
+from typing import BinaryIO, Iterable, Iterator, Optional, Union
+from io import StringIO, TextIOWrapper
 
+import numpy as np
+
+from pydantic import ValidationError
+
+from backend.models.frame import TransactionFrame, TransactionFrameBuilder, from_epoch_seconds, to_epoch_seconds
 from backend.models.transaction import Transaction
 
 
 REQUIRED_COLUMNS = ['transaction_id', 'sender_id', 'receiver_id', 'amount', 'timestamp']
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Rows converted per columnar batch
+PARSE_BATCH_ROWS = 65_536
+
+# Character offsets of the digits and separators in 'YYYY-MM-DD HH:MM:SS'
+_TIMESTAMP_DIGITS = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]
+_TIMESTAMP_SEPARATORS = {4: '-', 7: '-', 10: ' ', 13: ':', 16: ':'}
+_DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
 
 
 def validate_csv_columns(header: list[str]) -> None:
@@ -32,6 +47,9 @@ def parse_csv(file_content: str) -> list[Transaction]:
     """
     Parse CSV content into Transaction objects.
     
+    Kept for callers that need pydantic models; the detection pipeline
+    uses parse_csv_frame directly.
+    
     Args:
         file_content: CSV file content as string
         
@@ -41,48 +59,336 @@ def parse_csv(file_content: str) -> list[Transaction]:
     Raises:
         ValueError: If CSV schema is invalid or data is malformed
     """
-    reader = csv.DictReader(StringIO(file_content))
+    return parse_csv_frame(file_content).to_transactions()
+
+
+def parse_csv_frame(source: Union[str, Iterable[str]]) -> TransactionFrame:
+    """
+    Parse CSV content straight into a columnar TransactionFrame.
+    
+    Fast path: rows are read positionally with csv.reader and converted a
+    batch at a time. Timestamps in the fixed YYYY-MM-DD HH:MM:SS layout are
+    decoded and range-checked with vectorized integer arithmetic
+    (datetime.strptime is only used for rows off that layout, so it still
+    decides what is accepted and how errors read), and amount > 0 (and
+    finite) is checked over the whole amount column instead of per-row
+    pydantic validation; only rows that fail go through the Transaction
+    model, for its error text.
+    
+    Args:
+        source: CSV content as a string, or an iterable of CSV lines
+        
+    Returns:
+        TransactionFrame with one row per CSV data row
+        
+    Raises:
+        ValueError: If CSV schema is invalid or data is malformed
+    """
+    return next(iter_csv_frames(source))
+
+
+def iter_csv_frames(
+    source: Union[str, Iterable[str]],
+    max_rows: Optional[int] = None
+) -> Iterator[TransactionFrame]:
+    """
+    Parse CSV content into consecutive TransactionFrames of about max_rows rows.
+    
+    Same parsing and validation as parse_csv_frame, which is this with no
+    max_rows (one frame of all rows). With max_rows, a frame is yielded as
+    soon as it has at least max_rows rows (whole parse batches of
+    PARSE_BATCH_ROWS), so only one frame is held at a time; every frame has
+    its own account dictionary. Errors are raised before the frame holding
+    the bad rows is yielded, with rows numbered from the start of the file.
+    
+    Args:
+        source: CSV content as a string, or an iterable of CSV lines
+        max_rows: Rows per frame (None: all rows in one frame)
+        
+    Yields:
+        TransactionFrames in file order, at least one
+        
+    Raises:
+        ValueError: If CSV schema is invalid or data is malformed
+    """
+    lines = iter(StringIO(source) if isinstance(source, str) else source)
+    reader = csv.reader(lines)
     
     # Validate header
-    if not reader.fieldnames:
+    header = next(reader, None)
+    if not header:
         raise ValueError("CSV file is empty or has no header row")
     
-    validate_csv_columns(list(reader.fieldnames))
+    validate_csv_columns(header)
     
-    transactions = []
-    errors = []
+    # Normalize column names (case-insensitive) to positions
+    field_map = {col.lower().strip(): position for position, col in enumerate(header)}
+    positions = [field_map[col] for col in REQUIRED_COLUMNS]
     
-    # Normalize column names (case-insensitive)
-    field_map = {col.lower().strip(): col for col in reader.fieldnames}
+    builder = TransactionFrameBuilder()
+    errors: list[tuple[int, str]] = []
     
-    for row_num, row in enumerate(reader, start=2):  # Start at 2 (header is row 1)
-        try:
-            # Extract values using normalized mapping
-            transaction_id = row[field_map['transaction_id']].strip()
-            sender_id = row[field_map['sender_id']].strip()
-            receiver_id = row[field_map['receiver_id']].strip()
-            amount = float(row[field_map['amount']])
-            timestamp_str = row[field_map['timestamp']].strip()
-            
-            # Parse timestamp
-            timestamp = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S')
-            
-            transaction = Transaction(
-                transaction_id=transaction_id,
-                sender_id=sender_id,
-                receiver_id=receiver_id,
-                amount=amount,
-                timestamp=timestamp
-            )
-            transactions.append(transaction)
-            
-        except (ValueError, KeyError) as e:
-            errors.append(f"Row {row_num}: {str(e)}")
+    row_num = 1  # header is row 1
+    rows_yielded = 0
+    quoted = False
+    while True:
+        if max_rows is not None and len(builder) >= max_rows:
+            _raise_row_errors(errors)
+            rows_yielded += len(builder)
+            yield builder.build()
+            builder = TransactionFrameBuilder()
+        chunk = list(islice(reader if quoted else lines, PARSE_BATCH_ROWS))
+        if not chunk:
+            break
+        if quoted:
+            rows = [row for row in chunk if row]  # skip blank lines
+        elif '"' in ''.join(chunk):
+            # Quoted fields may hold commas or span lines; csv.reader takes
+            # over from the start of this chunk for the rest of the file
+            quoted = True
+            reader = csv.reader(chain(chunk, lines))
+            continue
+        else:
+            columns = _split_columns(chunk, len(header), positions)
+            if columns is not None:
+                _parse_columns(columns, row_num + 1, np.zeros(len(chunk), dtype=bool), builder, errors)
+                row_num += len(chunk)
+                continue
+            # No quoting: a plain split gives the same fields as csv.reader
+            rows = [line.rstrip('\r\n').split(',') for line in chunk]
+            rows = [row for row in rows if row != ['']]  # skip blank lines
+        _parse_rows(rows, row_num + 1, positions, builder, errors)
+        row_num += len(rows)
     
-    if errors:
-        raise ValueError(f"CSV parsing errors:\n" + "\n".join(errors[:10]))
+    _raise_row_errors(errors)
     
-    if not transactions:
+    if not rows_yielded + len(builder):
         raise ValueError("No valid transactions found in CSV")
+    if len(builder):
+        yield builder.build()
+
+
+def _raise_row_errors(errors: list[tuple[int, str]]) -> None:
+    """Raise the first (up to 10) row errors collected, if any."""
+    if errors:
+        errors.sort(key=lambda error: error[0])
+        raise ValueError(f"CSV parsing errors:\n" + "\n".join(
+            f"Row {row_num}: {message}" for row_num, message in errors[:10]
+        ))
+
+
+def parse_csv_file(file: BinaryIO, encoding: str = 'utf-8') -> TransactionFrame:
+    """
+    Parse a binary CSV file object incrementally into a TransactionFrame.
+    
+    The file is decoded line by line as parse_csv_frame pulls batches, so
+    only one batch of text is held at a time instead of the raw bytes and
+    the decoded string of the whole upload. The file is left open.
+    
+    Args:
+        file: Readable binary file object positioned at the header row
+        encoding: Text encoding of the file
+        
+    Returns:
+        TransactionFrame with one row per CSV data row
+        
+    Raises:
+        ValueError: If CSV schema is invalid, data is malformed or the
+            file is not valid in the given encoding
+    """
+    text = TextIOWrapper(file, encoding=encoding, newline='')
+    try:
+        return parse_csv_frame(text)
+    finally:
+        text.detach()
+
+
+def _split_columns(
+    lines: list[str],
+    field_count: int,
+    positions: list[int]
+) -> Optional[list[list[str]]]:
+    """
+    Split unquoted lines straight into the required columns.
+    
+    Joins the lines into one string and splits it once, so no per-row list
+    is built. Only applies when every line has exactly field_count fields
+    and plain newline endings; returns None otherwise and the caller falls
+    back to splitting row by row.
+    """
+    text = ''.join(lines)
+    if '\r' in text:
+        text = text.replace('\r\n', '\n')
+        if '\r' in text:
+            return None
+    if text.count('\n') < len(lines) - 1:
+        return None
+    if set(map(str.count, lines, repeat(','))) != {field_count - 1}:
+        return None
+    if text.endswith('\n'):
+        text = text[:-1]
+    fields = text.replace('\n', ',').split(',')
+    if len(fields) != field_count * len(lines):
+        return None
+    return [[value.strip() for value in fields[position::field_count]] for position in positions]
+
+
+def _parse_rows(
+    rows: list[list[str]],
+    first_row_num: int,
+    positions: list[int],
+    builder: TransactionFrameBuilder,
+    errors: list[tuple[int, str]]
+) -> None:
+    """Check the column count of each row, then convert the batch by column."""
+    min_fields = max(positions) + 1
+    
+    bad = np.zeros(len(rows), dtype=bool)
+    if rows and min(map(len, rows)) < min_fields:
+        for index, row in enumerate(rows):
+            if len(row) < min_fields:
+                bad[index] = True
+                errors.append((
+                    first_row_num + index,
+                    f"expected at least {min_fields} columns, got {len(row)}"
+                ))
+                rows[index] = [''] * min_fields
+    
+    columns = [[row[position].strip() for row in rows] for position in positions]
+    _parse_columns(columns, first_row_num, bad, builder, errors)
+
+
+def _parse_columns(
+    columns: list[list[str]],
+    first_row_num: int,
+    bad: np.ndarray,
+    builder: TransactionFrameBuilder,
+    errors: list[tuple[int, str]]
+) -> None:
+    """
+    Convert one batch of raw columns and append it to builder.
+    
+    columns holds the stripped REQUIRED_COLUMNS fields in order; bad marks rows that
+    already have an error. Each bad row gets one error, from the first check
+    it fails, in the order the per-row parser used: column count, amount,
+    timestamp, amount > 0 and finite. Nothing is appended once any row has failed,
+    since the upload is rejected anyway.
+    """
+    transaction_ids, sender_ids, receiver_ids, raw_amounts, raw_timestamps = columns
+    count = len(raw_amounts)
+    
+    try:
+        amounts = np.fromiter(map(float, raw_amounts), dtype=np.float64, count=count)
+    except ValueError:
+        amounts = np.full(count, np.nan)
+        for index, value in enumerate(raw_amounts):
+            try:
+                amounts[index] = float(value)
+            except ValueError as e:
+                if not bad[index]:
+                    bad[index] = True
+                    errors.append((first_row_num + index, str(e)))
+    
+    timestamps = _parse_timestamps(raw_timestamps, first_row_num, bad, errors)
+    
+    # Batch validation: amount must be > 0 and finite (NaN fails both)
+    for index in np.flatnonzero(~((amounts > 0) & np.isfinite(amounts)) & ~bad).tolist():
+        bad[index] = True
+        errors.append((first_row_num + index, _amount_error(
+            transaction_ids[index], sender_ids[index], receiver_ids[index],
+            float(amounts[index]), int(timestamps[index])
+        )))
+    
+    if errors:
+        return
+    
+    builder.extend(transaction_ids, sender_ids, receiver_ids, amounts, timestamps)
+
+
+def _amount_error(
+    transaction_id: str,
+    sender_id: str,
+    receiver_id: str,
+    amount: float,
+    timestamp: int
+) -> str:
+    """
+    Error text for a row whose amount failed the batch check: the
+    Transaction model's own validation error, as per-row parsing reported it.
+    """
+    try:
+        Transaction(
+            transaction_id=transaction_id,
+            sender_id=sender_id,
+            receiver_id=receiver_id,
+            amount=amount,
+            timestamp=from_epoch_seconds(timestamp)
+        )
+    except ValidationError as e:
+        return str(e)
+    return f"amount: Input should be a finite number greater than 0 (got {amount})"
+
+
+def _parse_timestamps(
+    values: list[str],
+    first_row_num: int,
+    bad: np.ndarray,
+    errors: list[tuple[int, str]]
+) -> np.ndarray:
+    """
+    Convert 'YYYY-MM-DD HH:MM:SS' strings to epoch seconds.
+    
+    Strings of exactly that layout are split into digit fields through a
+    UCS-4 view of the batch and validated (month, day of month including
+    leap years, hour, minute, second) without leaving NumPy. The rest go
+    through datetime.strptime, which accepts the same inputs as before and
+    raises the same errors; failures are recorded against rows not already
+    marked bad.
+    """
+    count = len(values)
+    seconds = np.zeros(count, dtype=np.int64)
+    fixed = np.fromiter(map(len, values), dtype=np.int64, count=count) == 19
+    fixed_index = np.flatnonzero(fixed)
+    
+    if len(fixed_index):
+        text = values if len(fixed_index) == count else [values[i] for i in fixed_index.tolist()]
+        chars = np.array(text, dtype='U19').view(np.uint32).reshape(-1, 19).astype(np.int64)
+        digits = chars[:, _TIMESTAMP_DIGITS] - ord('0')
+        ok = ((digits >= 0) & (digits <= 9)).all(axis=1)
+        for position, separator in _TIMESTAMP_SEPARATORS.items():
+            ok &= chars[:, position] == ord(separator)
+        
+        year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+        month = digits[:, 4] * 10 + digits[:, 5]
+        day = digits[:, 6] * 10 + digits[:, 7]
+        hour = digits[:, 8] * 10 + digits[:, 9]
+        minute = digits[:, 10] * 10 + digits[:, 11]
+        second = digits[:, 12] * 10 + digits[:, 13]
+        
+        leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+        month_days = _DAYS_IN_MONTH[np.clip(month, 1, 12) - 1] + ((month == 2) & leap)
+        ok &= (
+            (year >= 1) & (month >= 1) & (month <= 12) & (day >= 1) & (day <= month_days)
+            & (hour <= 23) & (minute <= 59) & (second <= 59)
+        )
+        
+        # Days since 1970-01-01 for the proleptic Gregorian calendar
+        shifted_year = year - (month <= 2)
+        era = shifted_year // 400
+        year_of_era = shifted_year - era * 400
+        day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+        day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+        days = era * 146097 + day_of_era - 719468
+        
+        seconds[fixed_index] = days * 86400 + hour * 3600 + minute * 60 + second
+        fixed[fixed_index[~ok]] = False
+    
+    for index in np.flatnonzero(~fixed).tolist():
+        try:
+            seconds[index] = to_epoch_seconds(datetime.strptime(values[index], TIMESTAMP_FORMAT))
+        except ValueError as e:
+            if not bad[index]:
+                bad[index] = True
+                errors.append((first_row_num + index, str(e)))
     
-    return transactions
+    return seconds
@@ -0,0 +1,308 @@
+"""Binary transaction files: memory-mapped columnar storage of a TransactionFrame.
+
+Layout (little-endian), every section starting on a 64-byte boundary:
+
+    header      magic b'MMTX', format version (uint32), row count,
+                account count (uint64 each), first and last timestamp
+                (int64 epoch seconds), then (offset, size in bytes) of each
+                section below
+    accounts    account_offsets (int64, accounts + 1) and account_data
+                (UTF-8): the interned account IDs, sorted, so an account's
+                code is its rank in ID order
+    columns     sender, receiver (int32 account codes), timestamp (int64),
+                amount (float64), one value per row
+    tx ids      transaction_id_offsets (int64, rows + 1) and
+                transaction_id_data (UTF-8)
+
+Loading maps the file read-only and wraps the columns and transaction IDs
+as NumPy views of the mapping, so rows are paged in from the OS cache on
+demand instead of parsed or copied onto the heap; only the account IDs are
+decoded into a list.
+
+Usage:
+    python -m backend.utils.transaction_file transactions.csv transactions.mmtx
+"""
+import argparse
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import BinaryIO, Union
+
+import numpy as np
+
+from backend.models.frame import StringColumn, TransactionFrame
+from backend.utils.csv_parser import parse_csv_file
+
+MAGIC = b'MMTX'
+FORMAT_VERSION = 1
+
+# Section start alignment within the file
+ALIGNMENT = 64
+
+_HEADER = struct.Struct('<4sIQQqq')
+_SECTION = struct.Struct('<QQ')
+_SECTIONS = (
+    ('account_offsets', '<i8'),
+    ('account_data', 'u1'),
+    ('sender', '<i4'),
+    ('receiver', '<i4'),
+    ('timestamp', '<i8'),
+    ('amount', '<f8'),
+    ('transaction_id_offsets', '<i8'),
+    ('transaction_id_data', 'u1'),
+)
+_HEADER_SIZE = -(-(_HEADER.size + _SECTION.size * len(_SECTIONS)) // ALIGNMENT) * ALIGNMENT
+
+
+class TransactionFileHeader:
+    """Header of a binary transaction file."""
+
+    __slots__ = ('row_count', 'account_count', 'first_timestamp', 'last_timestamp', 'sections')
+
+    def __init__(
+        self,
+        row_count: int,
+        account_count: int,
+        first_timestamp: int,
+        last_timestamp: int,
+        sections: dict[str, tuple[int, int]]
+    ) -> None:
+        self.row_count = row_count
+        self.account_count = account_count
+        self.first_timestamp = first_timestamp  # epoch seconds (0 when empty)
+        self.last_timestamp = last_timestamp
+        self.sections = sections  # name -> (offset, size in bytes)
+
+    @classmethod
+    def unpack(cls, data: bytes) -> 'TransactionFileHeader':
+        """
+        Read a header from the start of a file.
+
+        Raises:
+            ValueError: If data does not start with a supported header
+        """
+        if len(data) < _HEADER_SIZE or data[:len(MAGIC)] != MAGIC:
+            raise ValueError("Not a binary transaction file")
+        _, version, row_count, account_count, first, last = _HEADER.unpack_from(data)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported transaction file version {version} (expected {FORMAT_VERSION})")
+        sections = {
+            name: _SECTION.unpack_from(data, _HEADER.size + i * _SECTION.size)
+            for i, (name, _) in enumerate(_SECTIONS)
+        }
+        return cls(row_count, account_count, first, last, sections)
+
+    def pack(self) -> bytes:
+        header = _HEADER.pack(
+            MAGIC, FORMAT_VERSION, self.row_count, self.account_count,
+            self.first_timestamp, self.last_timestamp
+        )
+        header += b''.join(_SECTION.pack(*self.sections[name]) for name, _ in _SECTIONS)
+        return header.ljust(_HEADER_SIZE, b'\0')
+
+
+def write_transaction_file(frame: TransactionFrame, path: Union[str, Path]) -> TransactionFileHeader:
+    """
+    Write frame as a binary transaction file.
+
+    Account codes are renumbered so the account dictionary is stored in
+    ID order. The file is written next to path and renamed into place, so
+    a reader never sees a partial file.
+
+    Args:
+        frame: Transactions to store
+        path: Output file
+
+    Returns:
+        Header of the written file
+
+    Complexity: O(n + a log a) for n rows and a accounts
+    """
+    account_ids = frame.account_ids
+    order = np.argsort(np.array(account_ids, dtype=str), kind='stable')
+    code = np.empty(len(order), dtype=np.int32)
+    code[order] = np.arange(len(order), dtype=np.int32)
+    account_data = [account_ids[i].encode('utf-8') for i in order.tolist()]
+    account_offsets = np.zeros(len(account_data) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, account_data), dtype=np.int64, count=len(account_data)), out=account_offsets[1:])
+
+    timestamp = frame.timestamp
+    columns = {
+        'account_offsets': account_offsets,
+        'account_data': np.frombuffer(b''.join(account_data), dtype=np.uint8),
+        'sender': code[frame.sender],
+        'receiver': code[frame.receiver],
+        'timestamp': timestamp,
+        'amount': frame.amount,
+        'transaction_id_offsets': frame.transaction_ids.offsets,
+        'transaction_id_data': frame.transaction_ids.data,
+    }
+
+    sections: dict[str, tuple[int, int]] = {}
+    position = _HEADER_SIZE
+    for name, dtype in _SECTIONS:
+        columns[name] = np.ascontiguousarray(columns[name], dtype=dtype)
+        sections[name] = (position, columns[name].nbytes)
+        position += -(-columns[name].nbytes // ALIGNMENT) * ALIGNMENT
+    header = TransactionFileHeader(
+        len(frame), len(account_ids),
+        int(timestamp.min()) if len(frame) else 0,
+        int(timestamp.max()) if len(frame) else 0,
+        sections
+    )
+
+    path = Path(path)
+    partial = path.with_name(path.name + '.partial')
+    try:
+        with open(partial, 'wb') as output:
+            output.write(header.pack())
+            for name, _ in _SECTIONS:
+                offset, size = sections[name]
+                output.seek(offset)
+                output.write(memoryview(columns[name]).cast('B'))
+            output.truncate(max(position, _HEADER_SIZE))
+        os.replace(partial, path)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    return header
+
+
+def load_transaction_file(source: Union[str, Path, BinaryIO], verify: bool = True) -> TransactionFrame:
+    """
+    Load a binary transaction file as a memory-mapped TransactionFrame.
+
+    The columns and transaction IDs are read-only views of a read-only
+    mapping of the file, which stays mapped while any of them is alive. A
+    file object without a file descriptor is read into memory instead.
+
+    Args:
+        source: Path, or binary file object holding the whole file
+        verify: Check every account code, amount and offset too, and that
+            the account IDs are sorted and unique (O(n)); the layout is
+            always checked
+
+    Returns:
+        TransactionFrame of the file's rows
+
+    Raises:
+        ValueError: If the file is not a valid transaction file
+    """
+    if isinstance(source, (str, Path)):
+        with open(source, 'rb') as file:
+            buffer = _map(file)
+    else:
+        source.seek(0)
+        buffer = _map(source)
+
+    header = TransactionFileHeader.unpack(buffer[:_HEADER_SIZE])
+    rows, accounts = header.row_count, header.account_count
+    expected = {
+        'account_offsets': accounts + 1, 'sender': rows, 'receiver': rows,
+        'timestamp': rows, 'amount': rows, 'transaction_id_offsets': rows + 1,
+    }
+    columns: dict[str, np.ndarray] = {}
+    for name, dtype in _SECTIONS:
+        offset, size = header.sections[name]
+        itemsize = np.dtype(dtype).itemsize
+        if offset + size > len(buffer) or size % itemsize or (
+            name in expected and size != expected[name] * itemsize
+        ):
+            raise ValueError(f"Corrupt transaction file: bad {name} section")
+        columns[name] = np.frombuffer(buffer, dtype=dtype, count=size // itemsize, offset=offset)
+
+    for strings in ('account', 'transaction_id'):
+        offsets, data = columns[f'{strings}_offsets'], columns[f'{strings}_data']
+        if offsets[0] != 0 or offsets[-1] != len(data) or (verify and np.any(np.diff(offsets) < 0)):
+            raise ValueError(f"Corrupt transaction file: bad {strings} offsets")
+    if verify and rows:
+        for name in ('sender', 'receiver'):
+            if columns[name].min() < 0 or columns[name].max() >= accounts:
+                raise ValueError(f"Corrupt transaction file: {name} code out of range")
+        amount = columns['amount']
+        if not np.all(np.isfinite(amount) & (amount > 0)):
+            raise ValueError("Corrupt transaction file: amounts must be positive and finite")
+        timestamp = columns['timestamp']
+        if timestamp.min() < header.first_timestamp or timestamp.max() > header.last_timestamp:
+            raise ValueError("Corrupt transaction file: timestamps outside the header's time range")
+
+    account_data = columns['account_data'].tobytes()
+    account_offsets = columns['account_offsets'].tolist()
+    account_ids = [
+        account_data[account_offsets[i]:account_offsets[i + 1]].decode('utf-8')
+        for i in range(accounts)
+    ]
+    # Graph node ranking and ring numbering rely on the dictionary being
+    # in ID order without duplicates, as write_transaction_file stores it
+    if verify and any(account_ids[i] >= account_ids[i + 1] for i in range(accounts - 1)):
+        raise ValueError("Corrupt transaction file: account IDs not sorted and unique")
+    return TransactionFrame(
+        account_ids,
+        columns['sender'],
+        columns['receiver'],
+        columns['timestamp'],
+        columns['amount'],
+        StringColumn(columns['transaction_id_data'], columns['transaction_id_offsets'])
+    )
+
+
+def read_transaction_file_header(path: Union[str, Path]) -> TransactionFileHeader:
+    """Header of a binary transaction file, without mapping the rest."""
+    with open(path, 'rb') as file:
+        return TransactionFileHeader.unpack(file.read(_HEADER_SIZE))
+
+
+def is_transaction_file(file: BinaryIO) -> bool:
+    """Whether file starts like a binary transaction file (the position is kept)."""
+    position = file.tell()
+    try:
+        return file.read(len(MAGIC)) == MAGIC
+    finally:
+        file.seek(position)
+
+
+def load_transactions(path: Union[str, Path], verify: bool = True) -> TransactionFrame:
+    """Load a binary transaction file (memory-mapped) or a CSV file, by content."""
+    with open(path, 'rb') as file:
+        if not is_transaction_file(file):
+            return parse_csv_file(file)
+    return load_transaction_file(path, verify=verify)
+
+
+def convert_csv(csv_path: Union[str, Path], output_path: Union[str, Path]) -> TransactionFileHeader:
+    """
+    Convert a CSV file in the upload schema to a binary transaction file.
+
+    Raises:
+        ValueError: If the CSV is invalid (as parse_csv_file)
+    """
+    with open(csv_path, 'rb') as file:
+        frame = parse_csv_file(file)
+    return write_transaction_file(frame, output_path)
+
+
+def _map(file: BinaryIO) -> Union[mmap.mmap, bytes]:
+    """Read-only mapping of the whole file, or its bytes if it cannot be mapped."""
+    try:
+        fileno = file.fileno()
+    except (AttributeError, OSError):
+        return file.read()
+    if os.fstat(fileno).st_size == 0:
+        return b''
+    return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Convert a transactions CSV to a binary transaction file.")
+    parser.add_argument("csv", type=Path, help="input CSV (transaction_id, sender_id, receiver_id, amount, timestamp)")
+    parser.add_argument("output", type=Path, help="binary transaction file to write")
+    args = parser.parse_args()
+
+    header = convert_csv(args.csv, args.output)
+    print(f"{args.output}: {header.row_count:,} transactions, {header.account_count:,} accounts, "
+          f"{args.output.stat().st_size / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Benchmark: fast-path CSV parsing vs. DictReader + strptime + pydantic.
+
+Generates CSV text in the upload schema and times the legacy parser (one
+csv.DictReader row, datetime.strptime and pydantic Transaction per row)
+against parse_csv_frame. The legacy parser is only run up to
+--legacy-max-rows; pass --rows 5000000 for the full-size comparison.
+
+Usage:
+    python benchmarks/bench_csv_parser.py [--rows 100000 1000000] [--legacy-max-rows 1000000]
+"""
+import argparse
+import csv
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from io import StringIO
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.models.transaction import Transaction
+from backend.utils.csv_parser import parse_csv_frame
+
+
+def generate_csv(rows: int, accounts: int, seed: int) -> str:
+    """CSV text with rows random transactions over 90 days."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    lines = ["transaction_id,sender_id,receiver_id,amount,timestamp"]
+    for i in range(rows):
+        timestamp = start + timedelta(seconds=rng.randrange(90 * 86400))
+        lines.append(
+            f"TXN_{i:08d},ACC_{rng.randrange(accounts):06d},ACC_{rng.randrange(accounts):06d},"
+            f"{rng.uniform(10, 5000):.2f},{timestamp:%Y-%m-%d %H:%M:%S}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def legacy_parse(file_content: str) -> list[Transaction]:
+    """Previous implementation, without its error collection."""
+    reader = csv.DictReader(StringIO(file_content))
+    field_map = {col.lower().strip(): col for col in reader.fieldnames}
+    return [
+        Transaction(
+            transaction_id=row[field_map['transaction_id']].strip(),
+            sender_id=row[field_map['sender_id']].strip(),
+            receiver_id=row[field_map['receiver_id']].strip(),
+            amount=float(row[field_map['amount']]),
+            timestamp=datetime.strptime(row[field_map['timestamp']].strip(), '%Y-%m-%d %H:%M:%S')
+        )
+        for row in reader
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--accounts", type=int, default=50_000)
+    parser.add_argument("--legacy-max-rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'MB':>7} {'legacy (s)':>11} {'fast (s)':>9} {'rows/s':>11} {'speedup':>8}")
+    for rows in args.rows:
+        content = generate_csv(rows, args.accounts, args.seed)
+
+        t0 = time.perf_counter()
+        frame = parse_csv_frame(content)
+        fast_time = time.perf_counter() - t0
+        assert len(frame) == rows
+
+        if rows <= args.legacy_max_rows:
+            t0 = time.perf_counter()
+            legacy = legacy_parse(content)
+            legacy_time = time.perf_counter() - t0
+            assert len(legacy) == rows
+            del legacy
+            legacy_col = f"{legacy_time:>11.2f}"
+            speedup_col = f"{legacy_time / fast_time:>7.1f}x"
+        else:
+            legacy_col = f"{'skipped':>11}"
+            speedup_col = f"{'-':>8}"
+
+        print(f"{rows:>9} {len(content) / 1e6:>7.1f} {legacy_col} {fast_time:>9.2f} "
+              f"{rows / fast_time:>11,.0f} {speedup_col}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark: DetectionSession appends vs. full re-detection.
+
+Seeds a session with a time-ordered history of random transactions, then
+appends small batches (the next transactions in time) and compares the
+time per append, and per result() (formatting every flagged account), with
+a full run_detection over the same history and batch. Results of both are
+checked to be equal.
+
+Usage:
+    python benchmarks/bench_detection_session.py [--history 100000 500000] [--batch 1000]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.models.frame import TransactionFrame
+from backend.services.detection_engine import run_detection
+from backend.services.detection_session import DetectionSession
+
+sys.path.insert(0, str(Path(__file__).parent))
+from bench_transaction_frame import generate_transactions
+
+
+def without_timing(result) -> dict:
+    data = result.model_dump()
+    data['summary'].pop('processing_time_seconds')
+    return data
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--history", type=int, nargs="+", default=[100_000, 500_000])
+    parser.add_argument("--batch", type=int, default=1_000)
+    parser.add_argument("--appends", type=int, default=5)
+    parser.add_argument("--accounts", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'history':>9} {'batch':>6} {'seed (s)':>9} {'append (s)':>11} "
+          f"{'result (s)':>11} {'full (s)':>9} {'speedup':>8}")
+    for history in args.history:
+        transactions = generate_transactions(
+            history + args.batch * args.appends, args.accounts, args.seed
+        )
+        transactions.sort(key=lambda transaction: transaction.timestamp)
+
+        session = DetectionSession()
+        t0 = time.perf_counter()
+        session.append(TransactionFrame.from_transactions(transactions[:history]))
+        seed_time = time.perf_counter() - t0
+
+        append_time = result_time = full_time = 0.0
+        end = history
+        for _ in range(args.appends):
+            batch = TransactionFrame.from_transactions(transactions[end:end + args.batch])
+            end += args.batch
+
+            t0 = time.perf_counter()
+            session.append(batch)
+            t1 = time.perf_counter()
+            incremental = session.result()
+            append_time += t1 - t0
+            result_time += time.perf_counter() - t1
+
+            frame = TransactionFrame.from_transactions(transactions[:end])
+            t0 = time.perf_counter()
+            full = run_detection(frame)
+            full_time += time.perf_counter() - t0
+            assert without_timing(incremental) == without_timing(full)
+
+        append_time /= args.appends
+        result_time /= args.appends
+        full_time /= args.appends
+        print(f"{history:>9} {args.batch:>6} {seed_time:>9.2f} {append_time:>11.3f} "
+              f"{result_time:>11.3f} {full_time:>9.2f} "
+              f"{full_time / (append_time + result_time):>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
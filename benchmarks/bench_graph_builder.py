@@ -0,0 +1,64 @@
+"""Benchmark: CSR TransactionGraph vs. networkx DiGraph.
+
+Builds the transaction graph for random transactions as the compact CSR
+TransactionGraph and as the networkx DiGraph the detectors used before
+(same per-edge aggregates, via TransactionGraph.to_networkx), and reports
+memory held by each, build time, and the time of one full neighbor sweep
+(every node's successors, as the cycle and shell searches do).
+
+Usage:
+    python benchmarks/bench_graph_builder.py [--rows 100000 1000000] [--accounts 50000]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.models.frame import TransactionFrame
+from backend.services.graph_builder import build_transaction_graph
+
+sys.path.insert(0, str(Path(__file__).parent))
+from bench_transaction_frame import generate_transactions, traced_bytes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--accounts", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'edges':>9} {'nx MB':>7} {'csr MB':>7} {'nx build (s)':>13} "
+          f"{'csr build (s)':>14} {'nx sweep (s)':>13} {'csr sweep (s)':>14}")
+    for rows in args.rows:
+        frame = TransactionFrame.from_transactions(
+            generate_transactions(rows, args.accounts, args.seed)
+        )
+
+        t0 = time.perf_counter()
+        graph, csr_bytes = traced_bytes(lambda: build_transaction_graph(frame))
+        csr_build = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        G, nx_bytes = traced_bytes(graph.to_networkx)
+        nx_build = time.perf_counter() - t0 + csr_build
+
+        t0 = time.perf_counter()
+        nx_seen = sum(len(list(G.successors(node))) for node in sorted(G.nodes()))
+        nx_sweep = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        csr_seen = sum(len(successors) for successors in graph.successor_lists())
+        csr_sweep = time.perf_counter() - t0
+        assert nx_seen == csr_seen == graph.number_of_edges()
+
+        print(f"{rows:>9} {graph.number_of_edges():>9} {nx_bytes / 1e6:>7.1f} {csr_bytes / 1e6:>7.1f} "
+              f"{nx_build:>13.2f} {csr_build:>14.2f} {nx_sweep:>13.2f} {csr_sweep:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
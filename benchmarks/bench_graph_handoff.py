@@ -0,0 +1,114 @@
+"""Benchmark: handing the detection inputs to worker processes.
+
+Compares pickling the graph, frame and activity index (what a process
+pool does with task arguments) against a shared-memory GraphSnapshot,
+which is copied once and then attached to by every worker:
+
+- pickle: bytes sent per worker, and the time to pickle and unpickle them;
+  every worker then holds a copy of its own
+- snapshot: block size, the time to create it, and the time a worker
+  takes to attach (unpickling the snapshot handle); all workers share it
+
+Then checks, in a fresh process, that pool workers (fork and spawn) attach
+to a snapshot without the resource tracker reporting a leaked shared
+memory segment when that process exits (see graph_snapshot._open_block).
+
+Usage:
+    python benchmarks/bench_graph_handoff.py [--rows 100000 1000000] [--workers 4]
+"""
+import argparse
+import multiprocessing
+import pickle
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.services.activity_index import build_activity_index
+from backend.services.graph_builder import build_transaction_graph
+from backend.services.graph_snapshot import GraphSnapshot
+
+sys.path.insert(0, str(Path(__file__).parent))
+from synthetic_data import generate_dataset
+
+
+def attached_edges(snapshot: GraphSnapshot) -> int:
+    """Runs in a worker: the snapshot arrives attached."""
+    return snapshot.graph.number_of_edges()
+
+
+def attach_in_workers(workers: int, seed: int) -> None:
+    """Create a snapshot and have a pool of each start method attach to it; runs in a fresh process."""
+    G = build_transaction_graph(generate_dataset(10_000, seed=seed).to_frame())
+    for method in ('fork', 'spawn'):
+        with GraphSnapshot.create(G) as snapshot:
+            context = multiprocessing.get_context(method)
+            with ProcessPoolExecutor(workers, mp_context=context) as executor:
+                edges = list(executor.map(attached_edges, [snapshot] * workers * 2))
+            assert edges == [G.number_of_edges()] * workers * 2
+
+
+def check_attach(workers: int, seed: int) -> None:
+    """
+    Fail unless attach_in_workers exits cleanly, with nothing on stderr:
+    the resource tracker reports leaked segments (and errors such as an
+    unregistered block being unlinked) there.
+    """
+    check = subprocess.run(
+        [sys.executable, __file__, "--attach-check", "--workers", str(workers), "--seed", str(seed)],
+        capture_output=True, text=True
+    )
+    if check.returncode or check.stderr.strip():
+        sys.exit(f"Attaching in worker processes failed or leaked a segment:\n{check.stderr}")
+    print(f"{workers} workers (fork and spawn) attached to snapshots without leaking a segment")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--attach-check", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.attach_check:
+        attach_in_workers(args.workers, args.seed)
+        return
+
+    print(f"{'rows':>10} {'method':<9} {'MB':>8} {'setup':>8} {'per worker':>11} {f'{args.workers} workers':>10}")
+    for rows in args.rows:
+        frame = generate_dataset(rows, seed=args.seed).to_frame()
+        G = build_transaction_graph(frame)
+        activity = build_activity_index(frame)
+
+        t0 = time.perf_counter()
+        payload = pickle.dumps((G, frame, activity), protocol=pickle.HIGHEST_PROTOCOL)
+        dumped = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        pickle.loads(payload)
+        loaded = time.perf_counter() - t0
+        per_worker = dumped + loaded
+        print(f"{rows:>10,} {'pickle':<9} {len(payload) / 1e6:>8.1f} {0:>7.3f}s "
+              f"{per_worker:>10.3f}s {per_worker * args.workers:>9.3f}s")
+
+        t0 = time.perf_counter()
+        with GraphSnapshot.create(G, activity) as snapshot:
+            created = time.perf_counter() - t0
+            handle = pickle.dumps(snapshot)
+            t0 = time.perf_counter()
+            attached = pickle.loads(handle)
+            per_worker = time.perf_counter() - t0
+            assert attached.graph.number_of_edges() == G.number_of_edges()
+            print(f"{'':>10} {'snapshot':<9} {snapshot.nbytes / 1e6:>8.1f} {created:>7.3f}s "
+                  f"{per_worker:>10.3f}s {created + per_worker * args.workers:>9.3f}s")
+
+    check_attach(args.workers, args.seed)
+
+
+if __name__ == "__main__":
+    main()
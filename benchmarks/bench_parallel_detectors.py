@@ -0,0 +1,69 @@
+"""Benchmark: detectors run one after another vs. alongside the cycle search.
+
+Times run_detection_output on synthetic data with parallel_detectors off
+and on (the size and core thresholds are lifted, so small inputs and
+small machines run in parallel as well) and checks that both give the same output. The overlap needs spare
+cores: on a single core the parallel run only adds process start-up and
+pickling.
+
+Usage:
+    python benchmarks/bench_parallel_detectors.py [--rows 100000 1000000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.services import detection_engine
+from backend.services.detection_engine import run_detection_output
+
+sys.path.insert(0, str(Path(__file__).parent))
+from synthetic_data import generate_dataset
+
+
+def best_run(frame, parallel: bool, repeat: int, cycle_workers: int) -> tuple[float, dict, dict]:
+    """Fastest of repeat runs: (seconds, output without timing, detector stage seconds)."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output, diagnostics = run_detection_output(
+            frame, cycle_workers=cycle_workers, parallel_detectors=parallel
+        )
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best[0]:
+            stages = {
+                stage: diagnostics.stages[stage].seconds for stage in ('cycles', 'smurfing', 'shells')
+            }
+            best = (elapsed, output, stages)
+    best[1]['summary'].pop('processing_time_seconds')
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--cycle-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    detection_engine.PARALLEL_MIN_TRANSACTIONS = 0
+    detection_engine.PARALLEL_MIN_CORES = 0
+    print(f"{os.cpu_count()} CPU cores, cycle search on {args.cycle_workers} worker(s)")
+    print(f"{'rows':>10} {'serial':>9} {'parallel':>9} {'speedup':>8}  detector stages (s)")
+    for rows in args.rows:
+        frame = generate_dataset(rows, seed=args.seed).to_frame()
+        serial, serial_output, stages = best_run(frame, False, args.repeat, args.cycle_workers)
+        parallel, parallel_output, _ = best_run(frame, True, args.repeat, args.cycle_workers)
+        assert serial_output == parallel_output, "parallel detectors changed the output"
+        detail = ", ".join(f"{stage} {seconds:.3f}" for stage, seconds in stages.items())
+        print(f"{rows:>10,} {serial:>8.3f}s {parallel:>8.3f}s {serial / parallel:>7.2f}x  {detail}")
+
+
+if __name__ == "__main__":
+    main()
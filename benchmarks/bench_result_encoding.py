@@ -0,0 +1,79 @@
+"""Benchmark: encoding a large detection result for the response body.
+
+Builds detector outputs with many flagged accounts and rings, then times
+three ways of turning them into response bytes, with peak traced memory:
+
+- model: format_detection_result, model_dump() and json.dumps, the path
+  the API used to take (one pydantic object per account and ring)
+- plain: build_detection_output and encode_json (orjson when installed)
+- ndjson: build_detection_output and iter_ndjson, consuming the chunks as
+  a streamed response does
+
+Usage:
+    python benchmarks/bench_result_encoding.py [--flagged 100000 500000] [--rings 50000]
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.services.json_formatter import (
+    build_detection_output, encode_json, format_detection_result, iter_ndjson, orjson
+)
+
+
+def detector_outputs(flagged: int, rings: int, seed: int) -> tuple:
+    """format_detection_result arguments with flagged scored accounts, half of them in rings."""
+    rng = random.Random(seed)
+    account_ids = [f"ACC_{i:08d}" for i in range(flagged * 2)]
+    scores = {account_ids[i]: float(rng.choice((30, 40, 50, 60, 70, 80, 90, 100))) for i in range(flagged)}
+    members = account_ids[:flagged // 2]
+    per_ring = max(3, len(members) // max(rings, 1))
+    cycles = {
+        f"RING_{r + 1:03d}": [members[start:start + per_ring]]
+        for r, start in enumerate(range(0, len(members) - per_ring + 1, per_ring))
+    }
+    ring_map = {account: ring_id for ring_id, chains in cycles.items() for account in chains[0]}
+    return account_ids, [], cycles, {}, {}, scores, ring_map, 1.0
+
+
+def run(name: str, encode, args: tuple) -> None:
+    """Time encode(args), then measure its peak traced memory in a second run."""
+    t0 = time.perf_counter()
+    size = encode(args)
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    encode(args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {name:<7} {elapsed:>8.2f}s {peak / 1e6:>9.1f} MB peak {size / 1e6:>8.1f} MB body")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--flagged", type=int, nargs="+", default=[100_000, 500_000])
+    parser.add_argument("--rings", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"JSON encoder: {'orjson' if orjson is not None else 'json (standard library)'}")
+    for flagged in args.flagged:
+        inputs = detector_outputs(flagged, args.rings, args.seed)
+        print(f"\n{flagged} flagged accounts")
+        run("model", lambda a: len(json.dumps(
+            format_detection_result(*a).model_dump(),
+            ensure_ascii=False, allow_nan=False, indent=None, separators=(',', ':')
+        ).encode('utf-8')), inputs)
+        run("plain", lambda a: len(encode_json(build_detection_output(*a))), inputs)
+        run("ndjson", lambda a: sum(map(len, iter_ndjson(build_detection_output(*a)))), inputs)
+
+
+if __name__ == "__main__":
+    main()
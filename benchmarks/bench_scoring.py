@@ -0,0 +1,112 @@
+"""Benchmark: indexed suspicion scoring vs. per-account payroll rescans.
+
+Generates transactions where many accounts exceed the high-velocity
+threshold, then times the legacy scorer (the payroll check rescans every
+transaction for each high-velocity account) against
+calculate_suspicion_scores, which indexes transactions per account once.
+The legacy scorer is quadratic, so it is only run up to --legacy-max-rows.
+
+Usage:
+    python benchmarks/bench_scoring.py [--rows 10000 100000 1000000] [--tx-per-account 200]
+"""
+import argparse
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.models.transaction import Transaction
+from backend.services import scoring
+from backend.services.scoring import calculate_suspicion_scores
+
+
+def generate_transactions(rows: int, accounts: int, seed: int) -> list[Transaction]:
+    """Transactions over three days between a pool of accounts, so busy accounts are high velocity."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    span_seconds = 3 * 86400
+    account_ids = [f"ACC_{i:06d}" for i in range(accounts)]
+    return [
+        Transaction.model_construct(
+            transaction_id=f"TXN_{i:08d}",
+            sender_id=rng.choice(account_ids),
+            receiver_id=rng.choice(account_ids),
+            amount=round(rng.uniform(10, 5000), 2),
+            timestamp=start + timedelta(seconds=rng.randrange(span_seconds)),
+        )
+        for i in range(rows)
+    ]
+
+
+def legacy_velocity_scores(transactions: list[Transaction]) -> dict[str, float]:
+    """Previous implementation: velocity per account, then a full payroll rescan per account."""
+    account_tx_map: dict[str, list[Transaction]] = defaultdict(list)
+    for tx in transactions:
+        account_tx_map[tx.sender_id].append(tx)
+        account_tx_map[tx.receiver_id].append(tx)
+
+    velocity_scores: dict[str, float] = {}
+    for account_id, tx_list in account_tx_map.items():
+        if len(tx_list) < scoring.HIGH_VELOCITY_THRESHOLD:
+            continue
+        tx_list_sorted = sorted(tx_list, key=lambda t: t.timestamp)
+        time_span = (tx_list_sorted[-1].timestamp - tx_list_sorted[0].timestamp).total_seconds() / 86400
+        if time_span == 0:
+            time_span = 1
+        if len(tx_list) / time_span >= scoring.HIGH_VELOCITY_THRESHOLD:
+            velocity_scores[account_id] = scoring.SCORE_HIGH_VELOCITY
+
+    scores: dict[str, float] = {}
+    for account_id, velocity_score in velocity_scores.items():
+        account_txs = [
+            tx for tx in transactions
+            if tx.sender_id == account_id or tx.receiver_id == account_id
+        ]
+        monthly_counts: dict[str, int] = defaultdict(int)
+        for tx in account_txs:
+            monthly_counts[tx.timestamp.strftime('%Y-%m')] += 1
+        # Payroll needs >= 3 months; this data spans days, so nothing is exempt
+        if len(monthly_counts) < 3:
+            scores[account_id] = velocity_score
+    return scores
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--tx-per-account", type=int, default=200)
+    parser.add_argument("--legacy-max-rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'high-velocity':>14} {'legacy (s)':>11} {'indexed (s)':>12} {'speedup':>8}")
+    for rows in args.rows:
+        accounts = max(1, rows // args.tx_per_account)
+        transactions = generate_transactions(rows, accounts, args.seed)
+
+        t0 = time.perf_counter()
+        scores = calculate_suspicion_scores(None, transactions, {}, {}, {}, {})
+        indexed_time = time.perf_counter() - t0
+
+        if rows <= args.legacy_max_rows:
+            t0 = time.perf_counter()
+            expected = legacy_velocity_scores(transactions)
+            legacy_time = time.perf_counter() - t0
+            assert scores == expected, "score mismatch"
+            legacy_col = f"{legacy_time:>11.3f}"
+            speedup_col = f"{legacy_time / indexed_time:>7.1f}x"
+        else:
+            legacy_col = f"{'skipped':>11}"
+            speedup_col = f"{'-':>8}"
+
+        print(f"{rows:>9} {len(scores):>14} {legacy_col} {indexed_time:>12.3f} {speedup_col}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Benchmark: in-memory vs. sharded (out-of-core) detection of one file.
+
+Writes a CSV of several independent synthetic datasets (each its own set of
+weakly connected components), then detects it in a fresh process each way
+and reports wall time and peak resident memory, of the detecting process
+and of its largest worker process:
+
+- memory: load_transactions and run_detection_output, the whole frame and
+  graph in one process
+- sharded: run_sharded_detection_output, one chunk at a time while
+  partitioning, then one shard per worker
+
+Usage:
+    python benchmarks/bench_sharding.py [--rows 2000000] [--components 8] [--shard-rows 500000] [--workers 1]
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+sys.path.insert(0, str(Path(__file__).parent))
+from synthetic_data import generate_dataset
+
+
+def write_csv(path: Path, rows: int, components: int, seed: int) -> None:
+    """components datasets of rows / components transactions, with disjoint account and transaction IDs."""
+    with open(path, 'w', newline='') as output:
+        for part in range(components):
+            chunks = generate_dataset(rows // components, seed=seed + part).iter_csv()
+            header = next(chunks)
+            if part == 0:
+                output.write(header)
+            for chunk in chunks:
+                output.write(chunk.replace('ACC_', f'P{part}_').replace('TXN_', f'T{part}_'))
+
+
+def detect(mode: str, path: str, shard_rows: int, workers: int) -> dict:
+    """Detect path one way; runs in a fresh process."""
+    start = time.perf_counter()
+    if mode == 'memory':
+        from backend.services.detection_engine import run_detection_output
+        from backend.utils.transaction_file import load_transactions
+
+        output, _ = run_detection_output(load_transactions(path), cycle_workers=workers)
+    else:
+        from backend.services.sharding import run_sharded_detection_output
+
+        output, _ = run_sharded_detection_output(path, workers=workers, shard_rows=shard_rows)
+    return {
+        'seconds': time.perf_counter() - start,
+        'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3,
+        'worker_rss_mb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1e3,
+        'flagged': output['summary']['suspicious_accounts_flagged'],
+        'rings': output['summary']['fraud_rings_detected'],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--components", type=int, default=8, help="independent datasets in the file")
+    parser.add_argument("--shard-rows", type=int, default=500_000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--detect", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.detect:
+        print(json.dumps(detect(*args.detect, args.shard_rows, args.workers)))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'transactions.csv'
+        write_csv(path, args.rows, args.components, args.seed)
+        print(f"{args.rows:,} rows in {args.components} datasets, {path.stat().st_size / 1e6:.0f} MB CSV; "
+              f"shard rows {args.shard_rows:,}, workers {args.workers}")
+        print(f"{'mode':<8} {'time':>8} {'peak RSS':>10} {'worker RSS':>11} {'flagged':>8} {'rings':>6}")
+        for mode in ('memory', 'sharded'):
+            run = json.loads(subprocess.run(
+                [sys.executable, __file__, '--detect', mode, str(path),
+                 '--shard-rows', str(args.shard_rows), '--workers', str(args.workers)],
+                check=True, capture_output=True, text=True
+            ).stdout)
+            print(f"{mode:<8} {run['seconds']:>7.1f}s {run['rss_mb']:>8.0f}MB {run['worker_rss_mb']:>9.0f}MB "
+                  f"{run['flagged']:>8,} {run['rings']:>6,}")
+
+
+if __name__ == "__main__":
+    main()
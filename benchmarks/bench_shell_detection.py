@@ -0,0 +1,103 @@
+"""Benchmark: single-pass pruned shell DFS vs. one full DFS per chain length.
+
+Builds graphs where a few exchange-like hubs connect to most accounts and
+low-degree shell chains are planted alongside them, then times the legacy
+approach (a full DFS per target length, degree check only on complete
+chains) against detect_layered_shells.
+
+Usage:
+    python benchmarks/bench_shell_detection.py [--accounts 20 40 80] [--hubs 3]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import networkx as nx
+
+from backend.services.shell_detection import detect_layered_shells
+
+
+def build_hub_graph(accounts: int, hubs: int, chains: int, seed: int) -> nx.DiGraph:
+    """Accounts that all trade with a handful of hubs, plus planted 3-5 hop shell chains."""
+    rng = random.Random(seed)
+    G = nx.DiGraph()
+    hub_ids = [f"HUB_{i:02d}" for i in range(hubs)]
+    account_ids = [f"ACC_{i:06d}" for i in range(accounts)]
+    for account in account_ids:
+        for hub in rng.sample(hub_ids, k=min(2, hubs)):
+            G.add_edge(account, hub)
+            G.add_edge(hub, rng.choice(account_ids))
+    for c in range(chains):
+        length = rng.randint(3, 5)
+        chain = [f"SHELL_{c:04d}_{i}" for i in range(length)]
+        nx.add_path(G, chain)
+    return G
+
+
+def legacy_shells(G: nx.DiGraph, min_chain_length: int = 3, max_intermediate_degree: int = 3) -> int:
+    """Previous implementation: full DFS per length, degree check on complete chains."""
+    found = 0
+    visited_chains: set[tuple] = set()
+    potential_starts = [n for n in sorted(G.nodes()) if G.out_degree(n) > 0]
+
+    def dfs_chain(current: str, chain: list[str], target_length: int):
+        nonlocal found
+        if len(chain) == target_length:
+            chain_tuple = tuple(sorted(chain))
+            if chain_tuple not in visited_chains:
+                valid = all(
+                    G.in_degree(chain[i]) + G.out_degree(chain[i]) <= max_intermediate_degree
+                    for i in range(1, target_length - 1)
+                )
+                if valid:
+                    found += 1
+                    visited_chains.add(chain_tuple)
+            return
+        for neighbor in G.successors(current):
+            if neighbor not in chain:
+                chain.append(neighbor)
+                dfs_chain(neighbor, chain, target_length)
+                chain.pop()
+
+    for length in range(min_chain_length, min_chain_length + 3):
+        for start in potential_starts:
+            dfs_chain(start, [start], length)
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", type=int, nargs="+", default=[20, 40, 80])
+    parser.add_argument("--hubs", type=int, default=3)
+    parser.add_argument("--chains", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'accounts':>9} {'edges':>7} {'chains':>7} "
+          f"{'legacy (s)':>11} {'pruned (s)':>11} {'speedup':>8}")
+    for accounts in args.accounts:
+        G = build_hub_graph(accounts, args.hubs, args.chains, args.seed)
+
+        t0 = time.perf_counter()
+        expected = legacy_shells(G)
+        legacy_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        rings = detect_layered_shells(G)
+        pruned_time = time.perf_counter() - t0
+
+        found = sum(len(chains) for chains in rings.values())
+        assert found == expected, f"chain count mismatch: {found} != {expected}"
+        speedup = legacy_time / pruned_time if pruned_time > 0 else float("inf")
+        print(f"{accounts:>9} {G.number_of_edges():>7} {found:>7} "
+              f"{legacy_time:>11.3f} {pruned_time:>11.3f} {speedup:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
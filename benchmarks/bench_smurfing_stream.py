@@ -0,0 +1,64 @@
+"""Benchmark: streaming smurfing detector memory and throughput.
+
+Feeds an endless-style stream of random time-ordered transactions (a fixed
+number per day, generated on the fly) through StreamingSmurfingDetector
+and reports throughput, alerts, retained window entries and peak traced
+memory. Memory should stay flat as the stream grows, since only the last
+time_window_hours of activity is kept.
+
+Usage:
+    python benchmarks/bench_smurfing_stream.py [--rows 100000 1000000] [--per-day 20000]
+"""
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.services.smurfing_stream import StreamingSmurfingDetector
+
+
+def stream(rows: int, accounts: int, per_day: int, seed: int):
+    """Yield (sender_id, receiver_id, timestamp) in time order, one at a time."""
+    rng = random.Random(seed)
+    start = 1_704_067_200  # 2024-01-01
+    step = 86400 / per_day
+    for i in range(rows):
+        yield (
+            f"ACC_{rng.randrange(accounts):06d}",
+            f"ACC_{rng.randrange(accounts):06d}",
+            start + int(i * step),
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--accounts", type=int, default=5_000)
+    parser.add_argument("--per-day", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'tx/s':>9} {'alerts':>7} {'entries':>8} {'accounts':>9} {'peak MB':>8}")
+    for rows in args.rows:
+        detector = StreamingSmurfingDetector()
+        alerts = 0
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        for sender_id, receiver_id, timestamp in stream(rows, args.accounts, args.per_day, args.seed):
+            alerts += len(detector.update(sender_id, receiver_id, timestamp))
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"{rows:>9} {rows / elapsed:>9.0f} {alerts:>7} {len(detector):>8} "
+              f"{detector.account_count:>9} {peak / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
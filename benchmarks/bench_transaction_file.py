@@ -0,0 +1,76 @@
+"""Benchmark: parsing a transactions CSV vs. loading a binary transaction file.
+
+Writes synthetic data both as CSV and in the memory-mapped binary format
+(backend/utils/transaction_file.py), then times loading each into a
+TransactionFrame, with the heap memory traced while loading. The binary
+columns are views of the OS page cache, so they do not count as heap.
+
+Usage:
+    python benchmarks/bench_transaction_file.py [--rows 1000000 5000000] [--dir /tmp]
+"""
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.utils.csv_parser import parse_csv_file
+from backend.utils.transaction_file import load_transaction_file, write_transaction_file
+
+sys.path.insert(0, str(Path(__file__).parent))
+from synthetic_data import generate_dataset
+
+
+def timed(load) -> tuple[float, float]:
+    """Seconds of one load(), then its peak traced heap (MB) in a second run."""
+    start = time.perf_counter()
+    load()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 5_000_000])
+    parser.add_argument("--dir", type=Path, default=Path(tempfile.gettempdir()))
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'format':<16} {'file MB':>8} {'load':>8} {'heap MB':>8}")
+    for rows in args.rows:
+        dataset = generate_dataset(rows, seed=args.seed)
+        csv_path = args.dir / f"bench_transactions_{rows}.csv"
+        binary_path = args.dir / f"bench_transactions_{rows}.mmtx"
+        try:
+            with open(csv_path, 'w', newline='') as output:
+                dataset.write_csv(output)
+            write_transaction_file(dataset.to_frame(), binary_path)
+            del dataset
+
+            def parse_csv():
+                with open(csv_path, 'rb') as file:
+                    parse_csv_file(file)
+
+            for name, path, load in (
+                ("csv", csv_path, parse_csv),
+                ("binary", binary_path, lambda: load_transaction_file(binary_path)),
+                ("binary, no verify", binary_path, lambda: load_transaction_file(binary_path, verify=False)),
+            ):
+                elapsed, heap = timed(load)
+                print(f"{rows:>10,} {name:<16} {path.stat().st_size / 1e6:>8.1f} {elapsed:>7.3f}s {heap:>8.1f}")
+        finally:
+            csv_path.unlink(missing_ok=True)
+            binary_path.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
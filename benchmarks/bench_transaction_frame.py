@@ -0,0 +1,80 @@
+"""Benchmark: memory per transaction, pydantic objects vs. TransactionFrame.
+
+Generates random transactions and measures, with tracemalloc, the bytes
+held by a list of pydantic Transaction objects and by the equivalent
+columnar TransactionFrame, then times run_detection on the frame.
+
+Usage:
+    python benchmarks/bench_transaction_frame.py [--rows 100000 1000000] [--accounts 20000]
+"""
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.models.frame import TransactionFrame
+from backend.models.transaction import Transaction
+from backend.services.detection_engine import run_detection
+
+
+def generate_transactions(rows: int, accounts: int, seed: int) -> list[Transaction]:
+    """Random transactions over 30 days between a pool of accounts."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    account_ids = [f"ACC_{i:06d}" for i in range(accounts)]
+    return [
+        Transaction(
+            transaction_id=f"TXN_{i:08d}",
+            sender_id=rng.choice(account_ids),
+            receiver_id=rng.choice(account_ids),
+            amount=round(rng.uniform(10, 5000), 2),
+            timestamp=start + timedelta(seconds=rng.randrange(30 * 86400)),
+        )
+        for i in range(rows)
+    ]
+
+
+def traced_bytes(build):
+    """Return (result, bytes still allocated by build())."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--accounts", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'pydantic B/tx':>14} {'frame B/tx':>11} {'ratio':>7} {'detect (s)':>11}")
+    for rows in args.rows:
+        transactions, pydantic_bytes = traced_bytes(
+            lambda: generate_transactions(rows, args.accounts, args.seed)
+        )
+        frame, frame_bytes = traced_bytes(lambda: TransactionFrame.from_transactions(transactions))
+        del transactions
+
+        t0 = time.perf_counter()
+        run_detection(frame)
+        detect_time = time.perf_counter() - t0
+
+        print(f"{rows:>9} {pydantic_bytes / rows:>14.0f} {frame_bytes / rows:>11.0f} "
+              f"{pydantic_bytes / frame_bytes:>6.1f}x {detect_time:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark: peak memory of whole-body vs. streaming upload parsing.
+
+Writes a CSV in the upload schema to a temporary file and measures, with
+tracemalloc, the peak memory of the previous /api/detect path (read the
+whole body, decode it, parse the string) against parse_csv_file reading
+the binary file incrementally.
+
+Usage:
+    python benchmarks/bench_upload_memory.py [--rows 100000 1000000]
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.utils.csv_parser import parse_csv_file, parse_csv_frame
+
+sys.path.insert(0, str(Path(__file__).parent))
+from bench_csv_parser import generate_csv
+
+
+def whole_body(path: str):
+    with open(path, 'rb') as f:
+        contents = f.read()
+    file_content = contents.decode('utf-8')
+    return parse_csv_frame(file_content)
+
+
+def streaming(path: str):
+    with open(path, 'rb') as f:
+        return parse_csv_file(f)
+
+
+def traced_peak(parse, path: str):
+    """Return (seconds, peak bytes) for parse(path)."""
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    frame = parse(path)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del frame
+    return elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--accounts", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'file MB':>8} {'whole peak MB':>14} {'stream peak MB':>15} "
+          f"{'whole (s)':>10} {'stream (s)':>11}")
+    for rows in args.rows:
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        try:
+            with os.fdopen(fd, 'w', newline='') as f:
+                f.write(generate_csv(rows, args.accounts, args.seed))
+            size = os.path.getsize(path)
+
+            whole_time, whole_peak = traced_peak(whole_body, path)
+            stream_time, stream_peak = traced_peak(streaming, path)
+        finally:
+            os.unlink(path)
+
+        print(f"{rows:>9} {size / 1e6:>8.1f} {whole_peak / 1e6:>14.1f} {stream_peak / 1e6:>15.1f} "
+              f"{whole_time:>10.2f} {stream_time:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
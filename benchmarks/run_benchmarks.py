@@ -0,0 +1,184 @@
+"""Stage-level benchmark of run_detection on synthetic data, with baseline checks.
+
+For each size, generates a seeded dataset (see synthetic_data.py), writes
+it as CSV in memory and runs it as the API does: parse, then
+run_detection_output, whose diagnostics give the time of every pipeline
+stage (frame, build graph, activity index, cycles, smurfing, shells,
+rings, scoring and formatting), then encoding the JSON body. Every stage's
+best time over --repeat runs, its throughput (input rows per second) and
+its peak traced memory (one extra run under tracemalloc, read at each
+stage's end through the on_stage hook; worker processes are not traced)
+are printed and can be saved as JSON.
+
+With --baseline, each stage is compared with the same size in a results
+file saved earlier; a stage is flagged as a regression when it is more
+than --tolerance slower (and at least --min-seconds), or uses more than
+--tolerance more peak memory (and at least --min-mb). The exit status is
+1 if anything regressed, so the runner can gate CI.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--rows 10000 100000 1000000] [--save results.json]
+    python benchmarks/run_benchmarks.py --baseline results.json [--tolerance 0.2]
+"""
+import argparse
+import gc
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Optional
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.services.detection_engine import run_detection_output
+from backend.services.json_formatter import encode_json
+from backend.utils.csv_parser import parse_csv_file
+
+sys.path.insert(0, str(Path(__file__).parent))
+from synthetic_data import generate_dataset
+
+
+def detect(csv_bytes: bytes, cycle_workers: Optional[int], memory: bool) -> tuple[dict, dict, bool]:
+    """
+    Parse, detect and encode csv_bytes once.
+
+    Returns:
+        (seconds per stage, in pipeline order; peak traced MB per stage
+        when memory, with tracemalloc running; whether the detectors ran
+        in parallel)
+    """
+    peak_mb: dict[str, float] = {}
+
+    def on_stage(stage: str) -> None:
+        # Not counted in the stage times (see run_detection_output)
+        if memory:
+            peak_mb[stage] = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.reset_peak()
+        gc.collect()
+
+    gc.collect()
+    if memory:
+        tracemalloc.reset_peak()
+    t0 = time.perf_counter()
+    frame = parse_csv_file(io.BytesIO(csv_bytes))
+    seconds = {'parse': time.perf_counter() - t0}
+    on_stage('parse')
+
+    output, diagnostics = run_detection_output(frame, cycle_workers=cycle_workers, on_stage=on_stage)
+    seconds.update((stage, timing.seconds) for stage, timing in diagnostics.stages.items())
+    del frame
+
+    t0 = time.perf_counter()
+    encode_json(output)
+    seconds['encoding'] = time.perf_counter() - t0
+    on_stage('encoding')
+    return seconds, peak_mb, diagnostics.parallel_detectors
+
+
+def measure(csv_bytes: bytes, rows: int, repeat: int, memory: bool,
+            cycle_workers: Optional[int]) -> tuple[dict[str, dict], bool]:
+    """Best time, throughput and (optionally) peak traced memory per stage, and whether the detectors ran in parallel."""
+    best: dict[str, float] = {}
+    for _ in range(repeat):
+        seconds, _, parallel = detect(csv_bytes, cycle_workers, memory=False)
+        for name, value in seconds.items():
+            best[name] = min(best.get(name, value), value)
+
+    peak_mb: dict[str, float] = {}
+    if memory:
+        tracemalloc.start()
+        _, peak_mb, _ = detect(csv_bytes, cycle_workers, memory=True)
+        tracemalloc.stop()
+
+    return {
+        name: {
+            'seconds': seconds,
+            'rows_per_second': rows / seconds if seconds else None,
+            'peak_mb': peak_mb.get(name),
+        }
+        for name, seconds in best.items()
+    }, parallel
+
+
+def compare(current: dict, baseline: dict, tolerance: float,
+            min_seconds: float, min_mb: float) -> dict[str, list[str]]:
+    """Regressions per stage of one size: a list of messages (empty if none)."""
+    problems: dict[str, list[str]] = {}
+    for name, stats in current.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        messages = []
+        slower = stats['seconds'] - base['seconds']
+        if slower > base['seconds'] * tolerance and slower >= min_seconds:
+            messages.append(f"time {base['seconds']:.3f}s -> {stats['seconds']:.3f}s")
+        if stats['peak_mb'] is not None and base.get('peak_mb') is not None:
+            grown = stats['peak_mb'] - base['peak_mb']
+            if grown > base['peak_mb'] * tolerance and grown >= min_mb:
+                messages.append(f"memory {base['peak_mb']:.1f}MB -> {stats['peak_mb']:.1f}MB")
+        problems[name] = messages
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per size; the best time counts")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--cycle-workers", type=int, default=None)
+    parser.add_argument("--save", type=Path, default=None, help="write results as JSON")
+    parser.add_argument("--baseline", type=Path, default=None, help="results JSON to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown/growth")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="ignore smaller slowdowns")
+    parser.add_argument("--min-mb", type=float, default=5.0, help="ignore smaller memory growth")
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text())['results'] if args.baseline else {}
+    results: dict[str, dict] = {}
+    regressed = False
+
+    for rows in args.rows:
+        dataset = generate_dataset(rows, seed=args.seed)
+        csv_bytes = "".join(dataset.iter_csv()).encode('utf-8')
+        del dataset
+        stats, parallel = measure(csv_bytes, rows, args.repeat, not args.no_memory, args.cycle_workers)
+        results[str(rows)] = stats
+
+        problems = compare(stats, baseline.get(str(rows), {}), args.tolerance,
+                           args.min_seconds, args.min_mb)
+        detectors = "smurfing and shells in parallel with cycles" if parallel else "detectors in series"
+        print(f"\n{rows} rows ({len(csv_bytes) / 1e6:.0f} MB CSV; {detectors})")
+        print(f"{'stage':<15} {'seconds':>9} {'rows/s':>12} {'peak MB':>8} {'baseline':>9}  status")
+        for name, stage in stats.items():
+            base = baseline.get(str(rows), {}).get(name)
+            peak = f"{stage['peak_mb']:.1f}" if stage['peak_mb'] is not None else "-"
+            base_seconds = f"{base['seconds']:.3f}" if base else "-"
+            status = "REGRESSION: " + "; ".join(problems[name]) if problems.get(name) else ""
+            regressed |= bool(problems.get(name))
+            print(f"{name:<15} {stage['seconds']:>9.3f} {stage['rows_per_second'] or 0:>12,.0f} "
+                  f"{peak:>8} {base_seconds:>9}  {status}")
+        total = sum(stage['seconds'] for stage in stats.values())
+        print(f"{'total':<15} {total:>9.3f} {rows / total:>12,.0f}")
+
+    if args.save:
+        args.save.write_text(json.dumps({
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'seed': args.seed,
+            'results': results,
+        }, indent=2))
+        print(f"\nSaved results to {args.save}")
+
+    if regressed:
+        print("\nRegressions against the baseline (see above)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""Seeded synthetic transactions with planted laundering patterns.
+
+Background traffic is transfers between accounts and a few habitual
+counterparties each, customer payments into merchant hubs and monthly
+salary runs out of payroll hubs, spread over a number of days. Like real
+payment graphs it is sparse, so few accounts sit on cycles by chance. Into
+that traffic the generator plants, per 10,000 rows:
+
+- cycles: 3-5 fresh accounts passing a shrinking amount around a loop
+  within hours
+- fan-in / fan-out bursts: a fresh account receiving from (or sending to)
+  more distinct background accounts than the smurfing threshold in two days
+- layered shells: a background account moving money to another through
+  1-3 fresh intermediates that do nothing else
+
+Rows are sorted by timestamp, like a bank export. The same arguments
+always give the same data. Works from 10k to 10M+ rows: generation is
+vectorized and CSV output is written in chunks.
+
+Usage:
+    python benchmarks/synthetic_data.py --rows 1000000 --output transactions.csv [--planted planted.json]
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Iterator, Optional, TextIO
+
+import numpy as np
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.models.frame import StringColumn, TransactionFrame
+
+# Planted patterns per 10,000 rows (at least one of each)
+PATTERNS_PER_10K_ROWS = {'cycles': 5, 'fan_in': 2, 'fan_out': 2, 'shells': 4}
+
+# Habitual counterparties per background account
+CONTACTS_PER_ACCOUNT = 3
+
+# Distinct counterparties in a planted burst: above the default smurfing threshold
+BURST_MIN_COUNTERPARTIES = 12
+BURST_MAX_COUNTERPARTIES = 20
+
+START_TIMESTAMP = 1_704_067_200  # 2024-01-01 00:00:00
+CSV_HEADER = "transaction_id,sender_id,receiver_id,amount,timestamp\n"
+
+
+class SyntheticDataset:
+    """
+    Generated transactions as columns, plus the planted patterns.
+
+    sender / receiver index into account_ids; timestamp is epoch seconds.
+    planted maps 'cycles' and 'shells' to lists of account ID lists,
+    'fan_in' / 'fan_out' to the burst accounts and 'hubs' to the hubs.
+    """
+
+    __slots__ = ('account_ids', 'sender', 'receiver', 'timestamp', 'amount', 'planted')
+
+    def __init__(
+        self,
+        account_ids: list[str],
+        sender: np.ndarray,
+        receiver: np.ndarray,
+        timestamp: np.ndarray,
+        amount: np.ndarray,
+        planted: dict
+    ) -> None:
+        self.account_ids = account_ids
+        self.sender = sender
+        self.receiver = receiver
+        self.timestamp = timestamp
+        self.amount = amount
+        self.planted = planted
+
+    def __len__(self) -> int:
+        return len(self.sender)
+
+    def transaction_id(self, row: int) -> str:
+        return f"TXN_{row:09d}"
+
+    def to_frame(self) -> TransactionFrame:
+        """TransactionFrame of the data, interning only the accounts that occur (in ID order)."""
+        used, codes = np.unique(np.concatenate((self.sender, self.receiver)), return_inverse=True)
+        codes = codes.astype(np.int32)
+        return TransactionFrame(
+            account_ids=[self.account_ids[account] for account in used.tolist()],
+            sender=codes[:len(self)],
+            receiver=codes[len(self):],
+            timestamp=self.timestamp.copy(),
+            amount=self.amount.copy(),
+            transaction_ids=StringColumn.from_strings(map(self.transaction_id, range(len(self))))
+        )
+
+    def iter_csv(self, chunk_rows: int = 1_000_000) -> Iterator[str]:
+        """CSV text in the upload schema: the header, then chunk_rows rows at a time."""
+        yield CSV_HEADER
+        account_ids = self.account_ids
+        for start in range(0, len(self), chunk_rows):
+            stop = min(start + chunk_rows, len(self))
+            timestamps = np.char.replace(
+                np.datetime_as_string(self.timestamp[start:stop].astype('datetime64[s]')), 'T', ' '
+            ).tolist()
+            yield "".join(
+                f"TXN_{row:09d},{account_ids[sender]},{account_ids[receiver]},{amount:.2f},{timestamp}\n"
+                for row, sender, receiver, amount, timestamp in zip(
+                    range(start, stop), self.sender[start:stop].tolist(),
+                    self.receiver[start:stop].tolist(), self.amount[start:stop].tolist(), timestamps
+                )
+            )
+
+    def write_csv(self, file: TextIO) -> None:
+        for chunk in self.iter_csv():
+            file.write(chunk)
+
+
+def generate_dataset(
+    rows: int,
+    accounts: Optional[int] = None,
+    seed: int = 42,
+    days: int = 30,
+    merchant_fraction: float = 0.25,
+    payroll_fraction: float = 0.05
+) -> SyntheticDataset:
+    """
+    Generate rows transactions with planted patterns.
+
+    Args:
+        rows: Total number of transactions
+        accounts: Background accounts, hubs included (default: rows // 10; at least 100)
+        seed: Random seed
+        days: Time span of the data (at least 3)
+        merchant_fraction: Share of background rows paid into merchant hubs
+        payroll_fraction: Share of background rows paid out of payroll hubs
+
+    Returns:
+        SyntheticDataset sorted by timestamp
+    """
+    rng = np.random.default_rng(seed)
+    accounts = max(100, accounts or rows // 10)
+    span = max(days, 3) * 86400
+    merchants = np.arange(max(1, accounts // 1000))
+    payrolls = np.arange(len(merchants), len(merchants) + max(1, accounts // 5000))
+    hubs = np.concatenate((merchants, payrolls))
+    people = len(hubs)  # accounts from here on are ordinary customers
+
+    senders: list[np.ndarray] = []
+    receivers: list[np.ndarray] = []
+    timestamps: list[np.ndarray] = []
+    amounts: list[np.ndarray] = []
+    planted: dict = {'cycles': [], 'fan_in': [], 'fan_out': [], 'shells': [], 'hubs': hubs.tolist()}
+    next_account = accounts  # fresh accounts for planted patterns
+
+    def fresh(count: int) -> np.ndarray:
+        nonlocal next_account
+        block = np.arange(next_account, next_account + count)
+        next_account += count
+        return block
+
+    def add(sender, receiver, timestamp, amount) -> None:
+        senders.append(np.asarray(sender, dtype=np.int64))
+        receivers.append(np.asarray(receiver, dtype=np.int64))
+        timestamps.append(np.asarray(timestamp, dtype=np.int64))
+        amounts.append(np.asarray(amount, dtype=np.float64))
+
+    scale = max(1, rows // 10_000)
+    for _ in range(PATTERNS_PER_10K_ROWS['cycles'] * scale):
+        members = fresh(int(rng.integers(3, 6)))
+        start = int(rng.integers(0, span - 86400))
+        hops = len(members)
+        add(
+            members, np.roll(members, -1),
+            start + np.cumsum(rng.integers(600, 6 * 3600, hops)),
+            rng.uniform(5_000, 50_000) * np.cumprod(rng.uniform(0.95, 0.98, hops))
+        )
+        planted['cycles'].append(members.tolist())
+
+    for direction in ('fan_in', 'fan_out'):
+        for _ in range(PATTERNS_PER_10K_ROWS[direction] * scale):
+            account = fresh(1)
+            count = int(rng.integers(BURST_MIN_COUNTERPARTIES, BURST_MAX_COUNTERPARTIES + 1))
+            counterparties = people + rng.choice(accounts - people, count, replace=False)
+            same = np.full(count, account[0])
+            start = int(rng.integers(0, span - 2 * 86400))
+            pair = (counterparties, same) if direction == 'fan_in' else (same, counterparties)
+            add(*pair, start + np.sort(rng.integers(0, 2 * 86400, count)), rng.uniform(500, 9_500, count))
+            planted[direction].append(int(account[0]))
+
+    for _ in range(PATTERNS_PER_10K_ROWS['shells'] * scale):
+        ends = people + rng.choice(accounts - people, 2, replace=False)
+        chain = np.concatenate(([ends[0]], fresh(int(rng.integers(1, 4))), [ends[1]]))
+        start = int(rng.integers(0, span - 86400))
+        hops = len(chain) - 1
+        add(
+            chain[:-1], chain[1:],
+            start + np.cumsum(rng.integers(1800, 6 * 3600, hops)),
+            rng.uniform(10_000, 90_000) * np.cumprod(rng.uniform(0.97, 0.995, hops))
+        )
+        planted['shells'].append(chain.tolist())
+
+    # Background traffic fills the remaining rows
+    background = max(0, rows - sum(len(block) for block in senders))
+    # Hubs only receive (merchants) or only send (payroll)
+    contacts = rng.integers(people, accounts, (accounts, CONTACTS_PER_ACCOUNT))
+    sender = rng.integers(people, accounts, background)
+    receiver = contacts[sender, rng.integers(0, CONTACTS_PER_ACCOUNT, background)]
+    timestamp = rng.integers(0, span, background)
+    kind = rng.random(background)
+
+    to_merchant = kind < merchant_fraction
+    receiver[to_merchant] = rng.choice(merchants, int(to_merchant.sum()))
+
+    # Salaries go out on the first day of each 30-day period
+    payroll = (kind >= merchant_fraction) & (kind < merchant_fraction + payroll_fraction)
+    n_payroll = int(payroll.sum())
+    sender[payroll] = rng.choice(payrolls, n_payroll)
+    periods = max(1, span // (30 * 86400))
+    timestamp[payroll] = rng.integers(0, periods, n_payroll) * 30 * 86400 + rng.integers(0, 86400, n_payroll)
+
+    receiver = np.where(receiver == sender, people + (receiver + 1 - people) % (accounts - people), receiver)
+    add(sender, receiver, timestamp, rng.lognormal(5.0, 1.2, background))
+
+    sender = np.concatenate(senders)
+    receiver = np.concatenate(receivers)
+    timestamp = np.concatenate(timestamps) + START_TIMESTAMP
+    amount = np.maximum(np.round(np.concatenate(amounts), 2), 0.01)
+    order = np.argsort(timestamp, kind='stable')
+
+    account_ids = [f"ACC_{account:08d}" for account in range(next_account)]
+    for key in ('cycles', 'shells'):
+        planted[key] = [[account_ids[account] for account in members] for members in planted[key]]
+    for key in ('fan_in', 'fan_out', 'hubs'):
+        planted[key] = [account_ids[account] for account in planted[key]]
+
+    return SyntheticDataset(
+        account_ids, sender[order], receiver[order], timestamp[order], amount[order], planted
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--accounts", type=int, default=None)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, required=True, help="CSV file to write")
+    parser.add_argument("--planted", type=Path, default=None, help="JSON file for the planted patterns")
+    args = parser.parse_args()
+
+    dataset = generate_dataset(args.rows, args.accounts, args.seed, args.days)
+    with open(args.output, 'w', newline='') as file:
+        dataset.write_csv(file)
+    if args.planted is not None:
+        args.planted.write_text(json.dumps(dataset.planted, indent=2))
+
+    counts = ", ".join(f"{len(value)} {key}" for key, value in dataset.planted.items())
+    print(f"Wrote {len(dataset)} rows to {args.output} ({counts})")
+
+
+if __name__ == "__main__":
+    main()
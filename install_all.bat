@@ -12,7 +12,7 @@ if not exist venv (
 echo [Backend] Installing Python packages...
 call venv\Scripts\activate.bat
 python -m pip install --upgrade pip --quiet
-python -m pip install fastapi uvicorn[standard] python-multipart pydantic networkx python-dateutil
+python -m pip install fastapi uvicorn[standard] python-multipart pydantic networkx python-dateutil numpy
 
 echo.
 echo [Frontend] Installing Node packages...
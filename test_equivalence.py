@@ -0,0 +1,383 @@
+"""Check the detectors against the original networkx implementation.
+
+The detectors and scoring were rewritten for speed; this script keeps the
+original (networkx, per-transaction) versions as references and checks
+that the current code finds the same patterns on sample_transactions.csv,
+synthetic datasets and small random graphs:
+
+- cycles: the same set of cycles (up to rotation); rings are their
+  connected components (the original assigned a cycle bridging two rings
+  to the first, the union-find grouping merges them)
+- shells: the same account sets (the chain reported for a set is now the
+  first in lexicographic order rather than in networkx edge order), each
+  a valid chain
+- smurfing: the same flagged accounts, counts and windows
+- scoring: the original scoring gives the same scores for the same
+  patterns, and every account gets the same score and detected patterns
+  end to end
+- sharding: run_sharded_detection_output gives run_detection_output's
+  output when the file is split into several shards and read in several
+  chunks (so components span chunks), in this process and in a worker
+  pool; the pool spawns its workers (max_tasks_per_child), hence the
+  __main__ guard
+
+Usage:
+    python test_equivalence.py
+"""
+import random
+import sys
+import tempfile
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / 'benchmarks'))
+
+import networkx as nx
+
+from backend.models.frame import TransactionFrame
+from backend.services.activity_index import build_activity_index
+from backend.services.cycle_detection import detect_cycles
+from backend.services.detection_engine import DETECTION_PARAMETERS, run_detection, run_detection_output
+from backend.services.graph_builder import build_transaction_graph
+from backend.services.scoring import calculate_suspicion_scores
+from backend.services.shell_detection import detect_layered_shells
+from backend.services.sharding import run_sharded_detection_output
+from backend.services.smurfing_detection import detect_smurfing
+from backend.utils.csv_parser import parse_csv_frame
+from backend.utils.transaction_file import write_transaction_file
+from synthetic_data import generate_dataset
+
+PARAMS = DETECTION_PARAMETERS
+
+
+# --- Original implementations (networkx graph, Transaction lists) ---
+
+def reference_graph(transactions) -> nx.DiGraph:
+    G = nx.DiGraph()
+    for tx in transactions:
+        G.add_edge(tx.sender_id, tx.receiver_id)
+    return G
+
+
+def reference_cycles(G: nx.DiGraph, bounded: bool) -> list[list[str]]:
+    """Every cycle of 3-5 accounts; bounded passes the length bound to networkx (same cycles, less work)."""
+    min_length, max_length = PARAMS['cycle_min_length'], PARAMS['cycle_max_length']
+    found = nx.simple_cycles(G, length_bound=max_length) if bounded else nx.simple_cycles(G)
+    return [cycle for cycle in found if min_length <= len(cycle) <= max_length]
+
+
+def reference_smurfing(transactions) -> dict[str, dict]:
+    threshold, hours = PARAMS['smurfing_threshold'], PARAMS['smurfing_time_window_hours']
+    results: dict[str, dict] = {}
+    by_receiver = defaultdict(list)
+    by_sender = defaultdict(list)
+    for tx in transactions:
+        by_receiver[tx.receiver_id].append(tx)
+        by_sender[tx.sender_id].append(tx)
+    for pattern_type, groups, counterparty in (
+        ('fan_in', by_receiver, 'sender_id'), ('fan_out', by_sender, 'receiver_id')
+    ):
+        for account_id, tx_list in groups.items():
+            if account_id in results:
+                continue
+            tx_list = sorted(tx_list, key=lambda t: t.timestamp)
+            for i, start_tx in enumerate(tx_list):
+                window_start = start_tx.timestamp
+                window_end = window_start + timedelta(hours=hours)
+                unique = set()
+                for tx in tx_list[i:]:
+                    if tx.timestamp > window_end:
+                        break
+                    unique.add(getattr(tx, counterparty))
+                if len(unique) >= threshold:
+                    results[account_id] = {
+                        'account_id': account_id,
+                        'pattern_type': pattern_type,
+                        'pattern_label': f'{pattern_type}_{threshold}_{hours}h',
+                        'count': len(unique),
+                        'time_window_start': window_start,
+                        'time_window_end': window_end
+                    }
+                    break
+    return results
+
+
+def reference_shells(G: nx.DiGraph) -> list[list[str]]:
+    min_length, max_degree = PARAMS['shell_min_chain_length'], PARAMS['shell_max_intermediate_degree']
+    chains: list[list[str]] = []
+    visited: set[tuple] = set()
+
+    def dfs(current: str, chain: list[str], target_length: int) -> None:
+        if len(chain) == target_length:
+            key = tuple(sorted(chain))
+            if key not in visited and all(
+                G.in_degree(node) + G.out_degree(node) <= max_degree for node in chain[1:-1]
+            ):
+                chains.append(chain.copy())
+                visited.add(key)
+            return
+        for neighbor in G.successors(current):
+            if neighbor not in chain:
+                chain.append(neighbor)
+                dfs(neighbor, chain, target_length)
+                chain.pop()
+
+    for length in range(min_length, min_length + 3):
+        for start in sorted(G.nodes()):
+            if G.out_degree(start) > 0:
+                dfs(start, [start], length)
+    return chains
+
+
+def reference_scores(transactions, cycles, smurfing, shells) -> dict[str, float]:
+    patterns = reference_patterns(cycles, smurfing, shells)
+    scores: dict[str, float] = defaultdict(float)
+    for account_id, labels in patterns.items():
+        for label in labels:
+            if label.startswith('cycle_length_'):
+                scores[account_id] += 40
+            elif label.startswith('layered_shell_'):
+                scores[account_id] += 25
+            elif label == 'smurfing':
+                scores[account_id] += 30
+
+    by_account = defaultdict(list)
+    for tx in transactions:
+        by_account[tx.sender_id].append(tx)
+        by_account[tx.receiver_id].append(tx)
+    for account_id, tx_list in by_account.items():
+        if len(tx_list) < 50:
+            continue
+        tx_list = sorted(tx_list, key=lambda t: t.timestamp)
+        span = (tx_list[-1].timestamp - tx_list[0].timestamp).total_seconds() / 86400 or 1
+        if len(tx_list) / span >= 50 and not reference_is_payroll(account_id, transactions):
+            scores[account_id] += 15
+    return {account_id: min(score, 100.0) for account_id, score in scores.items()}
+
+
+def reference_patterns(cycles, smurfing, shells) -> dict[str, set[str]]:
+    patterns: dict[str, set[str]] = defaultdict(set)
+    for cycle in cycles:
+        for account_id in cycle:
+            patterns[account_id].add(f"cycle_length_{len(cycle)}")
+    for account_id, info in smurfing.items():
+        patterns[account_id].add(info['pattern_label'])
+    for chain in shells:
+        for account_id in chain:
+            patterns[account_id].add(f"layered_shell_{len(chain)}hop")
+    return patterns
+
+
+def reference_is_payroll(account_id: str, transactions) -> bool:
+    account_txs = [tx for tx in transactions if account_id in (tx.sender_id, tx.receiver_id)]
+    if len(account_txs) < 10:
+        return False
+    monthly = defaultdict(int)
+    for tx in account_txs:
+        monthly[tx.timestamp.strftime('%Y-%m')] += 1
+    if len(monthly) < 3:
+        return False
+    counts = list(monthly.values())
+    avg = sum(counts) / len(counts)
+    std = (sum((c - avg) ** 2 for c in counts) / len(counts)) ** 0.5
+    return std / avg < 0.3
+
+
+# --- Comparison ---
+
+class Case:
+    """One dataset: the frame, the same rows as Transactions, and both graphs."""
+
+    def __init__(self, name: str, frame: TransactionFrame, bounded: bool = False) -> None:
+        self.name = name
+        self.frame = frame
+        self.bounded = bounded
+        self.transactions = frame.to_transactions()
+        self.reference = reference_graph(self.transactions)
+        self.graph = build_transaction_graph(frame)
+        # Outputs of the current detectors, filled in by the checks
+        self.found: dict[str, object] = {}
+
+
+def rotate(cycle) -> tuple:
+    """Cycle as a tuple starting at its smallest account."""
+    start = cycle.index(min(cycle))
+    return tuple(cycle[start:]) + tuple(cycle[:start])
+
+
+def components(groups) -> set[frozenset]:
+    """Account sets of the connected components of groups (union-find)."""
+    parent: dict[str, str] = {}
+
+    def find(node: str) -> str:
+        while parent.setdefault(node, node) != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for group in groups:
+        for node in group[1:]:
+            parent[find(node)] = find(group[0])
+    members = defaultdict(set)
+    for node in parent:
+        members[find(node)].add(node)
+    return {frozenset(nodes) for nodes in members.values()}
+
+
+def ring_members(rings: dict[str, list[list[str]]]) -> set[frozenset]:
+    return {frozenset(account for group in ring for account in group) for ring in rings.values()}
+
+
+def check_cycles(case: Case) -> str:
+    cycles = detect_cycles(case.graph, PARAMS['cycle_min_length'], PARAMS['cycle_max_length'], workers=1)
+    found = [cycle for ring in cycles.values() for cycle in ring]
+    expected = reference_cycles(case.reference, case.bounded)
+    assert sorted(map(rotate, found)) == sorted(map(rotate, expected)), f"{case.name}: cycles differ"
+    assert ring_members(cycles) == components(expected), f"{case.name}: cycle rings differ"
+    case.found['cycles'] = cycles
+    return f"{len(found)} cycles"
+
+
+def check_shells(case: Case) -> str:
+    shells = detect_layered_shells(
+        case.graph, PARAMS['shell_min_chain_length'], PARAMS['shell_max_intermediate_degree']
+    )
+    found = [chain for ring in shells.values() for chain in ring]
+    expected = reference_shells(case.reference)
+    assert sorted(map(sorted, found)) == sorted(map(sorted, expected)), f"{case.name}: shell chains differ"
+    for chain in found:
+        assert all(case.reference.has_edge(a, b) for a, b in zip(chain, chain[1:])), \
+            f"{case.name}: invalid chain {chain}"
+    assert ring_members(shells) == components(expected), f"{case.name}: shell rings differ"
+    case.found['shells'] = shells
+    return f"{len(found)} shell chains"
+
+
+def check_smurfing(case: Case) -> str:
+    smurfing = detect_smurfing(
+        case.graph, case.frame, PARAMS['smurfing_threshold'], PARAMS['smurfing_time_window_hours'],
+        activity=build_activity_index(case.frame)
+    )
+    assert smurfing == reference_smurfing(case.transactions), f"{case.name}: smurfing differs"
+    case.found['smurfing'] = smurfing
+    return f"{len(smurfing)} smurfing"
+
+
+def check_scoring(case: Case) -> str:
+    cycles, shells, smurfing = case.found['cycles'], case.found['shells'], case.found['smurfing']
+    scores = calculate_suspicion_scores(case.graph, case.frame, cycles, smurfing, shells, {})
+    expected = reference_scores(
+        case.transactions,
+        [cycle for ring in cycles.values() for cycle in ring],
+        smurfing,
+        [chain for ring in shells.values() for chain in ring]
+    )
+    assert scores == {a: s for a, s in expected.items() if s}, f"{case.name}: scores differ"
+
+    # End to end: every account's score and patterns, as the original pipeline reported them
+    expected_cycles = reference_cycles(case.reference, case.bounded)
+    cycle_members = {account for cycle in expected_cycles for account in cycle}
+    kept_chains = [chain for chain in reference_shells(case.reference) if cycle_members.isdisjoint(chain)]
+    expected_smurfing = reference_smurfing(case.transactions)
+    expected = reference_scores(case.transactions, expected_cycles, expected_smurfing, kept_chains)
+    patterns = reference_patterns(expected_cycles, expected_smurfing, kept_chains)
+    result = run_detection(case.frame, cycle_workers=1)
+    assert {
+        account.account_id: (account.suspicion_score, account.detected_patterns)
+        for account in result.suspicious_accounts
+    } == {
+        account_id: (round(score, 1), sorted(patterns[account_id]))
+        for account_id, score in expected.items() if score > 0
+    }, f"{case.name}: suspicious accounts differ"
+    return f"{len(scores)} scored accounts"
+
+
+def check_sharding(case: Case) -> str:
+    expected, _ = run_detection_output(case.frame, cycle_workers=1)
+    del expected['summary']['processing_time_seconds']
+    rows = len(case.frame)
+    # Several shards (unless one component holds most rows), and chunks
+    # small enough that components span them
+    options = {'shard_rows': max(rows // 5, 1), 'chunk_rows': max(rows // 7, 1)}
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'transactions.mmtx'
+        write_transaction_file(case.frame, path)
+        # A pool for the larger datasets only; each shard spawns a fresh worker
+        for workers in (1, 2) if rows >= 10_000 else (1,):
+            output, diagnostics = run_sharded_detection_output(
+                path, workers=workers, max_memory_mb=1024 if workers > 1 else None, work_dir=directory, **options
+            )
+            del output['summary']['processing_time_seconds']
+            assert output == expected, f"{case.name}: sharded output differs (workers={workers})"
+    counters = diagnostics.stages['partition'].counters
+    assert counters['chunks'] > 1, f"{case.name}: read in one chunk"
+    return f"{counters['shards']} shards from {counters['chunks']} chunks"
+
+
+# Run in order: later checks reuse earlier outputs from case.found
+CHECKS = [
+    check_cycles,
+    check_shells,
+    check_smurfing,
+    check_scoring,
+    check_sharding,
+]
+
+
+def random_frame(seed: int, accounts: int = 40, rows: int = 90) -> TransactionFrame:
+    """Small random graph with cycles and chains, fan-in/out hubs and a high-velocity account."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    lines = ["transaction_id,sender_id,receiver_id,amount,timestamp"]
+
+    def add(sender: int, receiver: int, hours: float) -> None:
+        timestamp = start + timedelta(hours=hours)
+        lines.append(f"TXN_{len(lines):05d},ACC_{sender:03d},ACC_{receiver:03d},"
+                     f"{rng.randint(100, 5000)}.00,{timestamp:%Y-%m-%d %H:%M:%S}")
+
+    for _ in range(rows):
+        sender, receiver = rng.sample(range(accounts), 2)
+        add(sender, receiver, rng.uniform(0, 24 * 120))
+    hub = accounts
+    for sender in rng.sample(range(accounts), 12):
+        add(sender, hub, rng.uniform(0, 60))
+    for receiver in rng.sample(range(accounts), 11):
+        add(hub + 1, receiver, rng.uniform(500, 560))
+    for _ in range(60):
+        add(hub + 2, rng.randrange(accounts), rng.uniform(1000, 1010))
+    return parse_csv_frame("\n".join(lines) + "\n")
+
+
+
+def disjoint_frame(parts: int, rows: int) -> TransactionFrame:
+    """parts synthetic datasets with disjoint account and transaction IDs (several components to shard)."""
+    lines = []
+    for part in range(parts):
+        chunks = generate_dataset(rows, seed=part).iter_csv()
+        header = next(chunks)
+        lines.extend(chunk.replace('ACC_', f'P{part}_').replace('TXN_', f'T{part}_') for chunk in chunks)
+    return parse_csv_frame(header + "".join(lines))
+
+
+def cases():
+    yield Case("sample_transactions.csv", parse_csv_frame((project_root / 'sample_transactions.csv').read_text()))
+    for seed in range(5):
+        yield Case(f"random graph {seed}", random_frame(seed))
+    for rows, seed in ((10_000, 1), (20_000, 2)):
+        yield Case(f"synthetic {rows:,} rows", generate_dataset(rows, seed=seed).to_frame(), bounded=True)
+    yield Case("4 synthetic datasets of 3,000 rows", disjoint_frame(4, 3_000), bounded=True)
+
+
+if __name__ == "__main__":
+    try:
+        for case in cases():
+            print(f"[OK] {case.name}: " + ", ".join(check(case) for check in CHECKS))
+    except Exception as e:
+        print(f"[ERROR] {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,113 @@
+"""Check JobManager: cancelling, history eviction and recovering from a broken pool."""
+import multiprocessing
+import os
+import signal
+import sys
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / 'benchmarks'))
+
+from backend.services.job_manager import JobManager
+from backend.utils.csv_parser import parse_csv_frame
+from synthetic_data import generate_dataset
+
+SMALL_CSV = """transaction_id,sender_id,receiver_id,amount,timestamp
+TXN_001,ACC_001,ACC_002,1000.00,2024-01-15 10:00:00
+TXN_002,ACC_002,ACC_003,2000.00,2024-01-15 11:00:00
+TXN_003,ACC_003,ACC_001,1500.00,2024-01-15 12:00:00
+"""
+
+
+def check_cancel(small, large) -> None:
+    manager = JobManager(max_workers=1)
+    try:
+        running = manager.submit(large)
+        queued = manager.submit(small)
+        assert (running.status, queued.status) == ('running', 'queued'), (running.status, queued.status)
+
+        manager.cancel(queued.job_id)
+        assert queued.status == 'cancelled' and queued.future.cancelled()
+        print("[OK] A queued job is cancelled before it starts")
+
+        # A running job runs to completion, but its result is discarded
+        manager.cancel(running.job_id)
+        assert running.status == 'cancelled'
+        assert running.future.result(timeout=120) is None
+        assert running.status == 'cancelled' and running.finished_at is not None
+        print("[OK] A job cancelled while running resolves to None")
+
+        # The cancelled queued job was skipped; the next one still runs
+        after = manager.submit(small)
+        assert after.future.result(timeout=120)['summary']['total_accounts_analyzed'] == 3
+        assert after.status == 'completed'
+    finally:
+        manager.shutdown()
+
+
+def check_history(small) -> None:
+    manager = JobManager(max_workers=1, history_limit=2)
+    jobs = [manager.add_completed({'job': n}) for n in range(3)]
+    assert manager.get(jobs[0].job_id) is None
+    assert [manager.get(job.job_id).future.result() for job in jobs[1:]] == [{'job': 1}, {'job': 2}]
+
+    # Unfinished jobs are never evicted; a cancelled queued job counts as finished
+    try:
+        running = manager.submit(small)
+        queued = manager.submit(small)
+        manager.cancel(queued.job_id)
+        assert manager.get(running.job_id) is running
+        assert manager.get(jobs[1].job_id) is None and manager.get(jobs[2].job_id) is not None
+        running.future.result(timeout=120)
+        assert manager.get(jobs[2].job_id) is None
+        assert manager.get(queued.job_id) is queued and manager.get(running.job_id) is running
+    finally:
+        manager.shutdown()
+    print("[OK] Only the newest history_limit finished jobs are kept")
+
+
+def check_broken_pool(small, large) -> None:
+    manager = JobManager(max_workers=1)
+    try:
+        # A worker killed mid-job (e.g. by the OOM killer) breaks the pool
+        # (_task_done); the next job gets a fresh one
+        job = manager.submit(large)
+        for worker in multiprocessing.active_children():
+            os.kill(worker.pid, signal.SIGKILL)
+        assert isinstance(job.future.exception(timeout=120), BrokenProcessPool)
+        assert job.status == 'failed'
+        after = manager.submit(small)
+        assert after.future.result(timeout=120) is not None and after.status == 'completed'
+        print("[OK] A job whose worker dies fails, and the pool is restarted")
+
+        # A pool already broken when a job is handed to it (_dispatch)
+        broken = ProcessPoolExecutor(max_workers=1)
+        wait([broken.submit(os._exit, 1)])
+        manager._executor.shutdown()
+        manager._executor = broken
+        job = manager.submit(small)
+        assert isinstance(job.future.exception(timeout=120), BrokenProcessPool)
+        after = manager.submit(small)
+        assert after.future.result(timeout=120) is not None and after.status == 'completed'
+        print("[OK] A job handed to a broken pool fails, and the pool is restarted")
+    finally:
+        manager.shutdown()
+
+
+if __name__ == "__main__":
+    try:
+        small = parse_csv_frame(SMALL_CSV)
+        # Long enough that the job is still running when cancelled or killed
+        large = generate_dataset(500_000, seed=1).to_frame()
+        check_cancel(small, large)
+        check_history(small)
+        check_broken_pool(small, large)
+    except Exception as e:
+        print(f"[ERROR] {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,97 @@
+"""Check ResultCache: memory LRU, the disk tier and result format versions."""
+import io
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from backend.services import result_cache
+from backend.services.result_cache import ResultCache, cache_key
+
+
+def check_memory() -> None:
+    cache = ResultCache(max_memory_bytes=10)
+    cache.put('a', b'aaaa')
+    cache.put('b', b'bbbb')
+    assert cache.get('a') == b'aaaa'
+    cache.put('c', b'cccc')  # over the limit: 'b' is the least recently used
+    assert cache.get('b') is None
+    assert cache.get('a') == b'aaaa' and cache.get('c') == b'cccc'
+    cache.put('big', b'x' * 11)  # larger than the tier: not stored, nothing evicted
+    assert cache.get('big') is None and cache.get('a') == b'aaaa'
+    stats = cache.stats()
+    assert stats['memory']['entries'] == 2 and stats['memory']['bytes'] == 8, stats
+    assert stats['memory']['hits'] == 4 and stats['misses'] == 2, stats
+    print("[OK] The memory tier evicts least recently used entries")
+
+
+def check_disk() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResultCache(max_memory_bytes=4, disk_dir=directory, max_disk_bytes=10)
+        cache.put('a', b'aaaa')
+        cache.put('b', b'bbbb')
+        assert sorted(path.name for path in Path(directory).iterdir()) == ['a.json', 'b.json']
+        assert cache.get('a') == b'aaaa'  # from disk: 'b' holds the memory tier
+        assert cache.stats()['disk']['hits'] == 1
+        cache.put('c', b'cccc')  # over the disk limit: 'b' is the least recently used
+        assert not (Path(directory) / 'b.json').exists()
+        assert cache.get('b') is None
+
+        # A file deleted behind the cache's back is a miss, and forgotten
+        (Path(directory) / 'a.json').unlink()  # 'c' holds the memory tier
+        assert cache.get('a') is None
+        assert cache.stats()['disk']['entries'] == 1
+        cache.put('d', b'dd')
+
+        # After a restart the disk tier is indexed from the directory;
+        # leftover temporary files are removed
+        (Path(directory) / 'e.0123.tmp').write_bytes(b'partial')
+        restarted = ResultCache(max_memory_bytes=4, disk_dir=directory, max_disk_bytes=10)
+        assert restarted.stats()['disk']['entries'] == 2 and restarted.stats()['disk']['bytes'] == 6
+        assert restarted.get('c') == b'cccc' and restarted.get('d') == b'dd'
+        assert not (Path(directory) / 'e.0123.tmp').exists()
+
+        # A smaller limit at startup evicts the oldest files
+        ResultCache(max_memory_bytes=4, disk_dir=directory, max_disk_bytes=4)
+        assert sorted(path.name for path in Path(directory).iterdir()) == ['d.json']
+
+        restarted.clear()
+        assert restarted.stats()['disk']['entries'] == 0 and not any(Path(directory).iterdir())
+    print("[OK] The disk tier evicts least recently used files and survives restarts")
+
+
+def check_format_version() -> None:
+    upload = io.BytesIO(b'transaction_id,sender_id,receiver_id,amount,timestamp\n')
+    parameters = {'cycle_max_length': 5}
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResultCache(max_memory_bytes=1 << 20, disk_dir=directory, max_disk_bytes=1 << 20)
+        key = cache_key(upload, parameters)
+        assert upload.tell() == 0
+        cache.put(key, b'{"old": true}')
+
+        version = result_cache.RESULT_FORMAT_VERSION
+        result_cache.RESULT_FORMAT_VERSION = version + 1
+        try:
+            new_key = cache_key(upload, parameters)
+        finally:
+            result_cache.RESULT_FORMAT_VERSION = version
+        assert new_key != key
+        assert cache.get(new_key) is None
+        restarted = ResultCache(max_memory_bytes=1 << 20, disk_dir=directory, max_disk_bytes=1 << 20)
+        assert restarted.get(new_key) is None and restarted.get(key) == b'{"old": true}'
+    print("[OK] Results stored under another RESULT_FORMAT_VERSION are not served")
+
+
+if __name__ == "__main__":
+    try:
+        check_memory()
+        check_disk()
+        check_format_version()
+    except Exception as e:
+        print(f"[ERROR] {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,138 @@
+"""Check binary transaction files: the write/load round trip and every corruption check."""
+import io
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from backend.services.detection_engine import run_detection_output
+from backend.utils.csv_parser import parse_csv_frame
+from backend.utils.transaction_file import (
+    load_transaction_file,
+    read_transaction_file_header,
+    write_transaction_file,
+)
+
+# Accounts first seen out of ID order, so writing renumbers every code
+TEST_CSV = """transaction_id,sender_id,receiver_id,amount,timestamp
+TXN_001,ACC_D,ACC_B,1000.00,2024-01-15 10:00:00
+TXN_002,ACC_B,ACC_C,2000.50,2024-01-15 11:00:00
+TXN_003,ACC_C,ACC_D,1500.25,2024-01-16 12:00:00
+TXN_004,ACC_A,ACC_D,99.99,2024-01-14 09:30:00
+TXN_005,ACC_C,ACC_C,10.00,2024-01-17 08:00:00
+"""
+
+
+def check_round_trip(frame, directory: Path) -> Path:
+    path = directory / 'transactions.mmtx'
+    header = write_transaction_file(frame, path)
+    assert (header.row_count, header.account_count) == (5, 4)
+    assert not (directory / 'transactions.mmtx.partial').exists()
+
+    for source in (path, io.BytesIO(path.read_bytes())):
+        loaded = load_transaction_file(source)
+        assert loaded.account_ids == ['ACC_A', 'ACC_B', 'ACC_C', 'ACC_D']
+        assert loaded.to_transactions() == frame.to_transactions()
+
+    expected, _ = run_detection_output(frame, cycle_workers=1)
+    output, _ = run_detection_output(load_transaction_file(path), cycle_workers=1)
+    for result in (expected, output):
+        del result['summary']['processing_time_seconds']
+    assert output == expected
+    print("[OK] A written file loads back to the same transactions and detection output")
+    return path
+
+
+def corrupt(path: Path, name: str, edit) -> bytes:
+    """The file's bytes with edit(values) applied to a copy of section name's values."""
+    header = read_transaction_file_header(path)
+    data = bytearray(path.read_bytes())
+    dtype = {
+        'account_offsets': '<i8', 'account_data': 'u1', 'sender': '<i4', 'receiver': '<i4',
+        'timestamp': '<i8', 'amount': '<f8', 'transaction_id_offsets': '<i8',
+    }[name]
+    offset, size = header.sections[name]
+    edit(np.frombuffer(memoryview(data)[offset:offset + size], dtype=dtype))
+    return bytes(data)
+
+
+def with_section(path: Path, name: str, offset: int, size: int) -> bytes:
+    """The file's bytes with section name's header entry replaced."""
+    header = read_transaction_file_header(path)
+    header.sections[name] = (offset, size)
+    data = path.read_bytes()
+    packed = header.pack()
+    return packed + data[len(packed):]
+
+
+def set_value(index: int, value):
+    def edit(values: np.ndarray) -> None:
+        values[index] = value
+    return edit
+
+
+def swap(values: np.ndarray) -> None:
+    values[[0, 1]] = values[[1, 0]]
+
+
+def check_corruption(path: Path) -> None:
+    header = read_transaction_file_header(path)
+    sender_offset, sender_size = header.sections['sender']
+    accounts = header.account_count
+    data = path.read_bytes()
+    cases = [
+        ("not a transaction file", b'XXXX' + data[4:], "Not a binary transaction file"),
+        ("unknown version", data[:4] + (99).to_bytes(4, 'little') + data[8:], "Unsupported transaction file version"),
+        ("section size off by a row", with_section(path, 'sender', sender_offset, sender_size - 4),
+         "bad sender section"),
+        ("section past the end", with_section(path, 'sender', len(data), sender_size), "bad sender section"),
+        ("truncated file", data[:header.sections['transaction_id_data'][0]], "bad transaction_id_data section"),
+        ("offsets not ending at the data", corrupt(path, 'transaction_id_offsets', set_value(-1, 1000)),
+         "bad transaction_id offsets"),
+        ("decreasing offsets", corrupt(path, 'account_offsets', set_value(1, 11)), "bad account offsets"),
+        ("sender code out of range", corrupt(path, 'sender', set_value(0, accounts)), "sender code out of range"),
+        ("negative receiver code", corrupt(path, 'receiver', set_value(2, -1)), "receiver code out of range"),
+        ("NaN amount", corrupt(path, 'amount', set_value(1, np.nan)), "amounts must be positive and finite"),
+        ("infinite amount", corrupt(path, 'amount', set_value(1, np.inf)), "amounts must be positive and finite"),
+        ("zero amount", corrupt(path, 'amount', set_value(3, 0.0)), "amounts must be positive and finite"),
+        ("negative amount", corrupt(path, 'amount', set_value(4, -5.0)), "amounts must be positive and finite"),
+        ("timestamp after the header's range", corrupt(path, 'timestamp', set_value(0, header.last_timestamp + 1)),
+         "timestamps outside the header's time range"),
+        ("timestamp before the header's range",
+         corrupt(path, 'timestamp', set_value(0, header.first_timestamp - 1)),
+         "timestamps outside the header's time range"),
+        # Account IDs are ACC_A..ACC_D, 5 bytes each: swap or repeat the first two
+        ("unsorted account IDs", corrupt(path, 'account_data', lambda values: swap(values.reshape(-1, 5))),
+         "account IDs not sorted and unique"),
+        ("duplicate account IDs", corrupt(path, 'account_data', set_value(9, ord('A'))),
+         "account IDs not sorted and unique"),
+    ]
+    for description, content, message in cases:
+        try:
+            load_transaction_file(io.BytesIO(content))
+        except ValueError as e:
+            assert message in str(e), f"{description}: {e}"
+        else:
+            raise AssertionError(f"{description}: loaded without error")
+
+    # Without verify only the layout is checked
+    unverified = load_transaction_file(io.BytesIO(corrupt(path, 'amount', set_value(1, np.nan))), verify=False)
+    assert np.isnan(unverified.amount[1])
+    print(f"[OK] All {len(cases)} corrupted files are rejected with the matching error")
+
+
+if __name__ == "__main__":
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = check_round_trip(parse_csv_frame(TEST_CSV), Path(directory))
+            check_corruption(path)
+    except Exception as e:
+        print(f"[ERROR] {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)